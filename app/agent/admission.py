@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+
+from app.config import settings
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Smoothing of the average slot hold time, Retry-After estimated from it
+_HOLD_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """
+    Request not admitted, queue full, session over its share or wait timed out.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Too many requests ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Slot:
+    """
+    Admitted request's slot, released exactly once however often release is called.
+    """
+
+    def __init__(self, controller: "AdmissionController", session_key: str):
+        self._controller = controller
+        self._session_key = session_key
+        self._acquired_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._session_key, time.monotonic() - self._acquired_at)
+
+    async def __aenter__(self) -> "Slot":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Concurrency limiter in front of LLM-bound requests.
+    Bounded wait queue it keeps, waiters per session round robin admitted,
+    so one client every slot cannot take.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_per_session: int,
+    ):
+        """
+        Initialize controller.
+        Args:
+            max_concurrency: Requests running at once, 0 disables admission control
+            max_queue: Requests waiting at most, beyond it rejected at once they are
+            queue_timeout: Seconds a request waits before rejected it is
+            max_per_session: Running plus waiting requests of one session, 0 unlimited
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_per_session = max_per_session
+        self._active = 0
+        self._active_by_session: dict[str, int] = {}
+        self._waiters: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._avg_hold_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def acquire(self, session_key: str) -> Slot:
+        """
+        Wait for a slot, rejected fast when the queue full is.
+        Args:
+            session_key: Session the request belongs to, fairness unit
+        Returns:
+            Slot, released when the response finished is
+        Raises:
+            AdmissionRejected: Queue full, session share used up, or wait timed out
+        """
+        metrics = get_metrics()
+        if self.max_concurrency <= 0:
+            return Slot(self, session_key)
+
+        # Session share checked first, free slots one session never all takes
+        session_load = self._active_by_session.get(session_key, 0) + len(
+            self._waiters.get(session_key, ()))
+        if self.max_per_session > 0 and session_load >= self.max_per_session:
+            raise self._reject("session_limit")
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._grant(session_key)
+            metrics.observe("admission.wait_seconds", 0.0)
+            return Slot(self, session_key)
+
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(session_key, deque()).append(future)
+        self._update_gauges()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted while timing out, handed back the slot is
+                self._release(session_key, 0.0)
+            else:
+                future.cancel()
+                self._remove_waiter(session_key, future)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("timeout") from None
+            raise
+
+        metrics.observe("admission.wait_seconds", time.monotonic() - start)
+        return Slot(self, session_key)
+
+    def _grant(self, session_key: str) -> None:
+        self._active += 1
+        self._active_by_session[session_key] = self._active_by_session.get(session_key, 0) + 1
+        get_metrics().increment("admission.admitted")
+        self._update_gauges()
+
+    def _release(self, session_key: str, held_seconds: float) -> None:
+        if self.max_concurrency <= 0:
+            return
+        self._active -= 1
+        remaining = self._active_by_session.get(session_key, 1) - 1
+        if remaining > 0:
+            self._active_by_session[session_key] = remaining
+        else:
+            self._active_by_session.pop(session_key, None)
+        if held_seconds > 0:
+            self._avg_hold_seconds += _HOLD_TIME_SMOOTHING * (held_seconds - self._avg_hold_seconds)
+        self._wake()
+
+    def _wake(self) -> None:
+        """
+        Free slots to waiting sessions hand out, one session per turn.
+        """
+        while self._active < self.max_concurrency and self._waiters:
+            session_key, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(session_key)
+            else:
+                del self._waiters[session_key]
+            if future.done():
+                continue
+            self._grant(session_key)
+            future.set_result(None)
+        self._update_gauges()
+
+    def _remove_waiter(self, session_key: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(session_key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiters[session_key]
+        self._update_gauges()
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        # Expected wait, queued requests times average hold time over the slots
+        expected = (self.queued + 1) * self._avg_hold_seconds / max(self.max_concurrency, 1)
+        retry_after = max(1, math.ceil(expected))
+        get_metrics().increment(f"admission.rejected.{reason}")
+        logger.warning(
+            f"Request rejected ({reason}): {self._active} active, {self.queued} queued")
+        return AdmissionRejected(reason, retry_after)
+
+    def _update_gauges(self) -> None:
+        metrics = get_metrics()
+        metrics.set_gauge("admission.active", self._active)
+        metrics.set_gauge("admission.queued", self.queued)
+
+
+# Global controller instance, singleton pattern
+_controller: AdmissionController | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Get or create admission controller.
+    Returns:
+        AdmissionController instance
+    """
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            max_concurrency=settings.chat_max_concurrency,
+            max_queue=settings.chat_queue_size,
+            queue_timeout=settings.chat_queue_timeout_seconds,
+            max_per_session=settings.chat_max_per_session,
+        )
+    return _controller
@@ -1,16 +1,34 @@
 import logging
-from typing import AsyncGenerator
+import time
+from typing import Any, AsyncGenerator
 import asyncio
 
 from agno.agent import Agent
 from agno.db.sqlite import SqliteDb
-from agno.models.openai import OpenAIChat
+from agno.memory.manager import MemoryManager
+from agno.run.agent import RunOutput
+from agno.run.base import RunContext
+from agno.session.summary import SessionSummaryManager
 
+from app.agent.coalescing import SingleFlight, coalescing_key
+from app.agent.events import StreamEvent, source_metadata
+from app.agent.history import SessionHistoryManager
+from app.agent.memory_queue import MemoryExtractionQueue
+from app.agent.prefetch import get_prefetch_cache
+from app.agent.usage import UsageMeter, get_usage_recorder
+from app.knowledge.retrieval import RetrievalResult, adaptive_search
+from app.deadline import Deadline, StageTimeout, record_timeout, request_deadline
 from app.knowledge.store import get_knowledge
+from app.knowledge.summaries import get_summary_store, is_overview_question
+from app.knowledge.tenants import DEFAULT_TENANT, normalize_tenant
 from app.config import settings
+from app.metrics import get_metrics
+from app.resilience import ResilientOpenAIChat
 
 logger = logging.getLogger(__name__)
 
+AGENT_DB_FILE = "data/agno.db"
+
 # Global database instance for session/memory persistance
 _db: SqliteDb | None = None
 
@@ -23,11 +41,28 @@ def get_db() -> SqliteDb:
     """
     global _db
     if _db is None:
-        _db = SqliteDb(db_file="data/agno.db")
+        _db = SqliteDb(db_file=AGENT_DB_FILE)
         logger.info("Database initialized")
     return _db
 
 
+def session_key_for(session_id: str | None, tenant: str | None) -> str:
+    """
+    Key of a session in the agent's store, tenants never sharing one.
+    Args:
+        session_id: Client session identifier, default session if None
+        tenant: Tenant of the request, default tenant if None
+    Returns:
+        Session and user key
+    """
+    tenant = normalize_tenant(tenant)
+    session_key = session_id or "default"
+    if tenant != DEFAULT_TENANT:
+        # Sessions of different tenants, never mixed they are
+        session_key = f"{tenant}:{session_key}"
+    return session_key
+
+
 class ChatAgent:
 
     def __init__(self):
@@ -35,13 +70,19 @@ class ChatAgent:
         Initialize agent with openAI, database and knowledge it does.
         """
         db = get_db()
-        self.knowledge = get_knowledge()
 
-        model = OpenAIChat(
+        # Retried until the first token, circuit broken while the API is down
+        model = ResilientOpenAIChat(
             id=settings.llm_model,
             api_key=settings.llm_api_key,
+            # Hung model calls, past the generation budget abandoned they are
+            timeout=settings.generation_timeout_seconds,
+            max_retries=0,
         )
 
+        # Model filled in by Agno, the agent's own model it uses
+        memory_manager = MemoryManager(db=db)
+
         self.agent = Agent(
             name="RAG PDF Chatbot Agent",
             description="Helpful assistant, answers questions about uploaded PDFs",
@@ -52,36 +93,275 @@ class ChatAgent:
                           ],
             model=model,
             db=db,
-            knowledge=self.knowledge,
-            enable_user_memories=True,
+            # Tenant chosen per run, so a retriever instead of one shared knowledge base
+            knowledge_retriever=self._retrieve,
+            memory_manager=memory_manager,
+            add_memories_to_context=True,
             search_knowledge=True,
-            markdown=True
+            markdown=True,
+            add_history_to_context=True,
+            num_history_runs=max(settings.history_turns, 1),
+            add_session_summary_to_context=True,
+        )
+
+        # Older turns folded into summary, in background after each turn
+        self.history = SessionHistoryManager(
+            agent=self.agent,
+            summary_manager=SessionSummaryManager(model=model),
+            max_turns=settings.history_turns,
+            max_tokens=settings.history_max_tokens,
+        )
+
+        # User memories extracted in batches, after the stream completes
+        self.agent.set_id()
+        self.memories = MemoryExtractionQueue(
+            memory_manager=memory_manager,
+            agent_id=self.agent.id,
+            every=settings.memory_extraction_every,
+            concurrency=settings.memory_extraction_concurrency,
+            max_wait_seconds=settings.memory_extraction_max_wait_seconds,
         )
 
+        # Identical concurrent questions, one upstream generation they share
+        self.coalescer = SingleFlight()
+
         logger.info(f"Chat agent initialized with model: {settings.llm_model}")
 
+    def _retrieve(
+        self,
+        agent: Agent,
+        query: str,
+        num_documents: int | None = None,
+        filters: dict[str, Any] | None = None,
+        run_context: RunContext | None = None,
+        **kwargs: Any,
+    ) -> list[dict[str, Any]] | None:
+        """
+        Knowledge search tool of the agent, the run's tenant it searches.
+        Args:
+            agent: Agent running the tool
+            query: Search query chosen by the model
+            num_documents: Results wanted, knowledge default if None
+            filters: Metadata filters, the run's filters if None
+            run_context: Run context, tenant in its metadata
+        Returns:
+            Matching documents as dicts
+        """
+        metadata = (run_context.metadata if run_context else None) or {}
+        if filters is None and run_context is not None:
+            filters = run_context.knowledge_filters
+        knowledge = get_knowledge(metadata.get("tenant"))
+        result = adaptive_search(knowledge, query, filters=filters, max_k=num_documents)
+        return [document.to_dict() for document in result.documents]
+
     async def stream_response(
         self,
         message: str,
         session_id: str | None = None,
+        filters: dict[str, Any] | None = None,
+        tenant: str | None = None,
+        coalesce: bool = True,
+        prefetch_token: str | None = None,
+        deadline: Deadline | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Stream response from agent, token by token, Agno handles 
         session history and knowledge search automatically.
+        Identical questions of sessions without history or memories,
+        onto one generation in flight coalesced they are.
         Args:
             message: User's question
             session_id: Session identifier
+            filters: Metadata filters scoping retrieval, e.g. file_id list
+            tenant: Tenant whose knowledge base searched is, default tenant if None
+            coalesce: Share an identical in-flight generation, False a private one forces
+            prefetch_token: Token of a retrieval prefetched while typing
+            deadline: Request deadline, configured default from now if None
         Yields:
             Token chunks
         """
+        async for event in self.stream_events(
+                message, session_id, filters, tenant, coalesce, prefetch_token, deadline):
+            if event.text is not None:
+                yield event.text
+
+    async def stream_events(
+        self,
+        message: str,
+        session_id: str | None = None,
+        filters: dict[str, Any] | None = None,
+        tenant: str | None = None,
+        coalesce: bool = True,
+        prefetch_token: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """
+        Stream structured events, sources as soon as retrieval finishes,
+        then tokens, then done with usage and timings.
+        Coalesced followers the turn into their own session save, usage of
+        their own they record, their own deadline they keep.
+        Args:
+            message: User's question
+            session_id: Session identifier
+            filters: Metadata filters scoping retrieval, e.g. file_id list
+            tenant: Tenant whose knowledge base searched is, default tenant if None
+            coalesce: Share an identical in-flight generation, False a private one forces
+            prefetch_token: Token of a retrieval prefetched while typing, reused if the text matches
+            deadline: Request deadline, stage budgets within it, configured default from now if None
+        Yields:
+            Stream events
+        """
+        tenant = normalize_tenant(tenant)
+        session_key = session_key_for(session_id, tenant)
+        deadline = deadline or request_deadline()
+        meter = UsageMeter(tenant=tenant, session_id=session_id or "default")
+
+        coalescing = coalesce and settings.chat_coalescing
+        if coalescing:
+            # Own history, summary or memories shaping the answer, never shared it is
+            coalescing = await asyncio.to_thread(self._stateless, session_key)
+        if not coalescing:
+            async for event in self._generate(
+                    message, session_key, filters, tenant, prefetch_token, deadline, meter):
+                yield event
+            return
+
+        leading = False
+
+        def lead() -> AsyncGenerator[StreamEvent, None]:
+            nonlocal leading
+            leading = True
+            return self._generate(message, session_key, filters, tenant, prefetch_token, deadline, meter)
+
+        start = time.perf_counter()
+        answer: list[str] = []
+        key = coalescing_key(message, tenant, self._knowledge_version(tenant), filters)
+        events = self.coalescer.stream(key, lead)
         try:
-            logger.info(f"Streaming response for session: {session_id}")
+            while True:
+                try:
+                    # Followers their own deadline keep, the leader's never extends it
+                    event = await asyncio.wait_for(anext(events), timeout=deadline.remaining())
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    record_timeout("generation")
+                    yield StreamEvent.error(str(StageTimeout("generation", deadline.seconds)))
+                    return
+
+                # Leader crashes, as plain error text the coalescer publishes
+                if isinstance(event, str):
+                    event = StreamEvent.token(event)
+                if leading:
+                    # Leader's turn and usage, its own run already saves
+                    yield event
+                    continue
+
+                if event.type == "token":
+                    meter.first_token_ms = meter.first_token_ms or (time.perf_counter() - start) * 1000
+                    answer.append(event.data["text"])
+                elif event.type == "done":
+                    # Turn into the follower's own session, its next question history it gives
+                    await asyncio.to_thread(
+                        self.history.record_turn, session_key, message, "".join(answer),
+                        {"tenant": tenant, "coalesced": True})
+                    self.memories.enqueue(session_key, message)
+                    timings = {"total_ms": (time.perf_counter() - start) * 1000}
+                    if meter.first_token_ms is not None:
+                        timings["first_token_ms"] = meter.first_token_ms
+                    event = StreamEvent("done", {
+                        **event.data,
+                        # Upstream tokens the leader spent, none this request did
+                        "usage": None,
+                        "timings": {stage: round(ms, 3) for stage, ms in timings.items()},
+                        "coalesced": True,
+                    })
+                yield event
+        finally:
+            await events.aclose()
+            if not leading:
+                meter.total_ms = (time.perf_counter() - start) * 1000
+                get_usage_recorder().record(meter)
 
+    def _stateless(self, session_key: str) -> bool:
+        """
+        No history, summary or memories the session has, a shared answer its own would be.
+        Store unreadable, a private generation safer is.
+        """
+        try:
+            if self.history.has_context(session_key):
+                return False
+            return not self.memories.memory_manager.get_user_memories(user_id=session_key)
+        except Exception as e:
+            logger.warning(f"Session state unreadable, not coalescing {session_key}: {e}")
+            return False
+
+    def _knowledge_version(self, tenant: str) -> int:
+        """
+        Table version of the tenant's knowledge, coalesced answers stale never get.
+        """
+        try:
+            return get_knowledge(tenant).vector_db.table.version
+        except Exception:
+            return 0
+
+    async def _generate(
+        self,
+        message: str,
+        session_key: str,
+        filters: dict[str, Any] | None,
+        tenant: str,
+        prefetch_token: str | None = None,
+        deadline: Deadline | None = None,
+        meter: UsageMeter | None = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """
+        One upstream generation, retrieval and agent run of the leading session.
+        Tokens and timings onto the meter added, recorded once it ends.
+        """
+        deadline = deadline or request_deadline()
+        meter = meter or UsageMeter(tenant=tenant, session_id=session_key)
+        start = time.perf_counter()
+        timings: dict[str, float] = {}
+        timeouts: list[str] = []
+        usage: dict[str, int] | None = None
+        self.history.begin_turn(session_key)
+        try:
+            logger.info(f"Streaming response for session: {session_key}")
+
+            sources: list[dict[str, Any]] = []
+            mode = "none"
             try:
-                search_results = self.knowledge.search(message, max_results=3)
+                # Overview questions, precomputed summaries instead of snippets they get
+                overview = await asyncio.to_thread(self._overview_context, message, filters, tenant)
+                search_results = []
+                if overview is None:
+                    # Depth by relevance, nothing relevant no context block gives
+                    # Prefetched while typing, off the critical path retrieval already is
+                    retrieval = None
+                    if prefetch_token:
+                        retrieval = get_prefetch_cache().take(prefetch_token, message, tenant, filters)
+                    if retrieval is None:
+                        retrieval = await self._search(message, filters, tenant, deadline, timeouts, meter)
+                    search_results = retrieval.documents
+                    scores = retrieval.scores + [None] * (len(search_results) - len(retrieval.scores))
+                    sources = [source_metadata(i, doc, score)
+                               for i, (doc, score) in enumerate(zip(search_results, scores), 1)]
+                    mode = "chunks" if search_results else "none"
+                else:
+                    mode = "summaries"
+
+                if overview is not None:
+                    logger.info("Overview question, answered from document summaries")
+                    enhanced_message = f"""Based on the following summaries of uploaded documents:
+                        {overview}
+
+                        User question: {message}
+
+                        Please answer the question using the summaries above."""
 
                 # Build context for search results
-                if search_results:
+                elif search_results:
                     logger.info(
                         f"Found {len(search_results)} relevant documents")
 
@@ -108,20 +388,135 @@ class ChatAgent:
                 logger.warning(f"Knowledge search failed: {e}")
                 enhanced_message = message
 
-            response_stream = self.agent.run(
+            # Sources before generation, clients render them while the model queues
+            timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
+            yield StreamEvent("sources", {"mode": mode, "sources": sources,
+                                          "retrieval_ms": round(timings["retrieval_ms"], 3)})
+
+            response_stream = iter(self.agent.run(
                 enhanced_message,
-                user_id=session_id or "default",
+                user_id=session_key,
+                session_id=session_key,
                 stream=True,
-            )
+                yield_run_output=True,
+                metadata={"user_message": message, "tenant": tenant},
+                # Agent's own knowledge searches, same scope they keep
+                knowledge_filters=filters,
+            ))
 
-            for chunk in response_stream:
+            # Chunks pulled in worker threads, a hung model the event loop never blocks
+            deadline.enter("generation")
+            budget = deadline.budget("generation")
+            generation_ends = time.monotonic() + budget
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        asyncio.to_thread(meter.run, next, response_stream, None),
+                        timeout=max(generation_ends - time.monotonic(), 0.0),
+                    )
+                except TimeoutError:
+                    record_timeout("generation")
+                    raise StageTimeout("generation", budget)
+                if chunk is None:
+                    break
+
+                # Final run output, usage it carries, content already streamed
+                if isinstance(chunk, RunOutput):
+                    self._report_prompt_tokens(session_key, chunk)
+                    if chunk.metrics is not None:
+                        meter.prompt_tokens = chunk.metrics.input_tokens
+                        meter.completion_tokens = chunk.metrics.output_tokens
+                        usage = {
+                            "input_tokens": chunk.metrics.input_tokens,
+                            "output_tokens": chunk.metrics.output_tokens,
+                            "total_tokens": chunk.metrics.total_tokens,
+                            "embedding_tokens": meter.embedding_tokens,
+                        }
+                    continue
                 if hasattr(chunk, 'content') and chunk.content:
-                    yield chunk.content
-                    await asyncio.sleep(0)
+                    timings.setdefault("first_token_ms", (time.perf_counter() - start) * 1000)
+                    yield StreamEvent.token(chunk.content)
+
+            self.memories.enqueue(session_key, message)
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
+            yield StreamEvent("done", {
+                "usage": usage,
+                "timings": {stage: round(ms, 3) for stage, ms in timings.items()},
+                "timeouts": timeouts,
+            })
 
         except Exception as e:
             logger.error(f"Error streaming response: {e}")
-            yield f"\n[Error: {str(e)}]"
+            yield StreamEvent.error(str(e))
+
+        finally:
+            self.history.end_turn(session_key)
+            meter.first_token_ms = timings.get("first_token_ms")
+            meter.total_ms = (time.perf_counter() - start) * 1000
+            get_usage_recorder().record(meter)
+
+    async def _search(
+        self,
+        message: str,
+        filters: dict[str, Any] | None,
+        tenant: str,
+        deadline: Deadline,
+        timeouts: list[str],
+        meter: UsageMeter,
+    ) -> RetrievalResult:
+        """
+        Adaptive retrieval off the event loop, within the embedding and search budgets.
+        Timed out, no context instead of an error the answer gets.
+        """
+        def search() -> RetrievalResult:
+            return adaptive_search(get_knowledge(tenant), message, filters=filters, deadline=deadline)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(meter.run, search), timeout=deadline.budget("embedding", "search"))
+        except TimeoutError as e:
+            # Over budget stage reported, or the one running when cut off
+            stage = getattr(e, "stage", None) or deadline.stage or "embedding"
+            record_timeout(stage)
+            timeouts.append(stage)
+            logger.warning(f"Retrieval {stage} timed out, answering without context")
+            return RetrievalResult()
+
+    def _overview_context(
+        self,
+        message: str,
+        filters: dict[str, Any] | None,
+        tenant: str,
+    ) -> str | None:
+        """
+        Summaries context for an overview question, None if retrieval answers it.
+        Only file scopes summaries honour, other filters to retrieval fall back.
+        SQLite it reads, so in a worker thread it runs.
+        """
+        if not settings.document_summaries or not is_overview_question(message):
+            return None
+        if filters and set(filters) != {"file_id"}:
+            return None
+
+        file_ids = None
+        if filters:
+            value = filters["file_id"]
+            file_ids = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        context = get_summary_store().overview_context(tenant, file_ids, settings.summary_context_chars)
+        if context is not None:
+            get_metrics().increment("summaries.overview_answers")
+        return context
+
+    def _report_prompt_tokens(self, session_id: str, run_output: RunOutput) -> None:
+        """
+        Report prompt tokens of the turn, flat growth confirm it should.
+        """
+        if run_output.metrics is None:
+            return
+        prompt_tokens = run_output.metrics.input_tokens
+        get_metrics().observe("chat.prompt_tokens", prompt_tokens)
+        logger.info(
+            f"Prompt tokens for session {session_id}: {prompt_tokens}")
 
 
 # Global agent instance
@@ -138,3 +533,12 @@ def get_agent() -> ChatAgent:
     if _agent_instance is None:
         _agent_instance = ChatAgent()
     return _agent_instance
+
+
+async def flush_memories() -> None:
+    """
+    Extract every pending turn, on shutdown none lost.
+    No agent created yet, nothing pending there is.
+    """
+    if _agent_instance is not None:
+        await _agent_instance.memories.flush()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Any, AsyncGenerator, Callable, Hashable
+
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Trailing punctuation, the question's meaning it does not change
+_TRAILING = " ?!.\t\n"
+
+
+def normalize_question(message: str) -> str:
+    """
+    Question normalized, case, whitespace and trailing punctuation ignored.
+    Args:
+        message: User's question
+    Returns:
+        Normalized question
+    """
+    return _WHITESPACE.sub(" ", message.strip().lower()).rstrip(_TRAILING)
+
+
+def coalescing_key(
+    message: str,
+    tenant: str,
+    knowledge_version: Any,
+    filters: dict[str, Any] | None,
+) -> tuple:
+    """
+    Key of a generation, session-independent inputs only it holds.
+    Args:
+        message: User's question
+        tenant: Tenant searched
+        knowledge_version: Version of the tenant's table, new uploads a new key give
+        filters: Retrieval filters
+    Returns:
+        Hashable key
+    """
+    return (
+        tenant,
+        normalize_question(message),
+        knowledge_version,
+        json.dumps(filters, sort_keys=True, default=str) if filters else None,
+    )
+
+
+class _Flight:
+    """
+    One upstream generation, its items buffered for every subscriber.
+    """
+
+    def __init__(self):
+        self.tokens: list[Any] = []
+        self.done = False
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+    async def publish(self, token: Any) -> None:
+        async with self.changed:
+            self.tokens.append(token)
+            self.changed.notify_all()
+
+    async def finish(self) -> None:
+        async with self.changed:
+            self.done = True
+            self.changed.notify_all()
+
+
+class SingleFlight:
+    """
+    Identical in-flight requests, onto one upstream generation coalesced.
+    First request the generation starts, later ones attach and the
+    tokens so far replayed get, then live tokens with the leader they share.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def stream(
+        self,
+        key: Hashable,
+        generate: Callable[[], AsyncGenerator[Any, None]],
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Tokens of the generation under key, started if none running is.
+        Args:
+            key: Coalescing key
+            generate: Starts the upstream generation, called for the leader only
+        Yields:
+            Items of the generation, tokens or stream events
+        """
+        metrics = get_metrics()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.get_running_loop().create_task(self._run(key, flight, generate))
+            metrics.increment("coalescing.leaders")
+        else:
+            metrics.increment("coalescing.hits")
+        metrics.set_gauge("coalescing.in_flight", len(self._flights))
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(
+                        lambda: flight.done or position < len(flight.tokens))
+                    tokens = flight.tokens[position:]
+                    finished = flight.done
+                for token in tokens:
+                    yield token
+                position += len(tokens)
+                if finished and position >= len(flight.tokens):
+                    break
+        finally:
+            flight.subscribers -= 1
+            # Nobody listening anymore, the upstream generation stopped is
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                flight.task.cancel()
+
+    async def _run(
+        self,
+        key: Hashable,
+        flight: _Flight,
+        generate: Callable[[], AsyncGenerator[Any, None]],
+    ) -> None:
+        try:
+            async for token in generate():
+                await flight.publish(token)
+        except asyncio.CancelledError:
+            logger.info("Coalesced generation cancelled, no subscribers left")
+        except Exception as e:
+            logger.error(f"Coalesced generation failed: {e}")
+            await flight.publish(f"\n[Error: {str(e)}]")
+        finally:
+            # New requests a fresh generation start, from here on
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            get_metrics().set_gauge("coalescing.in_flight", len(self._flights))
+            await flight.finish()
@@ -0,0 +1,68 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from agno.knowledge.document import Document
+
+# Characters of each source chunk shown before the answer arrives
+SNIPPET_CHARS = 200
+
+
+@dataclass
+class StreamEvent:
+    """
+    One item of a chat stream: sources, token, done or error.
+    """
+
+    type: str
+    data: dict[str, Any]
+
+    @classmethod
+    def token(cls, text: str) -> "StreamEvent":
+        return cls("token", {"text": text})
+
+    @classmethod
+    def error(cls, message: str) -> "StreamEvent":
+        return cls("error", {"message": message})
+
+    @property
+    def text(self) -> str | None:
+        """
+        Text of the plain stream, tokens and errors only have it.
+        """
+        if self.type == "token":
+            return self.data["text"]
+        if self.type == "error":
+            return f"\n[Error: {self.data['message']}]"
+        return None
+
+    def to_sse(self) -> str:
+        """
+        Server-sent event with a type, JSON data newlines in tokens it keeps.
+        Returns:
+            Event frame
+        """
+        return f"event: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+def source_metadata(rank: int, document: Document, score: float | None) -> dict[str, Any]:
+    """
+    Metadata of one retrieved chunk, for the sources event.
+    Args:
+        rank: Position in the retrieval results, 1 is best
+        document: Retrieved chunk
+        score: Cosine similarity, None if the search gave none
+    Returns:
+        Source description
+    """
+    meta_data = document.meta_data or {}
+    return {
+        "rank": rank,
+        "name": document.name,
+        "file_id": meta_data.get("file_id"),
+        "filename": meta_data.get("filename"),
+        "page": meta_data.get("page"),
+        "section": meta_data.get("section"),
+        "score": None if score is None else round(score, 4),
+        "snippet": document.content[:SNIPPET_CHARS],
+    }
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any
+
+from agno.agent import Agent
+from agno.models.message import Message
+from agno.run.agent import RunInput, RunOutput
+from agno.run.base import RunStatus
+from agno.session.agent import AgentSession
+from agno.session.summary import SessionSummaryManager
+
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Session data key, how many runs already folded into summary it remembers
+FOLDED_RUNS_KEY = "history_folded_runs"
+
+
+def estimate_tokens(text: str | None) -> int:
+    """
+    Estimate token count, four characters per token assume we do.
+    Args:
+        text: Text to measure
+    Returns:
+        Approximate token count
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def _run_tokens(run) -> int:
+    return sum(
+        estimate_tokens(message.content if isinstance(message.content, str) else None)
+        for message in run.messages or []
+        if message.role in ("user", "assistant") and not message.from_history
+    )
+
+
+def run_question(run) -> str | None:
+    """
+    User's own question of a run, retrieval context not included.
+    Args:
+        run: Agno run output
+    Returns:
+        Question text
+    """
+    question = (run.metadata or {}).get("user_message")
+    if question is None and run.input is not None:
+        question = run.input.input_content_string()
+    return question
+
+
+def completed_runs(session) -> list:
+    """
+    Finished top-level runs of a session, oldest first, one per turn.
+    Args:
+        session: Agno session
+    Returns:
+        Run outputs
+    """
+    return [
+        run for run in session.runs or []
+        if run.parent_run_id is None and run.status == RunStatus.completed
+    ]
+
+
+def history_page(session, before: int | None, limit: int) -> dict[str, Any]:
+    """
+    One page of a session's messages, pages newest first, messages oldest first.
+    Turns numbered from 0, a cursor the first turn not returned it is.
+    Args:
+        session: Agno session, None for a session without turns
+        before: Turns before this one returned, newest page if None
+        limit: Turns per page
+    Returns:
+        Messages, cursor of the next older page or None, and total turns
+    """
+    runs = completed_runs(session) if session is not None else []
+    end = len(runs) if before is None else max(0, min(before, len(runs)))
+    start = max(0, end - limit)
+
+    messages: list[dict[str, Any]] = []
+    for turn in range(start, end):
+        run = runs[turn]
+        messages.append({"role": "user", "content": run_question(run) or "",
+                         "turn": turn, "created_at": run.created_at})
+        messages.append({"role": "assistant", "content": str(run.content or ""),
+                         "turn": turn, "created_at": run.created_at})
+    return {
+        "messages": messages,
+        "before": start if start > 0 else None,
+        "total_turns": len(runs),
+    }
+
+
+class _FoldedTurns:
+    """
+    Conversation slice for the summary manager, only the folded turns it exposes.
+    """
+
+    def __init__(self, messages: list[Message]):
+        self._messages = messages
+        self.summary = None
+
+    def get_messages(self) -> list[Message]:
+        return self._messages
+
+
+class SessionHistoryManager:
+    """
+    Bounded session history.
+    Last turns verbatim it keeps, older turns into a running summary folds it does.
+    Folding in the background happens, never on the request path.
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        summary_manager: SessionSummaryManager,
+        max_turns: int,
+        max_tokens: int,
+    ):
+        """
+        Initialize history manager.
+        Args:
+            agent: Agno agent owning the session store
+            summary_manager: Creates summaries of folded turns
+            max_turns: Turns kept verbatim in the prompt
+            max_tokens: Token ceiling for summary and verbatim history per session
+        """
+        self.agent = agent
+        self.summary_manager = summary_manager
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self._active: dict[str, int] = {}
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def begin_turn(self, session_id: str) -> None:
+        """
+        Mark turn started, no folding while it streams.
+        Args:
+            session_id: Session identifier
+        """
+        self._active[session_id] = self._active.get(session_id, 0) + 1
+
+    def end_turn(self, session_id: str) -> None:
+        """
+        Mark turn finished, background refresh schedule it does.
+        Args:
+            session_id: Session identifier
+        """
+        remaining = self._active.get(session_id, 1) - 1
+        if remaining > 0:
+            self._active[session_id] = remaining
+            return
+        self._active.pop(session_id, None)
+
+        if session_id in self._refreshing:
+            return
+        self._refreshing.add(session_id)
+        task = asyncio.get_running_loop().create_task(self.refresh(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def has_context(self, session_id: str) -> bool:
+        """
+        Earlier turns or a summary the session has, its prompts they shape.
+        Args:
+            session_id: Session identifier
+        Returns:
+            True if the session's history goes into its prompts
+        """
+        session = self.agent.get_session(session_id=session_id)
+        return session is not None and bool(completed_runs(session) or session.summary)
+
+    def record_turn(
+        self,
+        session_id: str,
+        question: str,
+        answer: str,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Save a turn answered by another session's run, e.g. a coalesced generation.
+        Blocking, from a worker thread call it.
+        Args:
+            session_id: Session the turn belongs to, its user too
+            question: User's question
+            answer: Answer streamed to the user
+            metadata: Run metadata, user_message always set
+        """
+        now = int(time.time())
+        # Agno saves no session without session data, so a new one gets it empty
+        session = self.agent.get_session(session_id=session_id) or AgentSession(
+            session_id=session_id, agent_id=self.agent.id, user_id=session_id,
+            session_data={}, created_at=now)
+        session.upsert_run(RunOutput(
+            run_id=str(uuid.uuid4()),
+            agent_id=self.agent.id,
+            agent_name=self.agent.name,
+            session_id=session_id,
+            user_id=session_id,
+            input=RunInput(input_content=question),
+            content=answer,
+            messages=[Message(role="user", content=question),
+                      Message(role="assistant", content=answer)],
+            metadata={**(metadata or {}), "user_message": question},
+            status=RunStatus.completed,
+            created_at=now,
+        ))
+        self.agent.save_session(session)
+
+    async def refresh(self, session_id: str) -> bool:
+        """
+        Refresh running summary, in a worker thread it runs.
+        Args:
+            session_id: Session identifier
+        Returns:
+            True if turns were folded
+        """
+        try:
+            return await asyncio.to_thread(self._refresh, session_id)
+        except Exception as e:
+            logger.warning(f"History refresh failed for session {session_id}: {e}")
+            return False
+        finally:
+            self._refreshing.discard(session_id)
+
+    def _verbatim_window(self, runs: list, summary_tokens: int) -> int:
+        """
+        Count of newest runs kept verbatim, turn limit and token ceiling both respected.
+        """
+        budget = self.max_tokens - summary_tokens
+        kept = 0
+        for run in reversed(runs[-self.max_turns:] if self.max_turns > 0 else []):
+            budget -= _run_tokens(run)
+            if budget < 0:
+                break
+            kept += 1
+        return kept
+
+    def _refresh(self, session_id: str) -> bool:
+        session = self.agent.get_session(session_id=session_id)
+        if session is None or not session.runs:
+            return False
+
+        runs = completed_runs(session)
+        session_data = session.session_data or {}
+        folded = session_data.get(FOLDED_RUNS_KEY, 0)
+        previous = session.summary.summary if session.summary else ""
+
+        keep = self._verbatim_window(runs, estimate_tokens(previous))
+        to_fold = runs[folded:len(runs) - keep]
+        if not to_fold:
+            return False
+
+        conversation: list[Message] = []
+        if previous:
+            conversation.append(Message(
+                role="assistant", content=f"Summary of the earlier conversation: {previous}"))
+        for run in to_fold:
+            conversation.append(Message(role="user", content=run_question(run)))
+            conversation.append(Message(role="assistant", content=str(run.content or "")))
+
+        summary = self.summary_manager.create_session_summary(_FoldedTurns(conversation))
+        if summary is None:
+            return False
+
+        # Newer turn started meanwhile, its save would overwrite ours, next time try we will
+        if session_id in self._active:
+            return False
+
+        # Folded messages as history tagged, Agno skips them when building context
+        for run in to_fold:
+            for message in run.messages or []:
+                message.from_history = True
+
+        session.summary = summary
+        session_data[FOLDED_RUNS_KEY] = folded + len(to_fold)
+        session.session_data = session_data
+        self.agent.save_session(session)
+
+        get_metrics().increment("history.folded_turns", len(to_fold))
+        logger.info(
+            f"Folded {len(to_fold)} turns into summary for session {session_id}, "
+            f"{keep} kept verbatim")
+        return True
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+
+from agno.memory.manager import MemoryManager
+from agno.models.message import Message
+
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryExtractionQueue:
+    """
+    Deferred user-memory extraction.
+    Turns per user it collects, in batches after the stream extracts them it does.
+    Waiting on memories, users no longer are.
+    """
+
+    def __init__(
+        self,
+        memory_manager: MemoryManager,
+        agent_id: str | None,
+        every: int,
+        concurrency: int,
+        max_wait_seconds: float = 0,
+    ):
+        """
+        Initialize extraction queue.
+        Args:
+            memory_manager: Agno memory manager, extraction and storage it does
+            agent_id: Agent identifier stored with memories
+            every: Turns batched per extraction call, 0 disables extraction
+            concurrency: Extraction calls allowed at once
+            max_wait_seconds: Partial batch older than this extracted anyway, 0 waits for a full one
+        """
+        self.memory_manager = memory_manager
+        self.agent_id = agent_id
+        self.every = every
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: dict[str, list[str]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def enqueue(self, user_id: str, message: str) -> None:
+        """
+        Queue finished turn, batch full then extraction schedule we do.
+        Args:
+            user_id: User whose memories these are
+            message: Raw user message of the turn
+        """
+        if self.every <= 0:
+            return
+
+        batch = self._pending.setdefault(user_id, [])
+        batch.append(message)
+        if len(batch) >= self.every:
+            self._take(user_id)
+        elif len(batch) == 1 and self.max_wait_seconds > 0:
+            # Session ended early, its turns still extracted once the batch is old enough
+            self._timers[user_id] = asyncio.get_running_loop().call_later(
+                self.max_wait_seconds, self._expire, user_id)
+
+        self._report_pending()
+
+    async def flush(self) -> None:
+        """
+        Extract all pending turns, and wait for running batches it does.
+        """
+        for user_id in list(self._pending):
+            self._take(user_id)
+        get_metrics().set_gauge("memory.pending_turns", 0)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _take(self, user_id: str) -> None:
+        """
+        User's pending batch scheduled, its age timer cancelled.
+        """
+        timer = self._timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._schedule(user_id, self._pending.pop(user_id))
+
+    def _expire(self, user_id: str) -> None:
+        self._timers.pop(user_id, None)
+        if user_id in self._pending:
+            get_metrics().increment("memory.expired_batches")
+            self._take(user_id)
+            self._report_pending()
+
+    def _report_pending(self) -> None:
+        get_metrics().set_gauge(
+            "memory.pending_turns", sum(len(b) for b in self._pending.values()))
+
+    def _schedule(self, user_id: str, messages: list[str]) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._extract(user_id, messages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _extract(self, user_id: str, messages: list[str]) -> None:
+        metrics = get_metrics()
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(
+                    self.memory_manager.create_user_memories,
+                    messages=[Message(role="user", content=m) for m in messages],
+                    user_id=user_id,
+                    agent_id=self.agent_id,
+                )
+                metrics.increment("memory.batches")
+                metrics.increment("memory.turns_extracted", len(messages))
+            except Exception as e:
+                metrics.increment("memory.failures")
+                logger.warning(f"Memory extraction failed for user {user_id}: {e}")
+            finally:
+                # Time the request path once waited, now in background spent
+                elapsed = time.perf_counter() - start
+                metrics.observe("memory.extraction_seconds", elapsed)
+                metrics.increment("memory.offloaded_seconds", elapsed)
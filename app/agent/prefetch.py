@@ -0,0 +1,146 @@
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any
+
+from app.agent.coalescing import normalize_question
+from app.config import settings
+from app.knowledge.retrieval import RetrievalResult
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Prefetched:
+    tenant: str
+    filters: str | None
+    text: str
+    result: RetrievalResult
+    expires_at: float
+
+
+class PrefetchCache:
+    """
+    Retrieval done while the user types, under short-lived tokens kept.
+    Sent message close enough to the draft, its retrieval reused it is.
+    """
+
+    def __init__(self, ttl_seconds: float, match_ratio: float, max_entries: int):
+        """
+        Initialize prefetch cache.
+        Args:
+            ttl_seconds: Seconds a prefetch stays usable
+            match_ratio: Similarity of draft and sent text needed, 1.0 exact match only
+            max_entries: Prefetches kept at most, oldest dropped first
+        """
+        self.ttl_seconds = ttl_seconds
+        self.match_ratio = match_ratio
+        self.max_entries = max(max_entries, 1)
+        self._entries: OrderedDict[str, _Prefetched] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _filters_key(filters: dict[str, Any] | None) -> str | None:
+        return json.dumps(filters, sort_keys=True, default=str) if filters else None
+
+    def put(
+        self,
+        text: str,
+        tenant: str,
+        filters: dict[str, Any] | None,
+        result: RetrievalResult,
+    ) -> str:
+        """
+        Keep a draft's retrieval, a token returned for the send request.
+        Args:
+            text: Draft text searched
+            tenant: Tenant searched
+            filters: Retrieval filters used
+            result: Adaptive retrieval of the draft
+        Returns:
+            Prefetch token
+        """
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._drop_expired(now)
+            self._entries[token] = _Prefetched(
+                tenant=tenant,
+                filters=self._filters_key(filters),
+                text=normalize_question(text),
+                result=result,
+                expires_at=now + self.ttl_seconds,
+            )
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def take(
+        self,
+        token: str,
+        message: str,
+        tenant: str,
+        filters: dict[str, Any] | None,
+    ) -> RetrievalResult | None:
+        """
+        Prefetched retrieval for the sent message, once only usable.
+        Args:
+            token: Prefetch token from the draft request
+            message: Message actually sent
+            tenant: Tenant of the chat request
+            filters: Retrieval filters of the chat request
+        Returns:
+            Retrieval result, None if unknown, expired or too different
+        """
+        metrics = get_metrics()
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            entry = self._entries.pop(token, None)
+        if entry is None:
+            metrics.increment("prefetch.misses")
+            return None
+
+        # Other tenant or scope, never reused even if the text matches
+        if entry.tenant != tenant or entry.filters != self._filters_key(filters):
+            metrics.increment("prefetch.mismatches")
+            return None
+        text = normalize_question(message)
+        if text != entry.text and SequenceMatcher(None, entry.text, text).ratio() < self.match_ratio:
+            metrics.increment("prefetch.mismatches")
+            return None
+
+        metrics.increment("prefetch.hits")
+        return entry.result
+
+    def _drop_expired(self, now: float) -> None:
+        expired = [token for token, entry in self._entries.items() if entry.expires_at <= now]
+        for token in expired:
+            del self._entries[token]
+        if expired:
+            get_metrics().increment("prefetch.expired", len(expired))
+
+
+# Global prefetch cache, singleton pattern
+_prefetch_cache: PrefetchCache | None = None
+
+
+def get_prefetch_cache() -> PrefetchCache:
+    """
+    Get or create prefetch cache.
+    Returns:
+        PrefetchCache instance
+    """
+    global _prefetch_cache
+    if _prefetch_cache is None:
+        _prefetch_cache = PrefetchCache(
+            ttl_seconds=settings.prefetch_ttl_seconds,
+            match_ratio=settings.prefetch_match_ratio,
+            max_entries=settings.prefetch_max_entries,
+        )
+    return _prefetch_cache
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Own file, chat writes to agno.db never contended
+USAGE_DB_FILE = "data/usage.db"
+USAGE_TABLE = "session_usage"
+
+# Totals the top consumers endpoint ranks by, and their SQL
+USAGE_ORDERS = {
+    "total_tokens": "SUM(prompt_tokens) + SUM(completion_tokens) + SUM(embedding_tokens)",
+    "cost_usd": "SUM(prompt_tokens) * ? + SUM(completion_tokens) * ? + SUM(embedding_tokens) * ?",
+    "requests": "SUM(requests)",
+    "total_ms": "SUM(total_ms)",
+}
+
+# Meter of the generation running, embedder calls in its worker threads add to it
+current_usage: ContextVar["UsageMeter | None"] = ContextVar("current_usage", default=None)
+
+
+@dataclass
+class UsageMeter:
+    """
+    Tokens and timings of one generation, its session charged for them.
+    """
+
+    tenant: str
+    session_id: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    embedding_tokens: int = 0
+    first_token_ms: float | None = None
+    total_ms: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_embedding_tokens(self, tokens: int) -> None:
+        with self._lock:
+            self.embedding_tokens += tokens
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Call with this meter current, from a worker thread's own context.
+        Args:
+            fn: Blocking call, embeddings it makes are counted
+            args: Positional arguments of the call
+        Returns:
+            Result of the call
+        """
+        current_usage.set(self)
+        return fn(*args)
+
+
+def cost_usd(prompt_tokens: int, completion_tokens: int, embedding_tokens: int) -> float:
+    """
+    Spend of the given tokens, configured prices per million.
+    Args:
+        prompt_tokens: Model input tokens
+        completion_tokens: Model output tokens
+        embedding_tokens: Embedding input tokens
+    Returns:
+        Cost in US dollars
+    """
+    return (
+        prompt_tokens * settings.llm_input_cost_per_1m
+        + completion_tokens * settings.llm_output_cost_per_1m
+        + embedding_tokens * settings.embedding_cost_per_1m
+    ) / 1_000_000
+
+
+def _totals(row: tuple) -> dict[str, Any]:
+    """
+    Totals dict of an aggregate row, session id and day columns excluded.
+    """
+    requests, prompt, completion, embedding, first_token_ms, first_tokens, total_ms, max_total_ms = row
+    return {
+        "requests": requests,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "embedding_tokens": embedding,
+        "total_tokens": prompt + completion + embedding,
+        "cost_usd": round(cost_usd(prompt, completion, embedding), 6),
+        "avg_first_token_ms": round(first_token_ms / first_tokens, 2) if first_tokens else None,
+        "avg_total_ms": round(total_ms / requests, 2) if requests else None,
+        "max_total_ms": round(max_total_ms, 2),
+    }
+
+
+# Aggregate columns, in _totals order
+_SUMS = (
+    "SUM(requests), SUM(prompt_tokens), SUM(completion_tokens), SUM(embedding_tokens), "
+    "SUM(first_token_ms), SUM(first_tokens), SUM(total_ms), MAX(max_total_ms)"
+)
+
+
+class UsageStore:
+    """
+    Usage per session and day, one row each, in its own SQLite table.
+    Connection per call opened is, from worker threads it is used.
+    """
+
+    def __init__(self, db_file: str | Path = USAGE_DB_FILE):
+        """
+        Initialize usage store.
+        Args:
+            db_file: SQLite file holding the table
+        """
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._execute(
+            f"CREATE TABLE IF NOT EXISTS {USAGE_TABLE} ("
+            "tenant TEXT NOT NULL, session_id TEXT NOT NULL, day TEXT NOT NULL, "
+            "requests INTEGER NOT NULL, prompt_tokens INTEGER NOT NULL, "
+            "completion_tokens INTEGER NOT NULL, embedding_tokens INTEGER NOT NULL, "
+            "first_token_ms REAL NOT NULL, first_tokens INTEGER NOT NULL, "
+            "total_ms REAL NOT NULL, max_total_ms REAL NOT NULL, "
+            "PRIMARY KEY (tenant, session_id, day)) WITHOUT ROWID")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=5)
+
+    def _execute(self, sql: str, rows: list[tuple] | None = None) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                if rows is None:
+                    connection.execute(sql)
+                else:
+                    connection.executemany(sql, rows)
+        finally:
+            connection.close()
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def write(self, rows: list[tuple]) -> None:
+        """
+        Add aggregated rows onto the stored ones, one transaction.
+        Args:
+            rows: (tenant, session_id, day, requests, prompt, completion, embedding,
+                first_token_ms, first_tokens, total_ms, max_total_ms) tuples
+        """
+        self._execute(
+            f"INSERT INTO {USAGE_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (tenant, session_id, day) DO UPDATE SET "
+            "requests = requests + excluded.requests, "
+            "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+            "completion_tokens = completion_tokens + excluded.completion_tokens, "
+            "embedding_tokens = embedding_tokens + excluded.embedding_tokens, "
+            "first_token_ms = first_token_ms + excluded.first_token_ms, "
+            "first_tokens = first_tokens + excluded.first_tokens, "
+            "total_ms = total_ms + excluded.total_ms, "
+            "max_total_ms = MAX(max_total_ms, excluded.max_total_ms)",
+            rows,
+        )
+
+    def session_usage(self, tenant: str, session_id: str, since: str) -> dict[str, Any]:
+        """
+        Totals of one session, overall and per day.
+        Args:
+            tenant: Tenant owning the session
+            session_id: Client session id
+            since: First day included, YYYY-MM-DD
+        Returns:
+            Overall totals and per-day totals, oldest day first
+        """
+        days = self._query(
+            f"SELECT day, requests, prompt_tokens, completion_tokens, embedding_tokens, first_token_ms, "
+            f"first_tokens, total_ms, max_total_ms FROM {USAGE_TABLE} "
+            "WHERE tenant = ? AND session_id = ? AND day >= ? ORDER BY day",
+            (tenant, session_id, since))
+        overall = self._query(
+            f"SELECT {_SUMS} FROM {USAGE_TABLE} WHERE tenant = ? AND session_id = ? AND day >= ?",
+            (tenant, session_id, since))[0]
+        return {
+            "session_id": session_id,
+            "totals": _totals(overall) if overall[0] else None,
+            "days": [{"day": row[0], **_totals(row[1:])} for row in days],
+        }
+
+    def top_sessions(self, tenant: str, since: str, order_by: str, limit: int) -> list[dict[str, Any]]:
+        """
+        Sessions spending the most since a day.
+        Args:
+            tenant: Tenant whose sessions ranked are
+            since: First day included, YYYY-MM-DD
+            order_by: One of USAGE_ORDERS
+            limit: Sessions returned
+        Returns:
+            Session totals, biggest consumer first
+        """
+        if order_by not in USAGE_ORDERS:
+            raise ValueError(f"Unknown order '{order_by}', one of {tuple(USAGE_ORDERS)} expected")
+        prices: tuple = ()
+        if order_by == "cost_usd":
+            prices = (settings.llm_input_cost_per_1m, settings.llm_output_cost_per_1m,
+                      settings.embedding_cost_per_1m)
+        rows = self._query(
+            f"SELECT session_id, {_SUMS} FROM {USAGE_TABLE} WHERE tenant = ? AND day >= ? "
+            f"GROUP BY session_id ORDER BY {USAGE_ORDERS[order_by]} DESC LIMIT ?",
+            (tenant, since, *prices, limit))
+        return [{"session_id": row[0], **_totals(row[1:])} for row in rows]
+
+
+def since_day(days: int) -> str:
+    """
+    First UTC day of a window ending today.
+    Args:
+        days: Days in the window, today included
+    Returns:
+        Day as YYYY-MM-DD
+    """
+    return (datetime.now(timezone.utc).date() - timedelta(days=max(days, 1) - 1)).isoformat()
+
+
+class UsageRecorder:
+    """
+    Usage of finished generations, buffered and merged per session and day.
+    Written in batches off the event loop, the hot path one dict update only pays.
+    """
+
+    def __init__(self, store: UsageStore, flush_seconds: float, batch_size: int):
+        """
+        Initialize usage recorder.
+        Args:
+            store: Usage table writer
+            flush_seconds: Seconds buffered usage waits before written
+            batch_size: Buffered rows that trigger an immediate write
+        """
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self._pending: dict[tuple[str, str, str], list[float]] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    def record(self, meter: UsageMeter) -> None:
+        """
+        Buffer one generation's usage, a write scheduled.
+        Args:
+            meter: Finished usage meter
+        """
+        day = since_day(1)
+        first_token = meter.first_token_ms is not None
+        with self._lock:
+            row = self._pending.setdefault((meter.tenant, meter.session_id, day), [0] * 8)
+            row[0] += 1
+            row[1] += meter.prompt_tokens
+            row[2] += meter.completion_tokens
+            row[3] += meter.embedding_tokens
+            row[4] += meter.first_token_ms or 0.0
+            row[5] += int(first_token)
+            row[6] += meter.total_ms
+            row[7] = max(row[7], meter.total_ms)
+            pending = len(self._pending)
+
+        get_metrics().increment("usage.recorded")
+        if self._task is None or self._task.done():
+            delay = 0 if pending >= self.batch_size else self.flush_seconds
+            self._task = asyncio.get_running_loop().create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Write every buffered row now.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        rows = [(*key, *values) for key, values in pending.items()]
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.store.write, rows)
+            get_metrics().increment("usage.rows_written", len(rows))
+        except Exception as e:
+            logger.warning(f"Writing {len(rows)} usage rows failed: {e}")
+            get_metrics().increment("usage.write_failures")
+        finally:
+            get_metrics().observe("usage.write_seconds", time.perf_counter() - start)
+
+
+# Global usage store and recorder, singleton pattern
+_store: UsageStore | None = None
+_recorder: UsageRecorder | None = None
+
+
+def get_usage_store() -> UsageStore:
+    """
+    Get or create usage store.
+    Returns:
+        UsageStore instance
+    """
+    global _store
+    if _store is None:
+        _store = UsageStore()
+    return _store
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """
+    Get or create usage recorder.
+    Returns:
+        UsageRecorder instance
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = UsageRecorder(
+            store=get_usage_store(),
+            flush_seconds=settings.usage_flush_seconds,
+            batch_size=settings.usage_batch_size,
+        )
+    return _recorder
@@ -1,26 +1,63 @@
+import asyncio
 import logging
 from typing import AsyncGenerator
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from app.agent.admission import AdmissionRejected, Slot, get_admission_controller
 from app.agent.chat_agent import get_agent
-from app.api.models import ChatRequest
+from app.agent.events import StreamEvent
+from app.agent.prefetch import get_prefetch_cache
+from app.api.dependencies import resolve_deadline, resolve_tenant
+from app.api.models import ChatRequest, PrefetchRequest
+from app.config import settings
+from app.deadline import Deadline
+from app.knowledge.retrieval import adaptive_search
+from app.knowledge.store import get_knowledge
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
 
+async def admit(request: ChatRequest, tenant: str) -> Slot:
+    """
+    Slot for the chat request, 429 with Retry-After when none free is.
+    Args:
+        request: Chat request, its session the fairness unit
+        tenant: Tenant of the request
+    Returns:
+        Admitted slot, released after the response it must be
+    """
+    session_key = f"{tenant}:{request.session_id or 'default'}"
+    try:
+        return await get_admission_controller().acquire(session_key)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
 @router.post("/chat/stream")
-async def stream_chat(request: ChatRequest) -> StreamingResponse:
+async def stream_chat(
+    request: ChatRequest,
+    tenant: str = Depends(resolve_tenant),
+    deadline: Deadline = Depends(resolve_deadline),
+) -> StreamingResponse:
     """
-    Stream chat response
+    Stream chat response, plain data lines or typed sources, token and done events
     Args:
         request: Chat request with message
+        tenant: Tenant from the X-Tenant-ID header
+        deadline: Request deadline, from the X-Request-Timeout header or the default
     Returns:
         StreamingResponse with text/event-stream
     """
+    slot = await admit(request, tenant)
     try:
         agent = get_agent()
 
@@ -29,9 +66,28 @@ async def stream_chat(request: ChatRequest) -> StreamingResponse:
             Generate streaming response, yields chunks with SSE format, browsers understand they do.
             """
             try:
+                if request.events:
+                    # Typed events, sources before the first token they arrive
+                    async for event in agent.stream_events(
+                        message=request.message,
+                        session_id=request.session_id,
+                        filters=request.search_filters(),
+                        tenant=tenant,
+                        coalesce=request.coalesce,
+                        prefetch_token=request.prefetch_token,
+                        deadline=deadline,
+                    ):
+                        yield event.to_sse()
+                    return
+
                 async for token in agent.stream_response(
                     message=request.message,
                     session_id=request.session_id,
+                    filters=request.search_filters(),
+                    tenant=tenant,
+                    coalesce=request.coalesce,
+                    prefetch_token=request.prefetch_token,
+                    deadline=deadline,
                 ):
                     yield f"data: {token}\n\n"
 
@@ -39,7 +95,13 @@ async def stream_chat(request: ChatRequest) -> StreamingResponse:
 
             except Exception as e:
                 logger.error(f"Error in stream generation: {e}")
-                yield f"data: [ERROR: {str(e)}]\n\n"
+                if request.events:
+                    yield StreamEvent.error(str(e)).to_sse()
+                else:
+                    yield f"data: [ERROR: {str(e)}]\n\n"
+
+            finally:
+                slot.release()
 
         return StreamingResponse(
             generate(),
@@ -49,31 +111,47 @@ async def stream_chat(request: ChatRequest) -> StreamingResponse:
                 "Connection": "keep-alive",
                 "X-Accel-Buffering": "no",
             },
+            # Stream never started, slot still freed it is
+            background=BackgroundTask(slot.release),
         )
 
     except Exception as e:
+        slot.release()
         logger.error(f"Error in stream_chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/chat")
-async def chat(request: ChatRequest) -> dict[str, str]:
+async def chat(
+    request: ChatRequest,
+    tenant: str = Depends(resolve_tenant),
+    deadline: Deadline = Depends(resolve_deadline),
+) -> dict[str, str]:
     """
     Non-streaming chat endpoint
     Args:
         request: Chat request
+        tenant: Tenant from the X-Tenant-ID header
+        deadline: Request deadline, from the X-Request-Timeout header or the default
     Returns:
         Complete response
     """
+    slot = await admit(request, tenant)
     try:
         agent = get_agent()
 
         response_text = ""
-        async for token in agent.stream_response(
-            message=request.message,
-            session_id=request.session_id,
-        ):
-            response_text += token
+        async with slot:
+            async for token in agent.stream_response(
+                message=request.message,
+                session_id=request.session_id,
+                filters=request.search_filters(),
+                tenant=tenant,
+                coalesce=request.coalesce,
+                prefetch_token=request.prefetch_token,
+                deadline=deadline,
+            ):
+                response_text += token
 
         return {
             "response": response_text,
@@ -81,5 +159,36 @@ async def chat(request: ChatRequest) -> dict[str, str]:
         }
 
     except Exception as e:
+        slot.release()
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/prefetch")
+async def prefetch(
+    request: PrefetchRequest,
+    tenant: str = Depends(resolve_tenant),
+) -> dict[str, str | int | float]:
+    """
+    Speculative retrieval of a draft message, no LLM involved.
+    Results kept under a short-lived token, the send request reuses them.
+    Args:
+        request: Draft text and retrieval scope
+        tenant: Tenant from the X-Tenant-ID header
+    Returns:
+        Prefetch token, its lifetime and the chunks found
+    """
+    filters = request.search_filters()
+    try:
+        result = await asyncio.to_thread(
+            adaptive_search, get_knowledge(tenant), request.message, filters)
+    except Exception as e:
+        logger.error(f"Error prefetching retrieval: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    token = get_prefetch_cache().put(request.message, tenant, filters, result)
+    return {
+        "prefetch_token": token,
+        "expires_in": settings.prefetch_ttl_seconds,
+        "results": len(result.documents),
+    }
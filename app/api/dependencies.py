@@ -0,0 +1,33 @@
+from fastapi import Header, HTTPException, status
+
+from app.deadline import DEADLINE_HEADER, Deadline, request_deadline
+from app.knowledge.tenants import TENANT_HEADER, normalize_tenant
+
+
+def resolve_tenant(
+    x_tenant_id: str | None = Header(None, alias=TENANT_HEADER),
+) -> str:
+    """
+    Tenant of the request, from the X-Tenant-ID header resolved.
+    Args:
+        x_tenant_id: Header value, default tenant if missing
+    Returns:
+        Validated tenant id
+    """
+    try:
+        return normalize_tenant(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def resolve_deadline(
+    x_request_timeout: float | None = Header(None, alias=DEADLINE_HEADER, gt=0),
+) -> Deadline:
+    """
+    Deadline of the request, from arrival counted, queueing included.
+    Args:
+        x_request_timeout: Seconds the caller waits, configured default if missing
+    Returns:
+        Request deadline, never longer than the configured default
+    """
+    return request_deadline(x_request_timeout)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.dependencies import resolve_tenant
+from app.knowledge.maintenance import get_maintenance_scheduler
+from app.knowledge.store import delete_document, validate_document_id
+from app.knowledge.summaries import get_summary_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["documents"])
+
+
+@router.delete("/documents/{file_id}")
+async def remove_document(
+    file_id: str,
+    tenant: str = Depends(resolve_tenant),
+) -> dict[str, str | dict[str, int]]:
+    """
+    Delete document, vector rows, contents entry, upload file and summaries.
+    Args:
+        file_id: File id returned by the upload endpoint
+        tenant: Tenant owning the document, from the X-Tenant-ID header
+    Returns:
+        Counts of removed rows, entries, files and summaries
+    """
+    try:
+        validate_document_id(file_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        removed = await asyncio.to_thread(delete_document, file_id, tenant=tenant)
+        removed["summaries"] = await asyncio.to_thread(get_summary_store().delete, tenant, file_id)
+    except Exception as e:
+        logger.error(f"Error deleting document {file_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete document: {str(e)}",
+        )
+
+    if not any(removed.values()):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {file_id} not found",
+        )
+
+    return {"file_id": file_id, "status": "deleted", "removed": removed}
+
+
+@router.post("/maintenance")
+async def run_maintenance() -> dict:
+    """
+    Run table maintenance now, compaction, version pruning and index updates.
+    Returns:
+        Per tenant, report of reclaimed space and search latency change
+    """
+    try:
+        reports = await get_maintenance_scheduler().run_once()
+    except Exception as e:
+        logger.error(f"Error running maintenance: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {tenant: report.to_dict() for tenant, report in reports.items()}
+
+
+@router.get("/maintenance")
+async def last_maintenance() -> dict:
+    """
+    Last maintenance reports, empty if none ran yet.
+    Returns:
+        Per tenant, report of the last pass
+    """
+    reports = get_maintenance_scheduler().last_reports
+    return {tenant: report.to_dict() for tenant, report in reports.items()}
@@ -2,29 +2,43 @@ import asyncio
 import concurrent.futures
 import logging
 import uuid
+import zipfile
 from pathlib import Path
+from typing import IO, Any
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from fastapi.responses import JSONResponse
 
+from app.api.dependencies import resolve_tenant
 from app.config import settings
-from app.knowledge.store import add_pdf_to_knowledge, get_knowledge, get_pdf_reader
+from app.knowledge.chunking import CHUNKING_STRATEGIES
+from app.knowledge.bulk_ingest import ParsedFile, parse_pdf, store_parsed_files
+from app.knowledge.store import UPLOAD_DIR, add_pdf_to_knowledge, get_knowledge, get_pdf_reader, upload_dir
+from app.knowledge.summaries import get_summary_queue
+from app.knowledge.versioning import ingest_pdf_version
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
-UPLOAD_DIR = Path("data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
 @router.post("/pdf")
-async def upload_pdf(file: UploadFile = File(...)) -> JSONResponse:
+async def upload_pdf(
+    file: UploadFile = File(...),
+    chunking: str | None = Form(None),
+    document_key: str | None = Form(None),
+    tenant: str = Depends(resolve_tenant),
+) -> JSONResponse:
     """
     Upload PDF file, to knowledge base.
     Validation performs: type, size, emptiness checks.
     Args:
         file: PDF file uploaded
+        chunking: Chunking strategy name, configured default if omitted
+        document_key: Logical document key, re-uploads under it only changes ingest
+        tenant: Tenant from the X-Tenant-ID header, its own table receives the PDF
     Returns:
         JSON response with file ID and status
     """
@@ -38,6 +52,12 @@ async def upload_pdf(file: UploadFile = File(...)) -> JSONResponse:
             detail="Only PDF files are allowed",
         )
 
+    if chunking is not None and chunking not in CHUNKING_STRATEGIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown chunking strategy, one of {sorted(CHUNKING_STRATEGIES)} allowed",
+        )
+
     try:
         # Read file content
         content = await file.read()
@@ -57,7 +77,7 @@ async def upload_pdf(file: UploadFile = File(...)) -> JSONResponse:
             )
 
         file_id = str(uuid.uuid4())
-        file_path = UPLOAD_DIR / f"{file_id}_{file.filename}"
+        file_path = upload_dir(tenant) / f"{file_id}_{file.filename}"
 
         with open(file_path, "wb") as f:
             f.write(content)
@@ -67,25 +87,56 @@ async def upload_pdf(file: UploadFile = File(...)) -> JSONResponse:
         # Add to knowledge base in thread pool
         loop = asyncio.get_event_loop()
         with concurrent.futures.ThreadPoolExecutor() as executor:
-            await loop.run_in_executor(
-                executor,
-                lambda: add_pdf_to_knowledge(
-                    file_path=file_path,
-                    document_id=file_id,
-                    filename=file.filename,
-                ),
-            )
+            if document_key:
+                result = await loop.run_in_executor(
+                    executor,
+                    lambda: ingest_pdf_version(
+                        file_path=file_path,
+                        filename=file.filename,
+                        document_key=document_key,
+                        chunking=chunking,
+                        tenant=tenant,
+                    ),
+                )
+            else:
+                result = None
+                await loop.run_in_executor(
+                    executor,
+                    lambda: add_pdf_to_knowledge(
+                        file_path=file_path,
+                        document_id=file_id,
+                        filename=file.filename,
+                        chunking=chunking,
+                        tenant=tenant,
+                    ),
+                )
 
         logger.info(f"PDF processed successfully: {file_id}")
 
+        # Summaries built in the background, unchanged versions skipped
+        if settings.document_summaries and (result is None or result.pages_changed):
+            get_summary_queue().schedule(result.document_id if result else file_id, tenant)
+
+        response = {
+            "message": "PDF uploaded and processed successfully",
+            "file_id": file_id,
+            "filename": file.filename,
+            "status": "completed",
+            "chunking": chunking or settings.chunking_strategy,
+            "tenant": tenant,
+        }
+        if result is not None:
+            # Versioned documents, by their stable id addressed they are
+            response.update({
+                "file_id": result.document_id,
+                "document_key": result.document_key,
+                "version": result.version,
+                "ingest": result.to_dict(),
+            })
+
         return JSONResponse(
             status_code=status.HTTP_200_OK,
-            content={
-                "message": "PDF uploaded and processed successfully",
-                "file_id": file_id,
-                "filename": file.filename,
-                "status": "completed",
-            },
+            content=response,
         )
 
     except HTTPException:
@@ -108,3 +159,187 @@ async def upload_pdf(file: UploadFile = File(...)) -> JSONResponse:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload PDF: {str(e)}",
         )
+
+
+def _save_stream(source: IO[bytes], destination: Path, limit: int) -> int:
+    """
+    Copy a stream to disk in chunks, never more than limit bytes.
+    Args:
+        source: Upload or archive entry stream
+        destination: File to write
+        limit: Bytes allowed at most
+    Returns:
+        Bytes written
+    Raises:
+        ValueError: If empty or larger than limit the stream is
+    """
+    written = 0
+    with open(destination, "wb") as f:
+        while chunk := source.read(1024 * 1024):
+            written += len(chunk)
+            if written > limit:
+                raise ValueError(f"File size exceeds maximum limit of {settings.max_upload_size_mb}MB")
+            f.write(chunk)
+    if written == 0:
+        raise ValueError("File cannot be empty")
+    return written
+
+
+def _save_entries(
+    files: list[UploadFile],
+    results: list[dict[str, Any]],
+    directory: Path,
+) -> list[tuple[str, str, Path]]:
+    """
+    Save uploaded PDFs and PDFs inside ZIPs, one entry at a time streamed.
+    Rejected entries into results recorded are.
+    Args:
+        files: Uploaded PDFs or ZIP archives
+        results: Per-file results, appended to
+        directory: Tenant's uploads directory
+    Returns:
+        Saved (file_id, filename, path) tuples
+    """
+    max_size = settings.max_upload_size_mb * 1024 * 1024
+    saved: list[tuple[str, str, Path]] = []
+
+    def save(filename: str, open_stream) -> None:
+        if len(saved) >= settings.batch_upload_max_files:
+            results.append({"filename": filename, "status": "failed",
+                            "error": f"More than {settings.batch_upload_max_files} PDFs in one upload"})
+            return
+        file_id = str(uuid.uuid4())
+        path = directory / f"{file_id}_{filename}"
+        try:
+            with open_stream() as stream:
+                _save_stream(stream, path, max_size)
+        except Exception as e:
+            path.unlink(missing_ok=True)
+            results.append({"filename": filename, "status": "failed", "error": str(e)})
+            return
+        saved.append((file_id, filename, path))
+
+    for upload in files:
+        name = upload.filename or ""
+        if name.lower().endswith(".pdf"):
+            save(name, lambda: _NoClose(upload.file))
+        elif name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                results.append({"filename": name, "status": "failed", "error": "Not a valid ZIP archive"})
+                continue
+            with archive:
+                for entry in archive.infolist():
+                    entry_name = Path(entry.filename).name
+                    if entry.is_dir() or entry.filename.startswith("__MACOSX/"):
+                        continue
+                    if not entry_name.lower().endswith(".pdf"):
+                        results.append({"filename": entry.filename, "status": "skipped",
+                                        "error": "Only PDF files are allowed"})
+                        continue
+                    if entry.file_size > max_size:
+                        results.append({"filename": entry.filename, "status": "failed",
+                                        "error": f"File size exceeds maximum limit of {settings.max_upload_size_mb}MB"})
+                        continue
+                    save(entry_name, lambda entry=entry: archive.open(entry))
+        else:
+            results.append({"filename": name, "status": "failed",
+                            "error": "Only PDF files or ZIP archives are allowed"})
+    return saved
+
+
+class _NoClose:
+    """
+    Stream wrapper, the upload's own file open it leaves.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+
+    def __enter__(self) -> IO[bytes]:
+        return self.stream
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+@router.post("/batch")
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    chunking: str | None = Form(None),
+    tenant: str = Depends(resolve_tenant),
+) -> JSONResponse:
+    """
+    Upload many PDFs or ZIP archives of PDFs, in one request.
+    Entries parsed concurrently, vectors in a single table append written.
+    Args:
+        files: PDF files or ZIP archives
+        chunking: Chunking strategy name, configured default if omitted
+        tenant: Tenant from the X-Tenant-ID header, its own table receives the PDFs
+    Returns:
+        JSON response with per-file results
+    """
+    if chunking is not None and chunking not in CHUNKING_STRATEGIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown chunking strategy, one of {sorted(CHUNKING_STRATEGIES)} allowed",
+        )
+
+    results: list[dict[str, Any]] = []
+    directory = upload_dir(tenant)
+    saved = await asyncio.to_thread(_save_entries, files, results, directory)
+
+    # Parsing concurrency capped, the event loop free it stays
+    semaphore = asyncio.Semaphore(max(settings.batch_upload_concurrency, 1))
+
+    async def parse(file_id: str, filename: str, path: Path) -> ParsedFile | None:
+        async with semaphore:
+            try:
+                documents = await asyncio.to_thread(parse_pdf, str(path), filename, file_id, chunking)
+                if not documents:
+                    raise ValueError("No text could be extracted")
+            except Exception as e:
+                path.unlink(missing_ok=True)
+                results.append({"filename": filename, "status": "failed", "error": str(e)})
+                return None
+            return ParsedFile(file_id=file_id, filename=filename, documents=documents,
+                              metadata={"upload_file": path.name})
+
+    parsed = [p for p in await asyncio.gather(*(parse(*entry) for entry in saved)) if p is not None]
+
+    try:
+        await store_parsed_files(get_knowledge(tenant), parsed, chunking)
+    except Exception as e:
+        for file in parsed:
+            (directory / file.metadata["upload_file"]).unlink(missing_ok=True)
+        logger.error(f"Error storing batch upload: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to store uploaded PDFs: {str(e)}",
+        )
+
+    for file in parsed:
+        if settings.document_summaries:
+            get_summary_queue().schedule(file.file_id, tenant)
+        results.append({
+            "filename": file.filename,
+            "file_id": file.file_id,
+            "status": "completed",
+            "chunks": len(file.documents),
+        })
+
+    completed = sum(1 for r in results if r["status"] == "completed")
+    logger.info(f"Batch upload: {completed} PDFs stored, {len(results) - completed} not")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "message": f"{completed} of {len(results)} files uploaded and processed",
+            "completed": completed,
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "chunks": sum(r.get("chunks", 0) for r in results),
+            "chunking": chunking or settings.chunking_strategy,
+            "tenant": tenant,
+            "files": results,
+        },
+    )
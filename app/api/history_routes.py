@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from agno.db.base import SessionType
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.agent.chat_agent import get_db, session_key_for
+from app.agent.history import history_page
+from app.api.dependencies import resolve_tenant
+from app.api.models import HistoryPage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["history"])
+
+
+@router.get("/sessions/{session_id}/history", response_model=HistoryPage)
+async def get_history(
+    session_id: str,
+    before: int | None = Query(None, ge=0, description="Turns before this one, newest page if omitted"),
+    limit: int = Query(20, ge=1, le=100, description="Turns per page"),
+    tenant: str = Depends(resolve_tenant),
+) -> HistoryPage:
+    """
+    One page of a session's past turns, newest page first.
+    Older pages, with the returned cursor fetched they are.
+    Args:
+        session_id: Chat session identifier
+        before: Cursor from the previous page
+        limit: Turns per page
+        tenant: Tenant owning the session, from the X-Tenant-ID header
+    Returns:
+        Messages of the page, oldest first, and the next cursor
+    """
+    key = session_key_for(session_id, tenant)
+    try:
+        session = await asyncio.to_thread(
+            get_db().get_session, session_id=key, session_type=SessionType.AGENT)
+        page = history_page(session, before, limit)
+    except Exception as e:
+        logger.error(f"Error loading history of session {key}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return HistoryPage(session_id=session_id, **page)
@@ -0,0 +1,24 @@
+import logging
+
+from fastapi import APIRouter
+
+from app.knowledge.store import get_search_cache
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+
+@router.get("/metrics")
+async def read_metrics() -> dict[str, dict]:
+    """
+    Metrics endpoint, counters, gauges and summaries report it does.
+    Search result cache statistics, alongside them included.
+    Returns:
+        Snapshot of in-process metrics
+    """
+    snapshot = get_metrics().snapshot()
+    cache = get_search_cache()
+    snapshot["search_cache"] = cache.stats() if cache is not None else {}
+    return snapshot
@@ -1,7 +1,31 @@
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
-class ChatRequest(BaseModel):
+class RetrievalScope(BaseModel):
+    """
+    Retrieval scope, documents and metadata searched, shared by chat and search it is
+    """
+
+    file_ids: list[str] | None = Field(
+        None, description="Restrict retrieval to these uploaded documents")
+    filters: dict[str, str | list[str]] | None = Field(
+        None, description="Metadata filters, e.g. filename, type or document_key")
+
+    def search_filters(self) -> dict[str, Any] | None:
+        """
+        Retrieval filters, file ids and metadata filters merged.
+        Returns:
+            Metadata filters, None to search everything
+        """
+        filters: dict[str, Any] = dict(self.filters or {})
+        if self.file_ids is not None:
+            filters["file_id"] = list(self.file_ids)
+        return filters or None
+
+
+class ChatRequest(RetrievalScope):
     """
     Chat request model, parameters of api, it is
     """
@@ -10,6 +34,12 @@ class ChatRequest(BaseModel):
                          description="User message should not be empty")
     session_id: str | None = Field(
         None, description="Session ID to maintain continuity")
+    coalesce: bool = Field(
+        True, description="Share the answer of an identical question already in flight, sessions without history only")
+    events: bool = Field(
+        False, description="Stream typed SSE events: sources, token, done; plain data lines if False")
+    prefetch_token: str | None = Field(
+        None, description="Token from /api/chat/prefetch, its retrieval reused if the text matches")
 
     model_config = {
         "json_schema_extra": {
@@ -17,12 +47,26 @@ class ChatRequest(BaseModel):
                 {
                     "message": "What is the meaning of life?",
                     "session_id": "session_123"
+                },
+                {
+                    "message": "When does the contract renew?",
+                    "session_id": "session_123",
+                    "file_ids": ["3f6c2a1e-0b7d-4c1a-9a57-2d0c5e1f8b42"]
                 }
             ]
         }
     }
 
 
+class PrefetchRequest(RetrievalScope):
+    """
+    Prefetch request model, draft text searched while the user types
+    """
+
+    message: str = Field(..., min_length=1, max_length=4000,
+                         description="Draft message typed so far")
+
+
 class ChatResponse(BaseModel):
     """
     Chat response model, response paramaters of api, it is
@@ -44,3 +88,131 @@ class StatusUpdate(BaseModel):
                         description="Current status")
     message: str | None = Field(
         None, description="Additional details")
+
+
+class SearchRequest(RetrievalScope):
+    """
+    Search request model, retrieval only, no LLM it calls
+    """
+
+    query: str = Field(..., min_length=1,
+                       description="Search text, embedded as a chat question is")
+    top_k: int = Field(10, ge=1, le=50,
+                       description="Results per page")
+    cursor: str | None = Field(
+        None, description="next_cursor of the previous page, None for the first page")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "query": "contract renewal date",
+                    "top_k": 5,
+                    "file_ids": ["3f6c2a1e-0b7d-4c1a-9a57-2d0c5e1f8b42"]
+                }
+            ]
+        }
+    }
+
+
+class SearchHit(BaseModel):
+    """
+    One ranked chunk, its score and metadata
+    """
+
+    rank: int = Field(..., description="Position in the full ranking, 1 is best")
+    score: float = Field(..., description="Cosine similarity to the query")
+    distance: float = Field(..., description="Raw distance the vector search reported")
+    content: str = Field(..., description="Chunk text")
+    name: str | None = Field(None, description="Document name")
+    content_id: str | None = Field(None, description="Contents DB entry of the document")
+    meta_data: dict[str, Any] = Field(default_factory=dict,
+                                      description="Chunk metadata, file_id, page, section")
+
+
+class SearchResponse(BaseModel):
+    """
+    Search response model, one page of ranked chunks
+    """
+
+    results: list[SearchHit] = Field(..., description="Ranked chunks of this page")
+    next_cursor: str | None = Field(
+        None, description="Cursor of the next page, None on the last one")
+    table_version: int = Field(..., description="Knowledge table version searched")
+    timings: dict[str, float] = Field(..., description="Milliseconds per search stage")
+
+
+class HistoryMessage(BaseModel):
+    """
+    One message of a past turn, user question or assistant answer
+    """
+
+    role: str = Field(..., description="user or assistant")
+    content: str = Field(..., description="Message text, retrieval context not included")
+    turn: int = Field(..., description="Turn index in the session, 0 is the first")
+    created_at: int | None = Field(None, description="Unix time the turn ran")
+
+
+class HistoryPage(BaseModel):
+    """
+    History page model, turns older than the cursor, oldest first
+    """
+
+    session_id: str = Field(..., description="Session the messages belong to")
+    messages: list[HistoryMessage] = Field(..., description="Messages of this page, oldest first")
+    before: int | None = Field(
+        None, description="Cursor of the next older page, None when no older turns remain")
+    total_turns: int = Field(..., description="Completed turns of the session")
+
+
+class UsageTotals(BaseModel):
+    """
+    Token spend and latency of a session, over a day or a window
+    """
+
+    requests: int = Field(..., description="Generations run")
+    prompt_tokens: int = Field(..., description="Model input tokens")
+    completion_tokens: int = Field(..., description="Model output tokens")
+    embedding_tokens: int = Field(..., description="Query embedding tokens")
+    total_tokens: int = Field(..., description="All tokens above")
+    cost_usd: float = Field(..., description="Spend at the configured prices")
+    avg_first_token_ms: float | None = Field(None, description="Average time to first token")
+    avg_total_ms: float | None = Field(None, description="Average request time")
+    max_total_ms: float = Field(..., description="Slowest request time")
+
+
+class SessionTotals(UsageTotals):
+    """
+    Totals of one session, in a ranking
+    """
+
+    session_id: str = Field(..., description="Client session id")
+
+
+class DailyUsage(UsageTotals):
+    """
+    Totals of one session on one UTC day
+    """
+
+    day: str = Field(..., description="UTC day, YYYY-MM-DD")
+
+
+class SessionUsage(BaseModel):
+    """
+    Session usage model, totals of the window and per day
+    """
+
+    session_id: str = Field(..., description="Client session id")
+    since: str = Field(..., description="First UTC day included")
+    totals: UsageTotals | None = Field(None, description="Totals of the window, None if no usage")
+    days: list[DailyUsage] = Field(..., description="Per-day totals, oldest first")
+
+
+class TopConsumers(BaseModel):
+    """
+    Top consumers model, sessions ranked by spend
+    """
+
+    since: str = Field(..., description="First UTC day included")
+    order_by: str = Field(..., description="Total the ranking uses")
+    sessions: list[SessionTotals] = Field(..., description="Biggest consumer first")
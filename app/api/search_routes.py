@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+from hashlib import md5
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.dependencies import resolve_tenant
+from app.api.models import SearchHit, SearchRequest, SearchResponse
+from app.config import settings
+from app.knowledge.store import get_knowledge
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["search"])
+
+
+def _query_digest(query: str, filters: dict[str, Any] | None) -> str:
+    """
+    Digest of a search, cursors of another search rejected they are.
+    """
+    key = json.dumps([query, filters], sort_keys=True, default=str)
+    return md5(key.encode()).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, version: int, digest: str) -> str:
+    """
+    Opaque cursor, offset, table version and search digest it carries.
+    Args:
+        offset: Rank of the next page's first result, 0-based
+        version: Table version the ranking came from
+        digest: Digest of query and filters
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps({"o": offset, "v": version, "q": digest}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Cursor decoded, malformed ones a 400 give.
+    Args:
+        cursor: Cursor from a previous page
+    Returns:
+        Offset, version and digest
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+        if not isinstance(decoded.get("o"), int) or decoded["o"] < 0:
+            raise ValueError("bad offset")
+        return decoded
+    except (binascii.Error, ValueError, AttributeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {e}",
+        )
+
+
+@router.post("/search", response_model=SearchResponse)
+async def search(
+    request: SearchRequest,
+    tenant: str = Depends(resolve_tenant),
+) -> SearchResponse:
+    """
+    Retrieval only, the chat pipeline's search without the LLM.
+    Ranked chunks, scores and per-stage timings returned, cursor paginated.
+    Args:
+        request: Query, page size, cursor and retrieval scope
+        tenant: Tenant searched, from the X-Tenant-ID header
+    Returns:
+        One page of ranked chunks
+    """
+    start = time.perf_counter()
+    metrics = get_metrics()
+    filters = request.search_filters()
+    digest = _query_digest(request.query, filters)
+
+    offset, pinned_version = 0, None
+    if request.cursor:
+        cursor = decode_cursor(request.cursor)
+        if cursor.get("q") != digest:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor belongs to another query or filters",
+            )
+        offset, pinned_version = cursor["o"], cursor.get("v")
+
+    # Nearest-neighbour search has no offset, ranks up to the page's end fetched
+    end = offset + request.top_k
+    if end > settings.search_max_results:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Results beyond rank {settings.search_max_results} are not served",
+        )
+    limit = min(end + 1, settings.search_max_results)
+
+    try:
+        vector_db = get_knowledge(tenant).vector_db
+        # Version captured with the rows, not read after them off the shared handle
+        rows, timings, version = await asyncio.to_thread(
+            vector_db.ranked_search, request.query, limit, filters)
+    except Exception as e:
+        metrics.increment("search.failures")
+        logger.error(f"Error searching knowledge: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Ranking changed under the cursor, later pages would skip or repeat rows
+    if pinned_version is not None and pinned_version != version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Knowledge changed since the first page, search again",
+        )
+
+    build_start = time.perf_counter()
+    results: list[SearchHit] = []
+    total = 0 if rows is None else len(rows)
+    if rows is not None:
+        for rank, (_, row) in enumerate(rows.iloc[offset:end].iterrows(), start=offset + 1):
+            payload = json.loads(row["payload"])
+            distance = float(row["_distance"])
+            results.append(SearchHit(
+                rank=rank,
+                score=vector_db.similarity(distance),
+                distance=distance,
+                content=payload["content"],
+                name=payload.get("name"),
+                content_id=payload.get("content_id"),
+                meta_data=payload.get("meta_data") or {},
+            ))
+    timings["build_ms"] = (time.perf_counter() - build_start) * 1000
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+    next_cursor = None
+    if total > end:
+        next_cursor = encode_cursor(end, version, digest)
+
+    metrics.increment("search.requests")
+    metrics.observe("search.seconds", timings["total_ms"] / 1000)
+    return SearchResponse(
+        results=results,
+        next_cursor=next_cursor,
+        table_version=version,
+        timings={stage: round(ms, 3) for stage, ms in timings.items()},
+    )
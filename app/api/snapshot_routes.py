@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import re
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import resolve_tenant
+from app.knowledge import snapshots
+from app.knowledge.maintenance import get_maintenance_scheduler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["snapshots"])
+
+# Snapshot ids, timestamps they are, path segments never
+_SNAPSHOT_ID = re.compile(r"^[0-9T-]{1,40}$")
+
+
+def _snapshot_path(snapshot_id: str, tenant: str):
+    path = snapshots.SNAPSHOT_DIR / snapshot_id
+    # Other tenants' and whole-node snapshots, as missing reported they are
+    if (not _SNAPSHOT_ID.match(snapshot_id) or not (path / snapshots.MANIFEST_FILE).exists()
+            or snapshots.SnapshotManifest.load(path).tenant != tenant):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Snapshot {snapshot_id} not found",
+        )
+    return path
+
+
+@router.post("/snapshots")
+async def create_snapshot(tenant: str = Depends(resolve_tenant)) -> dict:
+    """
+    Export the tenant's table, indexes, contents and summaries as a new snapshot.
+    Args:
+        tenant: Tenant exported
+    Returns:
+        Snapshot manifest
+    """
+    try:
+        # Maintenance paused, pinned files not pruned mid-export
+        async with get_maintenance_scheduler().lock:
+            manifest = await asyncio.to_thread(snapshots.export_snapshot, tenant=tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return manifest.to_dict()
+
+
+@router.get("/snapshots")
+async def get_snapshots(tenant: str = Depends(resolve_tenant)) -> list[dict]:
+    """
+    Snapshots of the tenant on this node, newest first.
+    Args:
+        tenant: Tenant whose snapshots are listed
+    Returns:
+        Snapshot manifests
+    """
+    manifests = await asyncio.to_thread(snapshots.list_snapshots, snapshots.SNAPSHOT_DIR, tenant)
+    return [manifest.to_dict() for manifest in manifests]
+
+
+@router.get("/snapshots/{snapshot_id}/download")
+async def download_snapshot(snapshot_id: str, tenant: str = Depends(resolve_tenant)) -> StreamingResponse:
+    """
+    Stream a snapshot as a tar archive, for a new node to fetch.
+    Args:
+        snapshot_id: Snapshot to download
+        tenant: Tenant owning the snapshot
+    Returns:
+        Streaming tar response
+    """
+    path = _snapshot_path(snapshot_id, tenant)
+    return StreamingResponse(
+        snapshots.iter_snapshot_tar(path),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="snapshot-{snapshot_id}.tar"'},
+    )
+
+
+@router.post("/snapshots/{snapshot_id}/import")
+async def import_local_snapshot(snapshot_id: str, tenant: str = Depends(resolve_tenant)) -> dict:
+    """
+    Import a snapshot already on this node.
+    Args:
+        snapshot_id: Snapshot to import
+        tenant: Tenant owning the snapshot
+    Returns:
+        Imported snapshot manifest
+    """
+    return await _import(_snapshot_path(snapshot_id, tenant))
+
+
+@router.post("/snapshots/import")
+async def import_uploaded_snapshot(
+    file: UploadFile = File(...),
+    tenant: str = Depends(resolve_tenant),
+) -> dict:
+    """
+    Import a snapshot tar archive, as downloaded from another node.
+    Replicas accepted too, a replica's own data directory it seeds.
+    Args:
+        file: Snapshot tar archive
+        tenant: Tenant the snapshot must be scoped to
+    Returns:
+        Imported snapshot manifest
+    """
+    try:
+        path = await asyncio.to_thread(snapshots.extract_snapshot_tar, file.file, tenant=tenant)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid snapshot: {e}")
+    return await _import(path)
+
+
+async def _import(path) -> dict:
+    try:
+        async with get_maintenance_scheduler().lock:
+            manifest = await asyncio.to_thread(snapshots.import_snapshot, path)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return manifest.to_dict()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.agent.usage import get_usage_recorder, get_usage_store, since_day
+from app.api.dependencies import resolve_tenant
+from app.api.models import SessionUsage, TopConsumers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["usage"])
+
+
+@router.get("/usage/top", response_model=TopConsumers)
+async def top_consumers(
+    days: int = Query(7, ge=1, le=366, description="UTC days in the window, today included"),
+    limit: int = Query(10, ge=1, le=100, description="Sessions returned"),
+    order_by: Literal["total_tokens", "cost_usd", "requests", "total_ms"] = Query(
+        "total_tokens", description="Total the ranking uses"),
+    tenant: str = Depends(resolve_tenant),
+) -> TopConsumers:
+    """
+    Sessions of the tenant spending the most tokens, money or time.
+    Buffered usage written first, so recent requests counted are.
+    Args:
+        days: Window length
+        limit: Sessions returned
+        order_by: Ranking total
+        tenant: Tenant from the X-Tenant-ID header
+    Returns:
+        Ranked session totals
+    """
+    since = since_day(days)
+    try:
+        await get_usage_recorder().flush()
+        sessions = await asyncio.to_thread(get_usage_store().top_sessions, tenant, since, order_by, limit)
+    except Exception as e:
+        logger.error(f"Error reading usage: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return TopConsumers(since=since, order_by=order_by, sessions=sessions)
+
+
+@router.get("/usage/sessions/{session_id}", response_model=SessionUsage)
+async def session_usage(
+    session_id: str,
+    days: int = Query(30, ge=1, le=366, description="UTC days in the window, today included"),
+    tenant: str = Depends(resolve_tenant),
+) -> SessionUsage:
+    """
+    Totals of one session, over the window and per day.
+    Args:
+        session_id: Chat session identifier
+        days: Window length
+        tenant: Tenant owning the session, from the X-Tenant-ID header
+    Returns:
+        Window totals and per-day totals
+    """
+    since = since_day(days)
+    try:
+        await get_usage_recorder().flush()
+        usage = await asyncio.to_thread(get_usage_store().session_usage, tenant, session_id, since)
+    except Exception as e:
+        logger.error(f"Error reading usage of session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return SessionUsage(since=since, **usage)
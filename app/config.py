@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,10 +11,106 @@ class Settings(BaseSettings):
     llm_api_key: str
     llm_model: str = "gpt-4o-mini-2024-07-18"
 
+    # Deployment role, read_only replicas serve searches and never write
+    role: Literal["primary", "read_only"] = "primary"
+    replica_poll_seconds: float = 5
+
+    # Deep health probes, per-dependency timeout and report reuse
+    health_timeout_seconds: float = 3
+    health_cache_seconds: float = 5
+
     log_level: str = "INFO"
     max_upload_size_mb: int = 10
     backend_url: str = "http://localhost:8000"
 
+    # Conversation history policy
+    history_turns: int = 4
+    history_max_tokens: int = 3000
+
+    # Embedding storage, reduced dimensions and quantized precision
+    # Rescoring a float32 copy per row keeps, quantized tables no smaller then
+    embedding_dimensions: int = 1536
+    vector_precision: Literal["float32", "float16", "int8"] = "float32"
+    vector_rescore_factor: int = 0
+
+    # PDF chunking, per upload overridable the strategy is, overlap structure-aware only
+    chunking_strategy: Literal["fixed", "structure"] = "structure"
+    chunk_size: int = 1000
+    chunk_overlap: int = 100
+
+    # Chat admission control, 0 concurrency disables it
+    chat_max_concurrency: int = 8
+    chat_queue_size: int = 32
+    chat_queue_timeout_seconds: float = 15
+    chat_max_per_session: int = 2
+
+    # Request deadline and stage budgets, an X-Request-Timeout header may shorten it
+    chat_deadline_seconds: float = 60
+    embedding_timeout_seconds: float = 5
+    search_timeout_seconds: float = 5
+    generation_timeout_seconds: float = 50
+
+    # Usage accounting, prices per million tokens, buffered writes
+    llm_input_cost_per_1m: float = 0.15
+    llm_output_cost_per_1m: float = 0.60
+    embedding_cost_per_1m: float = 0.02
+    usage_flush_seconds: float = 2
+    usage_batch_size: int = 500
+
+    # Upstream resilience, jittered retries, hedged embeddings, circuit breaking
+    upstream_retries: int = 2
+    upstream_retry_base_seconds: float = 0.2
+    upstream_retry_max_seconds: float = 2
+    embedding_hedge_quantile: float = 0.95
+    embedding_hedge_min_seconds: float = 0.05
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30
+
+    # Identical in-flight questions share one generation, sessions without history only
+    chat_coalescing: bool = True
+
+    # Batch uploads, PDFs per request and parsed at once
+    batch_upload_max_files: int = 200
+    batch_upload_concurrency: int = 4
+
+    # Speculative retrieval while typing, reused if the sent text matches
+    prefetch_ttl_seconds: float = 30
+    prefetch_match_ratio: float = 0.9
+    prefetch_max_entries: int = 1024
+
+    # Precomputed document summaries, overview questions answered from them
+    document_summaries: bool = True
+    summary_section_chars: int = 6000
+    summary_context_chars: int = 4000
+    summary_concurrency: int = 1
+
+    # Adaptive retrieval depth, candidates over-fetched then cut by similarity
+    retrieval_candidates: int = 10
+    retrieval_min_k: int = 1
+    retrieval_max_k: int = 5
+    retrieval_min_score: float = 0.3
+    retrieval_relative_gap: float = 0.2
+
+    # Retrieval-only search API, results reachable through cursor pages
+    search_max_results: int = 100
+
+    # Search result cache, per table version, 0 MB disables it
+    search_cache_mb: float = 64
+
+    # Per-tenant knowledge handles, bounded and idle-evicted
+    tenant_cache_size: int = 32
+    tenant_idle_minutes: float = 30
+
+    # Background user-memory extraction, 0 turns disables it, partial batches extracted after the wait
+    memory_extraction_every: int = 3
+    memory_extraction_concurrency: int = 2
+    memory_extraction_max_wait_seconds: float = 300
+
+    # LanceDB maintenance, 0 minutes disables the schedule
+    maintenance_interval_minutes: float = 60
+    version_retention_hours: float = 24
+    index_retrain_ratio: float = 0.25
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
 
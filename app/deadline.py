@@ -0,0 +1,119 @@
+import threading
+import time
+
+from app.config import settings
+from app.metrics import get_metrics
+
+# Seconds the caller still waits, shorter than the configured default only honoured
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+def stage_budgets() -> dict[str, float]:
+    """
+    Seconds each pipeline stage may take, from settings.
+    Returns:
+        Budget per stage name
+    """
+    return {
+        "embedding": settings.embedding_timeout_seconds,
+        "search": settings.search_timeout_seconds,
+        "generation": settings.generation_timeout_seconds,
+    }
+
+
+def record_timeout(stage: str) -> None:
+    """
+    Count a timed out stage, per stage in the metrics.
+    Args:
+        stage: Stage name
+    """
+    get_metrics().increment(f"timeouts.{stage}")
+
+
+class StageTimeout(TimeoutError):
+    """
+    Pipeline stage over its budget or past the request deadline.
+    """
+
+    def __init__(self, stage: str, seconds: float):
+        self.stage = stage
+        self.seconds = seconds
+        super().__init__(f"{stage} timed out after {seconds:.1f}s")
+
+
+class Deadline:
+    """
+    Time left for one chat request, stage budgets within it.
+    Passed down the pipeline, each stage of it its share checks.
+    """
+
+    def __init__(self, seconds: float, budgets: dict[str, float] | None = None):
+        """
+        Initialize deadline.
+        Args:
+            seconds: Seconds from now the request must finish in
+            budgets: Seconds per stage, settings if None
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.budgets = budgets if budgets is not None else stage_budgets()
+        # Stage running now, from a worker thread set it may be
+        self.stage: str | None = None
+        self._stage_started = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """
+        Seconds until the request deadline, never negative.
+        """
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def budget(self, *stages: str) -> float:
+        """
+        Seconds the given stages together may take, the deadline capping them.
+        Args:
+            stages: Stage names
+        Returns:
+            Timeout in seconds
+        """
+        return min(sum(self.budgets[stage] for stage in stages), self.remaining())
+
+    def enter(self, stage: str) -> None:
+        """
+        Stage started, its budget from now counted.
+        Args:
+            stage: Stage starting now
+        """
+        with self._lock:
+            self.stage = stage
+            self._stage_started = time.monotonic()
+
+    def check(self) -> None:
+        """
+        Stage running now, within its budget and the deadline it must be.
+        Raises:
+            StageTimeout: Over the budget or past the deadline
+        """
+        with self._lock:
+            self._check()
+
+    def _check(self) -> None:
+        if self.stage is None:
+            if self.remaining() <= 0:
+                raise StageTimeout("request", self.seconds)
+            return
+        elapsed = time.monotonic() - self._stage_started
+        if elapsed > self.budgets[self.stage] or self.remaining() <= 0:
+            raise StageTimeout(self.stage, elapsed)
+
+
+def request_deadline(seconds: float | None = None) -> Deadline:
+    """
+    Deadline of a new request, the configured default capping it.
+    Args:
+        seconds: Seconds the caller allows, default if None
+    Returns:
+        Deadline instance
+    """
+    default = settings.chat_deadline_seconds
+    return Deadline(default if seconds is None else min(seconds, default))
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from agno.models.openai import OpenAIChat
+
+from app.agent.chat_agent import AGENT_DB_FILE
+from app.config import settings
+from app.knowledge.store import CONTENTS_DB_FILE, get_embedder, get_knowledge
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# One dependency probe, details dict returned, on failure it raises
+Probe = Callable[[], dict[str, Any]]
+
+
+def probe_sqlite(db_file: str | Path, timeout_seconds: float) -> dict[str, Any]:
+    """
+    Open a SQLite file read-only, rows of every table count.
+    Locked longer than the timeout, an error it raises.
+    Args:
+        db_file: Database file
+        timeout_seconds: Busy timeout of the connection
+    Returns:
+        Rows per table and the SQLite schema version
+    """
+    if not Path(db_file).exists():
+        return {"exists": False, "tables": {}}
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, timeout=timeout_seconds)
+    try:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        tables = {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] for name in names}
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    finally:
+        conn.close()
+    return {"exists": True, "tables": tables, "schema_version": schema_version}
+
+
+def probe_lancedb() -> dict[str, Any]:
+    """
+    Open the default tenant's table, a one-row vector search run.
+    No embedding call needed, a unit vector searched is.
+    Returns:
+        Rows, table version, precision and search latency
+    """
+    vector_db = get_knowledge().vector_db
+    # Fresh handle on the primary, as searches do; replicas their refreshed one keep
+    if not vector_db.read_only and vector_db.table_name in vector_db.connection.table_names():
+        vector_db.table = vector_db.connection.open_table(name=vector_db.table_name)
+    if vector_db.table is None:
+        return {"table": vector_db.table_name, "exists": False, "rows": 0, "version": 0}
+
+    rows = vector_db.table.count_rows()
+    vector = np.zeros(vector_db.embedder.dimensions, dtype=np.float32)
+    vector[0] = 1.0
+    start = time.perf_counter()
+    vector_db.search_by_vector(vector, limit=1)
+    return {
+        "table": vector_db.table_name,
+        "exists": True,
+        "rows": rows,
+        "version": vector_db.version,
+        "precision": vector_db.precision,
+        "search_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def probe_embedder() -> dict[str, Any]:
+    """
+    Embed one short text, the embedding endpoint reachable it proves.
+    Returns:
+        Model and returned dimensions
+    """
+    embedder = get_embedder()
+    embedding = embedder.get_embedding("health check")
+    if not embedding:
+        raise RuntimeError("Empty embedding returned")
+    return {"model": embedder.id, "dimensions": len(embedding)}
+
+
+def probe_model() -> dict[str, Any]:
+    """
+    Look the chat model up, no tokens spent.
+    Returns:
+        Model id the endpoint reports
+    """
+    model = OpenAIChat(id=settings.llm_model, api_key=settings.llm_api_key)
+    info = model.get_client().models.retrieve(settings.llm_model)
+    return {"model": info.id}
+
+
+def default_probes(timeout_seconds: float) -> dict[str, Probe]:
+    """
+    Probes of every dependency the app has.
+    Args:
+        timeout_seconds: SQLite busy timeout
+    Returns:
+        Probe per dependency name
+    """
+    return {
+        "lancedb": probe_lancedb,
+        "agent_db": lambda: probe_sqlite(AGENT_DB_FILE, timeout_seconds),
+        "contents_db": lambda: probe_sqlite(CONTENTS_DB_FILE, timeout_seconds),
+        "embedder": probe_embedder,
+        "model": probe_model,
+    }
+
+
+class HealthChecker:
+    """
+    Probes dependencies concurrently, each one with a timeout.
+    Report cached for a few seconds, so frequent polls no extra load add.
+    """
+
+    def __init__(self, probes: dict[str, Probe], timeout_seconds: float, cache_seconds: float):
+        """
+        Initialize health checker.
+        Args:
+            probes: Probe per dependency name, blocking calls allowed
+            timeout_seconds: Seconds a probe may take before it counts as failed
+            cache_seconds: Seconds a report is reused, 0 probes on every call
+        """
+        self.probes = probes
+        self.timeout_seconds = timeout_seconds
+        self.cache_seconds = cache_seconds
+        self._report: dict[str, Any] | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _run(self, name: str, probe: Probe) -> dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(asyncio.to_thread(probe), timeout=self.timeout_seconds)
+            result = {"status": "ok", **details}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout", "error": f"No answer within {self.timeout_seconds}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        if result["status"] != "ok":
+            logger.warning(f"Health probe '{name}' {result['status']}: {result['error']}")
+            get_metrics().increment(f"health.{name}.failures")
+        return result
+
+    async def check(self) -> dict[str, Any]:
+        """
+        Report of every dependency, from cache if fresh enough.
+        Concurrent callers one probe round share.
+        Returns:
+            Overall status, probe time and per-dependency results
+        """
+        async with self._lock:
+            now = time.monotonic()
+            if self._report is not None and now - self._checked_at < self.cache_seconds:
+                return {**self._report, "cached": True}
+
+            names = list(self.probes)
+            results = await asyncio.gather(*(self._run(name, self.probes[name]) for name in names))
+            dependencies = dict(zip(names, results))
+            healthy = all(result["status"] == "ok" for result in results)
+            self._report = {
+                "status": "healthy" if healthy else "unhealthy",
+                "role": settings.role,
+                "checked_at": time.time(),
+                "dependencies": dependencies,
+            }
+            self._checked_at = time.monotonic()
+            return {**self._report, "cached": False}
+
+
+# Global health checker, singleton pattern
+_health_checker: HealthChecker | None = None
+
+
+def get_health_checker() -> HealthChecker:
+    """
+    Get or create health checker.
+    Returns:
+        HealthChecker instance
+    """
+    global _health_checker
+    if _health_checker is None:
+        _health_checker = HealthChecker(
+            probes=default_probes(settings.health_timeout_seconds),
+            timeout_seconds=settings.health_timeout_seconds,
+            cache_seconds=settings.health_cache_seconds,
+        )
+    return _health_checker
@@ -0,0 +1,447 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+from agno.db.schemas.knowledge import KnowledgeRow
+from agno.knowledge.content import ContentStatus
+from agno.knowledge.document import Document
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.knowledge import Knowledge
+from agno.utils.string import generate_id
+
+from app.agent.history import estimate_tokens
+from app.config import settings
+from app.knowledge.store import get_pdf_reader
+from app.knowledge.summaries import SummaryQueue
+from app.knowledge.tenants import DEFAULT_TENANT
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkIngestReport:
+    """
+    Outcome of one bulk ingest run.
+    """
+
+    files_found: int = 0
+    files_skipped: int = 0
+    files_ingested: int = 0
+    files_failed: int = 0
+    chunks: int = 0
+    embedding_tokens: int = 0
+    seconds: float = 0.0
+    failures: list[dict[str, str]] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_ingested / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.embedding_tokens / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "files_per_second": round(self.files_per_second, 2),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+            "tokens_per_second": round(self.tokens_per_second, 2),
+        }
+
+
+class Checkpoint:
+    """
+    Append-only record of ingested files, interrupted runs resume from it.
+    A file recorded only after its rows appended are.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Initialize checkpoint.
+        Args:
+            path: JSON lines file, created on first record
+        """
+        self.path = Path(path)
+        self._entries: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line of a killed run, ignored it is
+                        continue
+                    self._entries[entry["path"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_done(self, key: str, path: Path) -> bool:
+        """
+        File already ingested, unchanged since.
+        Args:
+            key: Path relative to the ingest root
+            path: File on disk
+        Returns:
+            True if the recorded size and modification time still match
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        stat = path.stat()
+        return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def record(self, entries: list[dict[str, Any]]) -> None:
+        """
+        Record ingested files, flushed to disk before returning.
+        Args:
+            entries: One dict per file, path, size, mtime_ns, file_id and chunks
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+                self._entries[entry["path"]] = entry
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def discover_pdfs(root: str | Path) -> list[Path]:
+    """
+    PDFs under a directory tree, in stable order.
+    Args:
+        root: Directory to walk
+    Returns:
+        Sorted PDF paths
+    """
+    root = Path(root)
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+def bulk_file_id(relative_path: str, tenant: str) -> str:
+    """
+    Stable file id of a bulk ingested PDF, same on every run.
+    Args:
+        relative_path: Path relative to the ingest root
+        tenant: Tenant receiving the file
+    Returns:
+        Deterministic UUID
+    """
+    return generate_id(f"bulk:{tenant}:{relative_path}")
+
+
+def parse_pdf(path: str, filename: str, file_id: str, chunking: str | None) -> list[Document]:
+    """
+    Read and chunk one PDF, as add_pdf_to_knowledge would.
+    Top level it is, in worker processes it runs.
+    Args:
+        path: PDF to read
+        filename: Name stored with the chunks
+        file_id: File id stored with the chunks
+        chunking: Chunking strategy name, configured default if None
+    Returns:
+        Chunk documents, not yet embedded
+    """
+    documents = get_pdf_reader(chunking).read(path, name=filename)
+    for number, document in enumerate(documents):
+        document.id = f"{file_id}_{number}"
+        document.name = filename
+        document.content_id = file_id
+        document.meta_data = {
+            **(document.meta_data or {}),
+            "filename": filename,
+            "file_id": file_id,
+            "type": "pdf",
+        }
+    return documents
+
+
+async def embed_documents(embedder: Embedder, documents: list[Document]) -> int:
+    """
+    Embed documents in batched requests, on the caller's event loop awaited.
+    Args:
+        embedder: Embedder, its batch API used if it has one
+        documents: Documents to embed, embeddings set in place
+    Returns:
+        Embedding tokens used, estimated if the embedder no usage reports
+    """
+    texts = [document.content for document in documents]
+    batch_api = getattr(embedder, "async_get_embeddings_batch_and_usage", None)
+    if batch_api is not None:
+        embeddings, usages = await batch_api(texts)
+    else:
+        def embed_each() -> tuple[list[list[float]], list[dict | None]]:
+            pairs = [embedder.get_embedding_and_usage(text) for text in texts]
+            return [e for e, _ in pairs], [u for _, u in pairs]
+
+        embeddings, usages = await asyncio.to_thread(embed_each)
+
+    for document, embedding, usage in zip(documents, embeddings, usages):
+        document.embedding = embedding
+        document.usage = usage
+
+    # One usage dict per request, shared by the texts of its batch
+    reported = {id(usage): usage for usage in usages if usage}
+    if reported:
+        return sum(int(usage.get("total_tokens") or usage.get("prompt_tokens") or 0)
+                   for usage in reported.values())
+    return sum(estimate_tokens(text) for text in texts)
+
+
+class BulkIngester:
+    """
+    Directory tree ingest, for archives too large for the upload endpoint.
+    PDFs parsed in parallel, chunks embedded in batches and appended in bulk,
+    progress checkpointed so an interrupted run resumes.
+    """
+
+    def __init__(
+        self,
+        knowledge: Knowledge,
+        checkpoint: Checkpoint,
+        workers: int = 4,
+        batch_chunks: int = 500,
+        chunking: str | None = None,
+        tenant: str = DEFAULT_TENANT,
+        on_progress: Callable[[BulkIngestReport], None] | None = None,
+        summaries: SummaryQueue | None = None,
+    ):
+        """
+        Initialize ingester.
+        Args:
+            knowledge: Knowledge base receiving the PDFs
+            checkpoint: Record of files already ingested
+            workers: Parsing processes, 1 parses in a thread
+            batch_chunks: Chunks embedded and appended per batch
+            chunking: Chunking strategy name, configured default if None
+            tenant: Tenant receiving the PDFs, part of the file ids
+            on_progress: Called after every batch with the running report
+            summaries: Queue summarizing every stored file, none built if None
+        """
+        self.knowledge = knowledge
+        self.checkpoint = checkpoint
+        self.workers = max(workers, 1)
+        self.batch_chunks = max(batch_chunks, 1)
+        self.chunking = chunking
+        self.tenant = tenant
+        self.on_progress = on_progress
+        self.summaries = summaries
+
+    async def run(self, root: str | Path) -> BulkIngestReport:
+        """
+        Ingest every PDF under root not yet in the checkpoint.
+        Once per run awaited, by the CLI through asyncio.run driven.
+        Args:
+            root: Directory to ingest
+        Returns:
+            Final report
+        """
+        root = Path(root)
+        report = BulkIngestReport()
+        start = time.perf_counter()
+
+        pending: list[tuple[str, Path]] = []
+        for path in discover_pdfs(root):
+            key = path.relative_to(root).as_posix()
+            if self.checkpoint.is_done(key, path):
+                report.files_skipped += 1
+            else:
+                pending.append((key, path))
+        report.files_found = len(pending) + report.files_skipped
+        logger.info(
+            f"Bulk ingest of {root}: {len(pending)} PDFs to ingest, {report.files_skipped} done before")
+
+        batch: list[tuple[str, Path, str, list[Document]]] = []
+        batch_size = 0
+        async for key, path, file_id, documents in self._parse_all(pending, report):
+            batch.append((key, path, file_id, documents))
+            batch_size += len(documents)
+            if batch_size >= self.batch_chunks:
+                await self._flush(batch, report, start)
+                batch, batch_size = [], 0
+        await self._flush(batch, report, start)
+
+        report.seconds = time.perf_counter() - start
+        if self.summaries is not None:
+            # Background tasks of this loop, before asyncio.run returns finished they must be
+            logger.info(f"Bulk ingest of {root} stored, waiting for document summaries")
+            await self.summaries.flush()
+        return report
+
+    async def _parse_all(
+        self,
+        pending: list[tuple[str, Path]],
+        report: BulkIngestReport,
+    ) -> AsyncIterator[tuple[str, Path, str, list[Document]]]:
+        """
+        Parse pending files, a bounded window in flight so memory flat stays.
+        Workers spawned, not forked, the LanceDB and HTTP threads of this process never copied.
+        """
+        executor: Executor = (
+            ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            if self.workers > 1 else ThreadPoolExecutor(1))
+        window = self.workers * 2
+        with executor:
+            queue = iter(pending)
+            in_flight: list[tuple[str, Path, str, Any]] = []
+
+            def submit_next() -> None:
+                for key, path in queue:
+                    file_id = bulk_file_id(key, self.tenant)
+                    future = executor.submit(parse_pdf, str(path), path.name, file_id, self.chunking)
+                    in_flight.append((key, path, file_id, future))
+                    return
+
+            for _ in range(window):
+                submit_next()
+            # In submission order yielded, checkpoint order stable it keeps
+            while in_flight:
+                key, path, file_id, future = in_flight.pop(0)
+                submit_next()
+                try:
+                    documents = await asyncio.wrap_future(future)
+                    if not documents:
+                        # Unreadable or scanned, the reader nothing returns
+                        raise ValueError("no text extracted")
+                except Exception as e:
+                    report.files_failed += 1
+                    report.failures.append({"path": key, "error": str(e)})
+                    logger.warning(f"Failed to parse {key}: {e}")
+                    continue
+                yield key, path, file_id, documents
+
+    async def _flush(
+        self,
+        batch: list[tuple[str, Path, str, list[Document]]],
+        report: BulkIngestReport,
+        start: float,
+    ) -> None:
+        """
+        Embed, append and checkpoint one batch of parsed files.
+        """
+        if not batch:
+            return
+        files = [
+            ParsedFile(file_id=file_id, filename=path.name, documents=docs, metadata={"source_path": key})
+            for key, path, file_id, docs in batch
+        ]
+        tokens = await store_parsed_files(self.knowledge, files, self.chunking)
+
+        entries = []
+        for key, path, file_id, docs in batch:
+            stat = path.stat()
+            entries.append({
+                "path": key,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "file_id": file_id,
+                "chunks": len(docs),
+            })
+        await asyncio.to_thread(self.checkpoint.record, entries)
+        if self.summaries is not None:
+            for file in files:
+                self.summaries.schedule(file.file_id, self.tenant, self.knowledge)
+
+        report.files_ingested += len(batch)
+        report.chunks += sum(len(file.documents) for file in files)
+        report.embedding_tokens += tokens
+        report.seconds = time.perf_counter() - start
+        if self.on_progress is not None:
+            self.on_progress(report)
+
+
+@dataclass
+class ParsedFile:
+    """
+    One parsed PDF, ready to embed and store.
+    """
+
+    file_id: str
+    filename: str
+    documents: list[Document]
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+async def store_parsed_files(
+    knowledge: Knowledge,
+    files: list[ParsedFile],
+    chunking: str | None = None,
+) -> int:
+    """
+    Embed and store parsed files, one table append for all of them.
+    Earlier rows of the same file ids replaced they are, never duplicated.
+    Table and contents writes in a worker thread run, the event loop free it stays.
+    Args:
+        knowledge: Knowledge base receiving the files
+        files: Parsed files
+        chunking: Chunking strategy name recorded, configured default if None
+    Returns:
+        Embedding tokens used
+    """
+    if not files:
+        return 0
+    documents = [document for file in files for document in file.documents]
+
+    tokens = await embed_documents(knowledge.vector_db.embedder, documents) if documents else 0
+    await asyncio.to_thread(_write_files, knowledge, files, documents, chunking)
+
+    metrics = get_metrics()
+    metrics.increment("bulk_ingest.files", len(files))
+    metrics.increment("bulk_ingest.chunks", len(documents))
+    metrics.increment("bulk_ingest.embedding_tokens", tokens)
+    return tokens
+
+
+def _write_files(
+    knowledge: Knowledge,
+    files: list[ParsedFile],
+    documents: list[Document],
+    chunking: str | None,
+) -> None:
+    """
+    Embedded files into the table and the contents DB written, blocking.
+    """
+    vector_db = knowledge.vector_db
+    rows = [vector_db.build_row(document, document.content_id) for document in documents]
+
+    vector_db.delete_files([file.file_id for file in files])
+    vector_db.add_rows(rows)
+
+    contents_db = knowledge.contents_db
+    if contents_db is not None:
+        now = int(time.time())
+        for file in files:
+            contents_db.upsert_knowledge_content(knowledge_row=KnowledgeRow(
+                id=file.file_id,
+                name=file.filename,
+                description="",
+                metadata={
+                    "filename": file.filename,
+                    "file_id": file.file_id,
+                    "type": "pdf",
+                    "chunking": chunking or settings.chunking_strategy,
+                    "chunks": len(file.documents),
+                    **file.metadata,
+                },
+                type=".pdf",
+                linked_to=knowledge.name or "",
+                status=ContentStatus.COMPLETED,
+                created_at=now,
+                updated_at=now,
+            ))
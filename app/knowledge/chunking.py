@@ -0,0 +1,201 @@
+import io
+import re
+from typing import Callable, Iterator
+
+from agno.knowledge.chunking.fixed import FixedSizeChunking
+from agno.knowledge.chunking.strategy import ChunkingStrategy
+from agno.knowledge.document import Document
+
+# Numbered or keyword headings, "2.1 Scope", "Section 4", "CHAPTER ONE"
+_NUMBERED_HEADING = re.compile(
+    r"^(?:#{1,6}\s+\S|(?:\d+\.)*\d+\.?\s+[A-Z]|(?:section|chapter|article|part|appendix)\s+\w+)",
+    re.IGNORECASE,
+)
+# Table rows, pipes, tabs or wide column gaps they have
+_TABLE_ROW = re.compile(r"\|.*\||\t\S.*\t|\S {3,}\S.* {3,}\S")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+# Page number lines Agno's PDF reader adds, "<start page 3>" and "<end page 3>"
+_PAGE_MARKER = re.compile(r"^<(?:start|end) page \d+>$")
+
+MAX_HEADING_LENGTH = 80
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > MAX_HEADING_LENGTH or line.endswith((".", ",", ";", ":")):
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) < 3:
+        return False
+    if line.isupper():
+        return True
+    words = line.split()
+    return len(words) <= 8 and all(w[0].isupper() or not w[0].isalpha() for w in words)
+
+
+def iter_blocks(text: str) -> Iterator[tuple[str, str]]:
+    """
+    Walk page text lazily, headings, paragraphs and tables it yields.
+    Args:
+        text: Extracted page text
+    Yields:
+        (kind, text) pairs, kind one of heading, paragraph, table
+    """
+    lines: list[str] = []
+    kind = "paragraph"
+
+    for raw in io.StringIO(text):
+        line = raw.strip()
+        # Page markers, block boundaries like blank lines they are, never text
+        if not line or _PAGE_MARKER.match(line):
+            if lines:
+                yield kind, ("\n" if kind == "table" else " ").join(lines)
+                lines = []
+            continue
+
+        line_kind = "table" if _TABLE_ROW.search(raw) else "paragraph"
+        if line_kind == "paragraph" and _is_heading(line) and (not lines or kind == "table"
+                                                             or lines[-1].endswith((".", "!", "?", ":"))):
+            if lines:
+                yield kind, ("\n" if kind == "table" else " ").join(lines)
+                lines = []
+            yield "heading", line
+            continue
+
+        if lines and line_kind != kind:
+            yield kind, ("\n" if kind == "table" else " ").join(lines)
+            lines = []
+        kind = line_kind
+        lines.append(line)
+
+    if lines:
+        yield kind, ("\n" if kind == "table" else " ").join(lines)
+
+
+def _split_oversized(kind: str, text: str, chunk_size: int) -> Iterator[str]:
+    """
+    Oversized blocks split, sentences for prose, rows for tables.
+    """
+    if len(text) <= chunk_size:
+        yield text
+        return
+    pieces = text.split("\n") if kind == "table" else _SENTENCE_END.split(text)
+    for piece in pieces:
+        # Single sentence still too long, on whitespace cut it we must
+        while len(piece) > chunk_size:
+            cut = piece.rfind(" ", 0, chunk_size)
+            cut = cut if cut > 0 else chunk_size
+            yield piece[:cut]
+            piece = piece[cut:].lstrip()
+        if piece:
+            yield piece
+
+
+class StructureAwareChunking(ChunkingStrategy):
+    """
+    Structure-aware chunking.
+    On headings, paragraphs and sentences splits it does, tables whole it keeps.
+    Page number and section title into chunk metadata recorded are.
+    Called per page in order, the current section across pages it carries.
+    """
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 100):
+        """
+        Initialize chunking strategy.
+        Args:
+            chunk_size: Maximum characters per chunk
+            overlap: Trailing characters of a chunk repeated in the next, within a section
+        """
+        if overlap >= chunk_size:
+            raise ValueError(
+                f"Invalid parameters: overlap ({overlap}) must be less than chunk size ({chunk_size}).")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._document_name: str | None = None
+        self._section: str | None = None
+
+    def chunk(self, document: Document) -> list[Document]:
+        """
+        Chunk one page document.
+        Args:
+            document: Page document, `page` metadata from the PDF reader it has
+        Returns:
+            Chunk documents
+        """
+        return list(self.iter_chunks(document))
+
+    def iter_chunks(self, document: Document) -> Iterator[Document]:
+        """
+        Chunk lazily, one chunk at a time yielded.
+        Args:
+            document: Page document
+        Yields:
+            Chunk documents with page and section metadata
+        """
+        if document.name != self._document_name:
+            self._document_name = document.name
+            self._section = None
+
+        parts: list[str] = []
+        size = 0
+        chunk_number = 1
+
+        for kind, text in iter_blocks(document.content):
+            if kind == "heading":
+                if parts:
+                    yield self._make_chunk(document, parts, chunk_number)
+                    chunk_number += 1
+                # New section, no overlap carried over
+                self._section = text
+                parts, size = [text], len(text)
+                continue
+
+            for piece in _split_oversized(kind, text, self.chunk_size):
+                if parts and size + len(piece) + 1 > self.chunk_size:
+                    yield self._make_chunk(document, parts, chunk_number)
+                    chunk_number += 1
+                    parts = self._overlap_tail(parts)
+                    size = sum(len(p) + 1 for p in parts)
+                parts.append(piece)
+                size += len(piece) + 1
+
+        # Page ending on a heading, in the next page's section metadata it lives
+        if parts and parts != [self._section]:
+            yield self._make_chunk(document, parts, chunk_number)
+
+    def _overlap_tail(self, parts: list[str]) -> list[str]:
+        """
+        Trailing parts within overlap budget, into the next chunk they go.
+        """
+        tail: list[str] = []
+        budget = self.overlap
+        for part in reversed(parts):
+            if len(part) > budget:
+                break
+            tail.append(part)
+            budget -= len(part) + 1
+        tail.reverse()
+        return tail
+
+    def _make_chunk(self, document: Document, parts: list[str], chunk_number: int) -> Document:
+        content = "\n".join(parts)
+        meta_data = dict(document.meta_data or {})
+        meta_data["chunk"] = chunk_number
+        meta_data["chunk_size"] = len(content)
+        if self._section:
+            meta_data["section"] = self._section
+        return Document(
+            id=self._generate_chunk_id(document, chunk_number, content),
+            name=document.name,
+            meta_data=meta_data,
+            content=content,
+        )
+
+
+# Chunking strategies by name, per upload selectable they are
+# Fixed chunks without overlap, as before structure-aware chunking they were
+CHUNKING_STRATEGIES: dict[str, Callable[[int, int], ChunkingStrategy]] = {
+    "fixed": lambda chunk_size, overlap: FixedSizeChunking(chunk_size=chunk_size),
+    "structure": lambda chunk_size, overlap: StructureAwareChunking(chunk_size=chunk_size, overlap=overlap),
+}
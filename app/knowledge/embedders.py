@@ -0,0 +1,29 @@
+import re
+from dataclasses import dataclass
+from hashlib import md5
+
+import numpy as np
+from agno.knowledge.embedder.base import Embedder
+
+
+@dataclass
+class HashEmbedder(Embedder):
+    """
+    Offline embedder, hashed bag of words it computes.
+    Shared words, similar vectors they give. No API key needed,
+    for benchmarks and tests it is, never for real retrieval.
+    """
+
+    dimensions: int = 64
+    calls: int = 0
+
+    def get_embedding(self, text: str) -> list[float]:
+        self.calls += 1
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def get_embedding_and_usage(self, text: str):
+        return self.get_embedding(text), None
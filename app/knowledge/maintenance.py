@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import Any
+
+import numpy as np
+
+from app.config import settings
+from app.knowledge.store import get_knowledge_cache, list_tenants, open_knowledge
+from app.knowledge.vector_store import PdfLanceDb, normalize, table_size_bytes
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Vector index types, retrained when many rows outside them lie
+_VECTOR_INDEX_PREFIX = "IVF"
+
+
+@dataclass
+class MaintenanceReport:
+    """
+    Outcome of one maintenance pass.
+    """
+
+    bytes_before: int
+    bytes_after: int
+    reclaimed_bytes: int
+    versions_before: int
+    versions_after: int
+    fragments_before: int
+    fragments_after: int
+    indexes_retrained: bool
+    latency_before_ms: float
+    latency_after_ms: float
+    seconds: float
+    finished_at: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def measure_search_latency(vector_db: PdfLanceDb, probes: int = 20, limit: int = 5) -> float:
+    """
+    Median vector search latency, random unit queries used.
+    Args:
+        vector_db: Vector store to probe
+        probes: Queries timed
+        limit: Results per query
+    Returns:
+        Median latency in milliseconds, 0 for an empty table
+    """
+    table = vector_db.table
+    if table is None or table.count_rows() == 0:
+        return 0.0
+
+    dimensions = table.schema.field(vector_db._vector_col).type.list_size
+    rng = np.random.default_rng(0)
+    queries = normalize(rng.normal(size=(probes, dimensions)).astype(np.float32))
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        vector_db.search_by_vector(query, limit=limit)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies) * 1000)
+
+
+def _needs_retrain(vector_db: PdfLanceDb, retrain_ratio: float) -> bool:
+    """
+    Vector index stale, too many rows added since training.
+    """
+    for index in vector_db.table.list_indices():
+        if not str(index.index_type).startswith(_VECTOR_INDEX_PREFIX):
+            continue
+        stats = vector_db.table.index_stats(index.name)
+        if stats and stats.num_unindexed_rows > retrain_ratio * max(stats.num_indexed_rows, 1):
+            return True
+    return False
+
+
+def compact_table(
+    vector_db: PdfLanceDb,
+    retention: timedelta,
+    retrain_ratio: float,
+) -> MaintenanceReport:
+    """
+    Compact fragments, prune old versions and update indexes.
+    Args:
+        vector_db: Vector store whose table maintained is
+        retention: Versions older than this pruned are
+        retrain_ratio: Unindexed to indexed rows ratio, vector indexes retrained above it
+    Returns:
+        Report of reclaimed space and search latency change
+    """
+    start = time.perf_counter()
+    table = vector_db.table
+
+    bytes_before = table_size_bytes(vector_db.uri, vector_db.table_name)
+    versions_before = len(table.list_versions())
+    fragments_before = table.stats()["fragment_stats"]["num_fragments"]
+    latency_before = measure_search_latency(vector_db)
+    retrain = _needs_retrain(vector_db, retrain_ratio)
+
+    # Compaction, version cleanup and index updates, one call LanceDB does them in
+    table.optimize(cleanup_older_than=retention, retrain=retrain)
+
+    bytes_after = table_size_bytes(vector_db.uri, vector_db.table_name)
+    report = MaintenanceReport(
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        reclaimed_bytes=bytes_before - bytes_after,
+        versions_before=versions_before,
+        versions_after=len(table.list_versions()),
+        fragments_before=fragments_before,
+        fragments_after=table.stats()["fragment_stats"]["num_fragments"],
+        indexes_retrained=retrain,
+        latency_before_ms=latency_before,
+        latency_after_ms=measure_search_latency(vector_db),
+        seconds=time.perf_counter() - start,
+        finished_at=time.time(),
+    )
+
+    metrics = get_metrics()
+    metrics.increment("maintenance.runs")
+    metrics.increment("maintenance.reclaimed_bytes", report.reclaimed_bytes)
+    metrics.set_gauge("maintenance.table_bytes", bytes_after)
+    metrics.set_gauge("maintenance.search_latency_ms", report.latency_after_ms)
+    logger.info(
+        f"Maintenance of '{vector_db.table_name}': {report.reclaimed_bytes / 1e6:.1f} MB reclaimed, "
+        f"fragments {fragments_before} -> {report.fragments_after}, "
+        f"versions {versions_before} -> {report.versions_after}, "
+        f"search p50 {latency_before:.1f} -> {report.latency_after_ms:.1f} ms")
+    return report
+
+
+class MaintenanceScheduler:
+    """
+    Periodic table maintenance.
+    In a worker thread runs, the event loop never blocked it keeps.
+    """
+
+    def __init__(self, interval_minutes: float, retention_hours: float, retrain_ratio: float):
+        """
+        Initialize scheduler.
+        Args:
+            interval_minutes: Minutes between passes, 0 disables scheduling
+            retention_hours: Table versions younger than this kept are
+            retrain_ratio: Unindexed to indexed rows ratio, vector indexes retrained above it
+        """
+        self.interval_minutes = interval_minutes
+        self.retention = timedelta(hours=retention_hours)
+        self.retrain_ratio = retrain_ratio
+        self.last_reports: dict[str, MaintenanceReport] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """
+        Held during a pass, snapshot exports it to keep files in place take.
+        """
+        return self._lock
+
+    def start(self) -> None:
+        """
+        Start periodic passes, if enabled.
+        """
+        if self.interval_minutes > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(f"Table maintenance scheduled every {self.interval_minutes} minutes")
+
+    async def stop(self) -> None:
+        """
+        Stop periodic passes.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> dict[str, MaintenanceReport]:
+        """
+        One pass over every tenant's table, overlapping passes serialized are.
+        Returns:
+            Maintenance report per tenant
+        """
+        async with self._lock:
+            cache = get_knowledge_cache()
+            cache.evict_idle()
+            reports: dict[str, MaintenanceReport] = {}
+            for tenant in await asyncio.to_thread(list_tenants):
+                # Closed tenants opened only for the pass, the cache not churned
+                knowledge = cache.peek(tenant) or await asyncio.to_thread(open_knowledge, tenant)
+                reports[tenant] = await asyncio.to_thread(
+                    compact_table, knowledge.vector_db, self.retention, self.retrain_ratio)
+            self.last_reports = reports
+            return reports
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_minutes * 60)
+            try:
+                await self.run_once()
+            except Exception as e:
+                get_metrics().increment("maintenance.failures")
+                logger.error(f"Table maintenance failed: {e}")
+
+
+# Global scheduler instance, singleton pattern
+_scheduler: MaintenanceScheduler | None = None
+
+
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """
+    Get or create maintenance scheduler.
+    Returns:
+        MaintenanceScheduler instance
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = MaintenanceScheduler(
+            interval_minutes=settings.maintenance_interval_minutes,
+            retention_hours=settings.version_retention_hours,
+            retrain_ratio=settings.index_retrain_ratio,
+        )
+    return _scheduler
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.knowledge.store import get_knowledge_cache
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRefresher:
+    """
+    Read-only replica's version poller.
+    Open tenant tables checked it does, newer versions swapped in,
+    in a worker thread so searches never wait on it.
+    """
+
+    def __init__(self, poll_seconds: float):
+        """
+        Initialize refresher.
+        Args:
+            poll_seconds: Seconds between polls, 0 disables polling
+        """
+        self.poll_seconds = poll_seconds
+        self.versions: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """
+        Start polling, if enabled.
+        """
+        if self.poll_seconds > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(f"Replica polling for new table versions every {self.poll_seconds}s")
+
+    async def stop(self) -> None:
+        """
+        Stop polling.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh_once(self) -> dict[str, int]:
+        """
+        Poll every open tenant table once.
+        Returns:
+            Served table version per open tenant
+        """
+        cache = get_knowledge_cache()
+        metrics = get_metrics()
+        start = time.perf_counter()
+        for tenant in cache.open_tenants():
+            knowledge = cache.peek(tenant)
+            if knowledge is None:
+                continue
+            vector_db = knowledge.vector_db
+            if await asyncio.to_thread(vector_db.refresh):
+                metrics.increment("replica.swaps")
+            self.versions[tenant] = vector_db.version
+
+        # Evicted tenants, reported no longer
+        open_tenants = set(cache.open_tenants())
+        self.versions = {t: v for t, v in self.versions.items() if t in open_tenants}
+        metrics.increment("replica.polls")
+        metrics.observe("replica.poll_seconds", time.perf_counter() - start)
+        return dict(self.versions)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                get_metrics().increment("replica.failures")
+                logger.error(f"Replica refresh failed: {e}")
+
+
+# Global refresher instance, singleton pattern
+_refresher: ReplicaRefresher | None = None
+
+
+def get_replica_refresher() -> ReplicaRefresher:
+    """
+    Get or create replica refresher.
+    Returns:
+        ReplicaRefresher instance
+    """
+    global _refresher
+    if _refresher is None:
+        _refresher = ReplicaRefresher(poll_seconds=settings.replica_poll_seconds)
+    return _refresher
@@ -0,0 +1,141 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from agno.knowledge.document import Document
+from agno.knowledge.knowledge import Knowledge
+from agno.vectordb.search import SearchType
+
+from app.agent.history import estimate_tokens
+from app.config import settings
+from app.deadline import Deadline
+from app.knowledge.vector_store import PdfLanceDb
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Retrieval depth before adaptive selection, savings measured against it
+FIXED_K = 3
+# Characters of each chunk the chat prompt quotes
+CONTEXT_CHARS = 500
+
+
+@dataclass
+class RetrievalResult:
+    """
+    Chunks kept by adaptive retrieval, their scores and what was cut.
+    """
+
+    documents: list[Document] = field(default_factory=list)
+    scores: list[float] = field(default_factory=list)
+    candidates: int = 0
+    tokens_saved: int = 0
+
+
+def select_by_score(
+    scores: list[float],
+    min_k: int,
+    max_k: int,
+    min_score: float,
+    relative_gap: float,
+) -> int:
+    """
+    Results worth keeping, of candidates ordered best first.
+    Above min_score and within relative_gap of the best one they must be,
+    then min_k from the threshold passers filled up and max_k capped.
+    Args:
+        scores: Similarities, descending
+        min_k: Results kept at least, when anything passes the threshold
+        max_k: Results kept at most
+        min_score: Absolute similarity floor, 0 disables it
+        relative_gap: Fraction below the best score still kept, 0 disables it
+    Returns:
+        Number of leading candidates kept, 0 if nothing passes the threshold
+    """
+    passing = [s for s in scores if s >= min_score]
+    if not passing:
+        return 0
+
+    kept = len(passing)
+    if relative_gap > 0:
+        floor = passing[0] - relative_gap * abs(passing[0])
+        kept = sum(1 for s in passing if s >= floor)
+    kept = max(kept, min(min_k, len(passing)))
+    return min(kept, max_k)
+
+
+def context_tokens(documents: list[Document]) -> int:
+    """
+    Prompt tokens of the quoted chunks.
+    Args:
+        documents: Chunks put in the prompt
+    Returns:
+        Approximate token count
+    """
+    return sum(estimate_tokens(d.content[:CONTEXT_CHARS]) for d in documents)
+
+
+def adaptive_search(
+    knowledge: Knowledge,
+    query: str,
+    filters: dict[str, Any] | None = None,
+    max_k: int | None = None,
+    deadline: Deadline | None = None,
+) -> RetrievalResult:
+    """
+    Over-fetch candidates, keep only the relevant ones.
+    One ranked search, served from the result cache when hot, scores it gives;
+    depth then by score thresholds chosen, not fixed.
+    Args:
+        knowledge: Knowledge base searched
+        query: Search text
+        filters: Metadata filters
+        max_k: Results kept at most, configured maximum if None
+        deadline: Request deadline, embedding and search budgets checked against it
+    Returns:
+        Kept chunks and their scores, tokens saved against fixed-depth retrieval
+    """
+    max_k = max_k or settings.retrieval_max_k
+    vector_db = knowledge.vector_db
+    if not isinstance(vector_db, PdfLanceDb) or vector_db.search_type != SearchType.vector:
+        # No scores to select on, fixed depth as before
+        documents = knowledge.search(query, max_results=max_k, filters=filters)
+        return RetrievalResult(documents=documents, candidates=len(documents))
+
+    fetch = max(settings.retrieval_candidates, max_k, FIXED_K)
+    rows, _, _ = vector_db.ranked_search(query, fetch, filters, deadline=deadline)
+    if rows is None or rows.empty:
+        return RetrievalResult()
+
+    candidates = vector_db._build_search_results(rows)
+    scores = [vector_db.similarity(float(d)) for d in rows["_distance"]]
+    kept = select_by_score(
+        scores,
+        min_k=settings.retrieval_min_k,
+        max_k=max_k,
+        min_score=settings.retrieval_min_score,
+        relative_gap=settings.retrieval_relative_gap,
+    )
+    documents = candidates[:kept]
+    kept_scores = scores[:kept]
+    if vector_db.reranker and documents:
+        # Reranked order kept, each chunk its own similarity still carries
+        similarity = {id(d): s for d, s in zip(documents, kept_scores)}
+        by_content = {d.content: s for d, s in zip(documents, kept_scores)}
+        documents = vector_db.reranker.rerank(query=query, documents=documents)
+        kept_scores = [similarity.get(id(d), by_content.get(d.content, 0.0)) for d in documents]
+
+    result = RetrievalResult(
+        documents=documents,
+        scores=kept_scores,
+        candidates=len(candidates),
+        # Deeper than the fixed depth kept, nothing saved rather than a negative saving
+        tokens_saved=max(context_tokens(candidates[:FIXED_K]) - context_tokens(documents), 0),
+    )
+    metrics = get_metrics()
+    metrics.observe("retrieval.kept", len(documents))
+    metrics.observe("retrieval.context_tokens_saved", result.tokens_saved)
+    if not documents:
+        metrics.increment("retrieval.context_skipped")
+    logger.debug(f"Adaptive retrieval kept {len(documents)} of {len(candidates)} candidates")
+    return result
@@ -0,0 +1,359 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tarfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import lancedb
+
+from app.config import settings
+from app.knowledge.store import (
+    CONTENTS_DB_FILE,
+    KNOWLEDGE_TABLE,
+    LANCEDB_URI,
+    contents_table_name,
+    get_knowledge_cache,
+    get_search_cache,
+    list_tenants,
+)
+from app.knowledge.summaries import SUMMARY_TABLE
+from app.knowledge.tenants import tenant_table_name
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path("data/snapshots")
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CONTENTS_FILE = "agno_contents.db"
+
+
+@dataclass
+class SnapshotManifest:
+    """
+    Description of one snapshot, pinned table versions and the settings they need.
+    """
+
+    snapshot_id: str
+    format_version: int
+    created_at: float
+    embedding_dimensions: int
+    vector_precision: str
+    tables: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # Tenant the snapshot is scoped to, every tenant of the node if None
+    tenant: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def load(cls, directory: Path) -> "SnapshotManifest":
+        with open(directory / MANIFEST_FILE) as f:
+            return cls(**json.load(f))
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """
+    Hard link a file, copied if links not possible are.
+    Lance files never rewritten in place, so links safe they are.
+    """
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _copy_sqlite(source: Path, destination: Path) -> None:
+    """
+    Consistent copy of a SQLite file, open writers not blocking it.
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(destination)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _copy_tenant_contents(source: Path, destination: Path, tenant: str) -> None:
+    """
+    Copy one tenant's contents table and summary rows, in one transaction.
+    Other tenants' tables and rows in the destination untouched they stay.
+    Args:
+        source: SQLite file read
+        destination: SQLite file written, created if missing
+        tenant: Tenant copied
+    """
+    table = contents_table_name(tenant)
+    connection = sqlite3.connect(destination, isolation_level=None)
+    try:
+        connection.execute("ATTACH DATABASE ? AS source", (str(source),))
+        connection.execute("BEGIN")
+        try:
+            existing = {name for (name,) in connection.execute("SELECT name FROM main.sqlite_master")}
+            # Tables before their indexes created they must be
+            schema = connection.execute(
+                "SELECT name, tbl_name, sql FROM source.sqlite_master "
+                "WHERE tbl_name IN (?, ?) AND sql IS NOT NULL ORDER BY type = 'index'",
+                (table, SUMMARY_TABLE)).fetchall()
+            copied = {tbl_name for _, tbl_name, _ in schema}
+
+            # Tenant's contents table replaced whole, as in the snapshot it is
+            connection.execute(f'DROP TABLE IF EXISTS main."{table}"')
+            for name, tbl_name, sql in schema:
+                if tbl_name == table or name not in existing:
+                    connection.execute(sql)
+            if table in copied:
+                connection.execute(f'INSERT INTO main."{table}" SELECT * FROM source."{table}"')
+            if SUMMARY_TABLE in copied:
+                connection.execute(f"DELETE FROM main.{SUMMARY_TABLE} WHERE tenant = ?", (tenant,))
+                connection.execute(
+                    f"INSERT INTO main.{SUMMARY_TABLE} SELECT * FROM source.{SUMMARY_TABLE} WHERE tenant = ?",
+                    (tenant,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+    finally:
+        connection.close()
+
+
+def export_snapshot(
+    snapshot_dir: str | Path = SNAPSHOT_DIR,
+    lancedb_uri: str | Path = LANCEDB_URI,
+    contents_db_file: str | Path = CONTENTS_DB_FILE,
+    tenant: str | None = None,
+) -> SnapshotManifest:
+    """
+    Export tenant tables, their indexes and the contents DB as one snapshot.
+    Table versions pinned first are, then the Lance files hard linked.
+    Args:
+        snapshot_dir: Directory receiving the snapshot
+        lancedb_uri: LanceDB directory exported
+        contents_db_file: Contents SQLite file exported
+        tenant: Only this tenant's table, contents and summaries exported, every tenant if None
+    Returns:
+        Manifest of the new snapshot
+    Raises:
+        ValueError: If the tenant no table has
+    """
+    tenants = list_tenants(lancedb_uri)
+    if tenant is not None:
+        if tenant not in tenants:
+            raise ValueError(f"Tenant '{tenant}' has no knowledge table to export")
+        tenants = [tenant]
+
+    start = time.perf_counter()
+    snapshot_id = time.strftime("%Y%m%dT%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+    target = Path(snapshot_dir) / snapshot_id
+    staging = target.with_name(f".{snapshot_id}.partial")
+    (staging / "lancedb").mkdir(parents=True)
+
+    manifest = SnapshotManifest(
+        snapshot_id=snapshot_id,
+        format_version=SNAPSHOT_FORMAT_VERSION,
+        created_at=time.time(),
+        embedding_dimensions=settings.embedding_dimensions,
+        vector_precision=settings.vector_precision,
+        tenant=tenant,
+    )
+    try:
+        connection = lancedb.connect(str(lancedb_uri))
+        for name in tenants:
+            table_name = tenant_table_name(KNOWLEDGE_TABLE, name)
+            table = connection.open_table(table_name)
+            manifest.tables[name] = {
+                "table": table_name,
+                "version": table.version,
+                "rows": table.count_rows(),
+                "indexes": [index.name for index in table.list_indices()],
+            }
+            shutil.copytree(
+                Path(lancedb_uri) / f"{table_name}.lance",
+                staging / "lancedb" / f"{table_name}.lance",
+                copy_function=_link_or_copy,
+            )
+
+        if Path(contents_db_file).exists():
+            if tenant is None:
+                _copy_sqlite(Path(contents_db_file), staging / CONTENTS_FILE)
+            else:
+                # Other tenants' contents and summaries never in the file they are
+                _copy_tenant_contents(Path(contents_db_file), staging / CONTENTS_FILE, tenant)
+
+        with open(staging / MANIFEST_FILE, "w") as f:
+            json.dump(manifest.to_dict(), f, indent=2)
+        # Complete snapshots only, under their final name they appear
+        staging.rename(target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    seconds = time.perf_counter() - start
+    get_metrics().observe("snapshots.export_seconds", seconds)
+    logger.info(f"Snapshot {snapshot_id} exported: {len(manifest.tables)} tables in {seconds:.2f}s")
+    return manifest
+
+
+def import_snapshot(
+    source: str | Path,
+    lancedb_uri: str | Path = LANCEDB_URI,
+    contents_db_file: str | Path = CONTENTS_DB_FILE,
+) -> SnapshotManifest:
+    """
+    Import a snapshot, tables swapped in and the contents DB replaced.
+    Tenant snapshots only their tenant's table, contents and summaries replace.
+    Files hard linked are, so seconds it takes whatever the size.
+    Args:
+        source: Snapshot directory
+        lancedb_uri: LanceDB directory receiving the tables
+        contents_db_file: Contents SQLite file updated
+    Returns:
+        Manifest of the imported snapshot
+    Raises:
+        ValueError: If format or embedding dimensions incompatible are
+    """
+    start = time.perf_counter()
+    source = Path(source)
+    manifest = SnapshotManifest.load(source)
+    if manifest.format_version > SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Snapshot format {manifest.format_version} newer than supported")
+    if manifest.embedding_dimensions != settings.embedding_dimensions:
+        raise ValueError(
+            f"Snapshot has {manifest.embedding_dimensions} dims, "
+            f"this node is configured for {settings.embedding_dimensions}")
+
+    lancedb_dir = Path(lancedb_uri)
+    lancedb_dir.mkdir(parents=True, exist_ok=True)
+    for tenant, table in manifest.tables.items():
+        name = f"{table['table']}.lance"
+        staging = lancedb_dir / f".{name}.importing"
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(source / "lancedb" / name, staging, copy_function=_link_or_copy)
+
+        # Live table moved aside, then the new one renamed in
+        live = lancedb_dir / name
+        retired = lancedb_dir / f".{name}.retired"
+        shutil.rmtree(retired, ignore_errors=True)
+        if live.exists():
+            live.rename(retired)
+        staging.rename(live)
+        shutil.rmtree(retired, ignore_errors=True)
+
+        # Versions written during export, rolled back to the pinned one
+        imported = lancedb.connect(str(lancedb_dir)).open_table(table["table"])
+        if imported.version != table["version"]:
+            imported.restore(table["version"])
+
+    snapshot_contents = source / CONTENTS_FILE
+    if snapshot_contents.exists():
+        Path(contents_db_file).parent.mkdir(parents=True, exist_ok=True)
+        if manifest.tenant is None:
+            # Backup into the live file, open engines the new rows see
+            _copy_sqlite(snapshot_contents, Path(contents_db_file))
+        else:
+            _copy_tenant_contents(snapshot_contents, Path(contents_db_file), manifest.tenant)
+
+    # Cached handles old tables point to, reopened on next use they are
+    get_knowledge_cache().clear()
+    # Restored versions, numbers of the replaced tables they may reuse
+    if get_search_cache() is not None:
+        get_search_cache().clear()
+
+    seconds = time.perf_counter() - start
+    get_metrics().observe("snapshots.import_seconds", seconds)
+    logger.info(
+        f"Snapshot {manifest.snapshot_id} imported: {len(manifest.tables)} tables in {seconds:.2f}s")
+    return manifest
+
+
+def list_snapshots(
+    snapshot_dir: str | Path = SNAPSHOT_DIR,
+    tenant: str | None = None,
+) -> list[SnapshotManifest]:
+    """
+    Complete snapshots on disk, newest first.
+    Args:
+        snapshot_dir: Directory holding snapshots
+        tenant: Only snapshots scoped to this tenant listed, all if None
+    Returns:
+        Manifests
+    """
+    snapshot_dir = Path(snapshot_dir)
+    if not snapshot_dir.exists():
+        return []
+    manifests = [
+        SnapshotManifest.load(path) for path in snapshot_dir.iterdir()
+        if (path / MANIFEST_FILE).exists() and not path.name.startswith(".")
+    ]
+    if tenant is not None:
+        manifests = [m for m in manifests if m.tenant == tenant]
+    return sorted(manifests, key=lambda m: m.created_at, reverse=True)
+
+
+def iter_snapshot_tar(directory: Path, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Stream a snapshot as an uncompressed tar, Lance files already compact they are.
+    Args:
+        directory: Snapshot directory
+        chunk_size: Bytes per chunk yielded
+    Yields:
+        Tar bytes
+    """
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, "rb") as reader:
+
+        def write() -> None:
+            with os.fdopen(write_fd, "wb") as writer, tarfile.open(fileobj=writer, mode="w|") as tar:
+                tar.add(directory, arcname=directory.name)
+
+        thread = threading.Thread(target=write, daemon=True)
+        thread.start()
+        while chunk := reader.read(chunk_size):
+            yield chunk
+        thread.join()
+
+
+def extract_snapshot_tar(
+    archive: Any,
+    snapshot_dir: str | Path = SNAPSHOT_DIR,
+    tenant: str | None = None,
+) -> Path:
+    """
+    Unpack a snapshot tar, streamed from the file object.
+    Args:
+        archive: Readable tar stream
+        snapshot_dir: Directory receiving the snapshot
+        tenant: Tenant the snapshot must be scoped to, any snapshot accepted if None
+    Returns:
+        Extracted snapshot directory
+    Raises:
+        ValueError: If no manifest the archive has, or another tenant's snapshot it is
+    """
+    snapshot_dir = Path(snapshot_dir)
+    staging = snapshot_dir / f".upload-{int(time.time() * 1000)}"
+    staging.mkdir(parents=True)
+    try:
+        with tarfile.open(fileobj=archive, mode="r|*") as tar:
+            tar.extractall(staging, filter="data")
+        manifests = list(staging.glob(f"*/{MANIFEST_FILE}"))
+        if len(manifests) != 1:
+            raise ValueError("Archive is not a snapshot, one manifest expected")
+        extracted = manifests[0].parent
+        if tenant is not None and SnapshotManifest.load(extracted).tenant != tenant:
+            # Never under the snapshot dir it lands, in another tenant's list it would show
+            raise ValueError(f"Archive is not a snapshot of tenant '{tenant}'")
+        target = snapshot_dir / extracted.name
+        if target.exists():
+            shutil.rmtree(target)
+        extracted.rename(target)
+        return target
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
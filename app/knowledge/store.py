@@ -1,95 +1,383 @@
+import json
 import logging
+import threading
+import uuid
+from collections import OrderedDict
+from hashlib import md5
 from pathlib import Path
+from typing import Any
 
+import lancedb
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
 from agno.knowledge.knowledge import Knowledge
-from agno.knowledge.embedder.openai import OpenAIEmbedder
-from agno.knowledge.chunking.fixed import FixedSizeChunking
 from agno.knowledge.reader.pdf_reader import PDFReader
-from agno.vectordb.lancedb import LanceDb
 from agno.db.sqlite import SqliteDb
 
 from app.config import settings
+from app.knowledge.chunking import CHUNKING_STRATEGIES
+from app.knowledge.tenants import (
+    DEFAULT_TENANT,
+    KnowledgeCache,
+    normalize_tenant,
+    tenant_from_table_name,
+    tenant_table_name,
+)
+from app.knowledge.vector_store import PdfLanceDb
+from app.metrics import get_metrics
+from app.resilience import ResilientOpenAIEmbedder
 
 logger = logging.getLogger(__name__)
 
-# Global knowledge instance, singleton pattern
-_knowledge: Knowledge | None = None
+LANCEDB_URI = "data/lancedb"
+KNOWLEDGE_TABLE = "pdf_knowledge"
+UPLOAD_DIR = Path("data/uploads")
+CONTENTS_DB_FILE = "data/agno_contents.db"
+CONTENTS_TABLE = "agno_knowledge"
 
-# Global contents database for tracking content status
+# Per-tenant knowledge handles, bounded LRU
+_knowledge_cache: KnowledgeCache | None = None
+
+# Global contents database for tracking content status, per tenant its table
 _contents_db: SqliteDb | None = None
+_tenant_contents_dbs: dict[str, SqliteDb] = {}
+
+# Shared embedder, tenants one client reuse
+_embedder: ResilientOpenAIEmbedder | None = None
+
+# Search results of all tenants, one memory budget they share
+_search_cache: "SearchResultCache | None" = None
+
+
+class SearchResultCache:
+    """
+    Memory-bounded LRU of vector search results.
+    Keyed by table, table version, query vector hash, k and filters it is.
+    New table version seen, entries of the old one dropped they are.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize cache.
+        Args:
+            max_bytes: Result memory kept at most, least recently used evicted first
+        """
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(
+        table_name: str,
+        version: int,
+        embedding: Any,
+        limit: int,
+        where: str | None,
+        remaining: dict[str, Any] | None,
+    ) -> tuple:
+        """
+        Cache key of one search.
+        Args:
+            table_name: Table searched
+            version: Table version searched
+            embedding: Query vector
+            limit: Results wanted
+            where: SQL prefilter
+            remaining: Post-filters
+        Returns:
+            Hashable key
+        """
+        vector = np.asarray(embedding, dtype=np.float32).tobytes()
+        return (
+            table_name,
+            version,
+            md5(vector).hexdigest(),
+            limit,
+            where,
+            json.dumps(remaining, sort_keys=True, default=str) if remaining else None,
+        )
+
+    def get(self, key: tuple) -> pd.DataFrame | None:
+        """
+        Cached results, None on a miss.
+        Args:
+            key: Key from `key`
+        Returns:
+            Ranked rows, shared and never to be modified
+        """
+        metrics = get_metrics()
+        with self._lock:
+            self._invalidate(key[0], key[1])
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                metrics.increment("search_cache.misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.increment("search_cache.hits")
+            return entry[0]
 
+    def put(self, key: tuple, results: pd.DataFrame) -> None:
+        """
+        Cache results, least recently used evicted until they fit.
+        Args:
+            key: Key from `key`
+            results: Ranked rows
+        """
+        size = int(results.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        metrics = get_metrics()
+        with self._lock:
+            self._invalidate(key[0], key[1])
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (results, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+                metrics.increment("search_cache.evictions")
+            metrics.set_gauge("search_cache.bytes", self._bytes)
+            metrics.set_gauge("search_cache.entries", len(self._entries))
 
-def get_contents_db() -> SqliteDb:
+    def _invalidate(self, table_name: str, version: int) -> None:
+        # Other version seen, newer ingest or a restored snapshot, stale entries dropped
+        if self._versions.get(table_name, version) != version:
+            stale = [k for k in self._entries if k[0] == table_name and k[1] != version]
+            for k in stale:
+                self._bytes -= self._entries.pop(k)[1]
+            self.invalidations += len(stale)
+            get_metrics().increment("search_cache.invalidations", len(stale))
+        self._versions[table_name] = version
+
+    def clear(self) -> None:
+        """
+        Drop every entry, tables replaced underneath the versions are.
+        """
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Hit, miss and eviction counts, and memory used.
+        Returns:
+            Cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def get_search_cache() -> SearchResultCache | None:
+    """
+    Get or create search result cache, None if disabled.
+    Returns:
+        SearchResultCache instance
+    """
+    global _search_cache
+    if _search_cache is None and settings.search_cache_mb > 0:
+        _search_cache = SearchResultCache(max_bytes=int(settings.search_cache_mb * 1024 * 1024))
+    return _search_cache
+
+
+def get_contents_db(tenant: str | None = None) -> SqliteDb:
     """
     Get or create contents database
+    Args:
+        tenant: Tenant id, default tenant if None
     Returns:
-        SqliteDb instance
+        SqliteDb instance, one knowledge table per tenant
     """
     global _contents_db
     if _contents_db is None:
-        _contents_db = SqliteDb(db_file="data/agno_contents.db")
-        logger.info("Contents database initialized")
-    return _contents_db
+        if settings.role == "read_only":
+            # Replicas, the primary's file only read they do
+            engine = create_engine(f"sqlite:///file:{CONTENTS_DB_FILE}?mode=ro&uri=true")
+            _contents_db = SqliteDb(db_engine=engine, knowledge_table=CONTENTS_TABLE)
+        else:
+            _contents_db = SqliteDb(db_file=CONTENTS_DB_FILE, knowledge_table=CONTENTS_TABLE)
+        logger.info(f"Contents database initialized ({settings.role})")
 
+    tenant = normalize_tenant(tenant)
+    if tenant == DEFAULT_TENANT:
+        return _contents_db
+    if tenant not in _tenant_contents_dbs:
+        # Same SQLite file and engine, separate table
+        _tenant_contents_dbs[tenant] = SqliteDb(
+            db_engine=_contents_db.db_engine,
+            knowledge_table=contents_table_name(tenant),
+        )
+    return _tenant_contents_dbs[tenant]
 
-def get_knowledge() -> Knowledge:
+
+def contents_table_name(tenant: str) -> str:
     """
-    Get or create knowledge base, stores PDF documents.
-    LanceDB for vectors use
+    Contents table of a tenant, default tenant the base table keeps.
+    Args:
+        tenant: Tenant id
     Returns:
-        Knowledge instance
+        Table name in the contents DB
     """
-    global _knowledge
-    if _knowledge is None:
-        embedder = OpenAIEmbedder(
+    if tenant == DEFAULT_TENANT:
+        return CONTENTS_TABLE
+    return f"{CONTENTS_TABLE}_{tenant}"
+
+
+def get_embedder() -> ResilientOpenAIEmbedder:
+    """
+    Get or create embedder, shared by all tenants.
+    Retried, hedged and circuit broken its API calls are.
+    Returns:
+        ResilientOpenAIEmbedder instance
+    """
+    global _embedder
+    if _embedder is None:
+        _embedder = ResilientOpenAIEmbedder(
             id="text-embedding-3-small",
             api_key=settings.llm_api_key,
+            dimensions=settings.embedding_dimensions,
+            # Hung embedding calls, past the stage budget abandoned they are
+            # Retries by the resilience layer only, the client's own disabled
+            client_params={"timeout": settings.embedding_timeout_seconds, "max_retries": 0},
         )
+    return _embedder
 
-        vector_db = LanceDb(
-            table_name="pdf_knowledge",
-            uri="data/lancedb",
-            embedder=embedder,
-        )
 
-        contents_db = get_contents_db()
+def open_knowledge(tenant: str) -> Knowledge:
+    """
+    Open knowledge base of a tenant, uncached.
+    Args:
+        tenant: Tenant id
+    Returns:
+        Knowledge instance over the tenant's own table
+    """
+    vector_db = PdfLanceDb(
+        table_name=tenant_table_name(KNOWLEDGE_TABLE, tenant),
+        uri=LANCEDB_URI,
+        embedder=get_embedder(),
+        precision=settings.vector_precision,
+        rescore_factor=settings.vector_rescore_factor,
+        read_only=settings.role == "read_only",
+        result_cache=get_search_cache(),
+    )
+
+    knowledge = Knowledge(
+        name="PDF Documents",
+        vector_db=vector_db,
+        contents_db=get_contents_db(tenant),
+        max_results=settings.retrieval_max_k,
+    )
+
+    logger.info(
+        f"Knowledge base of tenant '{tenant}' initialized with LanceDB, "
+        f"{settings.embedding_dimensions} dims stored as {vector_db.precision}")
+    return knowledge
+
 
-        _knowledge = Knowledge(
-            name="PDF Documents",
-            vector_db=vector_db,
-            contents_db=contents_db,
-            max_results=5,
+def get_knowledge_cache() -> KnowledgeCache:
+    """
+    Get or create per-tenant knowledge cache.
+    Returns:
+        KnowledgeCache instance
+    """
+    global _knowledge_cache
+    if _knowledge_cache is None:
+        _knowledge_cache = KnowledgeCache(
+            factory=open_knowledge,
+            max_size=settings.tenant_cache_size,
+            idle_seconds=settings.tenant_idle_minutes * 60,
         )
+    return _knowledge_cache
 
-        logger.info("Knowledge base initialized with LanceDB")
 
-    return _knowledge
+def get_knowledge(tenant: str | None = None) -> Knowledge:
+    """
+    Get or create knowledge base, stores PDF documents.
+    LanceDB for vectors use, one table per tenant
+    Args:
+        tenant: Tenant id, default tenant if None
+    Returns:
+        Knowledge instance
+    """
+    return get_knowledge_cache().get(normalize_tenant(tenant))
 
 
-def get_pdf_reader() -> PDFReader:
+def list_tenants(lancedb_uri: str | Path = LANCEDB_URI) -> list[str]:
+    """
+    Tenants with a table on disk.
+    Args:
+        lancedb_uri: LanceDB directory searched
+    Returns:
+        Tenant ids
+    """
+    connection = lancedb.connect(str(lancedb_uri))
+    tenants = (tenant_from_table_name(KNOWLEDGE_TABLE, name) for name in connection.table_names())
+    return sorted(t for t in tenants if t is not None)
+
+
+def get_pdf_reader(chunking: str | None = None) -> PDFReader:
     """
     Get PDF reader with chunking strategy
+    Args:
+        chunking: Strategy name, configured default if None
     Returns:
         PDFReader instance
     """
+    name = chunking or settings.chunking_strategy
+    if name not in CHUNKING_STRATEGIES:
+        raise ValueError(
+            f"Unknown chunking strategy '{name}', one of {sorted(CHUNKING_STRATEGIES)} expected")
+
     return PDFReader(
-        chunking_strategy=FixedSizeChunking(
-            chunk_size=1000,
+        chunking_strategy=CHUNKING_STRATEGIES[name](
+            settings.chunk_size,
+            settings.chunk_overlap,
         ),
     )
 
 
-def add_pdf_to_knowledge(file_path: str | Path, filename: str, document_id: str) -> None:
+def add_pdf_to_knowledge(
+    file_path: str | Path,
+    filename: str,
+    document_id: str,
+    chunking: str | None = None,
+    tenant: str | None = None,
+) -> None:
     """
     Add PDF to knowledge base, make it searchable.
     Reader parses, knowledge stores, Agno handles vectorization.
     Args:
         file_path: Path to PDF file, read we shall
         document_id: Unique identifier, tracking allows
+        chunking: Chunking strategy name, configured default if None
+        tenant: Tenant whose knowledge base receives it, default tenant if None
     """
     try:
-        knowledge = get_knowledge()
-        reader = get_pdf_reader()
+        knowledge = get_knowledge(tenant)
+        reader = get_pdf_reader(chunking)
 
         # Load and parse PDF document
         # Reader chunks, knowledge vectorizes and stores
@@ -107,3 +395,104 @@ def add_pdf_to_knowledge(file_path: str | Path, filename: str, document_id: str)
     except Exception as e:
         logger.error(f"Error adding PDF to knowledge: {e}")
         raise
+
+
+def validate_document_id(file_id: str) -> str:
+    """
+    Check a document id, uploads and versioned documents UUIDs carry.
+    Args:
+        file_id: Id from the request
+    Returns:
+        Id, unchanged
+    Raises:
+        ValueError: If not a canonical UUID it is
+    """
+    try:
+        if str(uuid.UUID(file_id)) == file_id:
+            return file_id
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid document id '{file_id}', a UUID expected")
+
+
+def upload_dir(tenant: str | None = None) -> Path:
+    """
+    Uploads directory of a tenant, default tenant the shared one keeps.
+    Other tenants' files never in it found are, by name guessed or not.
+    Args:
+        tenant: Tenant id, default tenant if None
+    Returns:
+        Directory, created if missing
+    """
+    tenant = normalize_tenant(tenant)
+    directory = UPLOAD_DIR if tenant == DEFAULT_TENANT else UPLOAD_DIR / tenant
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _upload_path(name: str | None, tenant: str | None) -> Path | None:
+    """
+    Upload file of a recorded name, None if outside the tenant's directory it points.
+    """
+    return upload_dir(tenant) / name if name and Path(name).name == name else None
+
+
+def delete_document(
+    file_id: str,
+    knowledge: Knowledge | None = None,
+    tenant: str | None = None,
+) -> dict[str, int]:
+    """
+    Delete document everywhere, vector rows, contents entries and upload files.
+    Only upload files its contents entries record, in the tenant's own directory,
+    removed are, never a pattern match.
+    Args:
+        file_id: Upload file id, or versioned document id
+        knowledge: Knowledge base, the tenant's one if None
+        tenant: Tenant owning the document, default tenant if None
+    Returns:
+        Counts of removed rows, contents entries and files, all zero if unknown
+    Raises:
+        ValueError: If not a valid document id it is
+    """
+    validate_document_id(file_id)
+    knowledge = knowledge or get_knowledge(tenant)
+    vector_db = knowledge.vector_db
+    contents_db = knowledge.contents_db
+
+    content_ids: set[str] = set()
+    upload_files: set[Path] = set()
+    if contents_db is not None:
+        contents, _ = contents_db.get_knowledge_contents()
+        for content in contents:
+            metadata = content.metadata or {}
+            if content.id != file_id and metadata.get("file_id") != file_id:
+                continue
+            content_ids.add(content.id)
+            # Recorded name, or the name single uploads are saved under
+            recorded = metadata.get("upload_file") or (
+                f"{file_id}_{metadata['filename']}" if metadata.get("filename") else None)
+            path = _upload_path(recorded, tenant)
+            if path is not None:
+                upload_files.add(path)
+        for content_id in content_ids:
+            contents_db.delete_knowledge_content(content_id)
+
+    deleted_rows = vector_db.delete_files([file_id])
+
+    deleted_files = 0
+    for path in upload_files:
+        try:
+            path.unlink()
+            deleted_files += 1
+        except FileNotFoundError:
+            pass
+
+    logger.info(
+        f"Document {file_id} deleted: {deleted_rows} rows, "
+        f"{len(content_ids)} contents entries, {deleted_files} files")
+    return {
+        "rows": deleted_rows,
+        "contents": len(content_ids),
+        "files": deleted_files,
+    }
@@ -0,0 +1,458 @@
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from agno.knowledge.knowledge import Knowledge
+from agno.models.message import Message
+
+from app.config import settings
+from app.knowledge.store import CONTENTS_DB_FILE, get_knowledge
+from app.knowledge.tenants import normalize_tenant
+from app.metrics import get_metrics
+from app.resilience import ResilientOpenAIChat
+
+logger = logging.getLogger(__name__)
+
+# Own table, in the contents DB file so snapshots and replicas carry it
+SUMMARY_TABLE = "document_summaries"
+
+# Overview contexts cached, client-chosen file scopes the count they never grow past
+CONTEXT_CACHE_SIZE = 256
+
+# Questions about a whole document, not a fact inside it
+_OVERVIEW = re.compile(
+    r"\b(summar(y|ies|ise|ize|ised|ized)|overview|tl;?dr|gist|synopsis|"
+    r"main (points?|ideas?|topics?|themes?)|key (points?|takeaways?|findings?)|"
+    r"what(?:'s| is| are) (?:this|that|the|these) (?:pdf|document|file|paper|report)s? about|"
+    r"what (?:does|do) (?:this|that|the|these) (?:pdf|document|file|paper|report)s? (?:cover|say|contain))\b",
+    re.IGNORECASE,
+)
+
+SECTION_PROMPT = """Summarize this section of the document "{filename}" in at most five sentences.
+Keep names, numbers and dates that matter. Answer with the summary only.
+
+Section: {title}
+
+{text}"""
+
+DOCUMENT_PROMPT = """Below are summaries of the sections of the document "{filename}", in order.
+Write an overview of the whole document in at most eight sentences: what it is,
+what it covers and its most important points. Answer with the overview only.
+
+{text}"""
+
+
+def is_overview_question(message: str) -> bool:
+    """
+    Overview-style question, answered from summaries it can be.
+    Args:
+        message: User's question
+    Returns:
+        True if the question asks what a document is about
+    """
+    return bool(_OVERVIEW.search(message))
+
+
+@dataclass
+class DocumentSummary:
+    """
+    Hierarchical summary of one document, per section then overall.
+    """
+
+    file_id: str
+    filename: str
+    summary: str
+    sections: list[tuple[str, str]] = field(default_factory=list)
+
+
+class SummaryStore:
+    """
+    Document summaries in their own SQLite table, one row per section and document.
+    Connection per call opened is, from worker threads it is used.
+    """
+
+    def __init__(
+        self,
+        db_file: str | Path = CONTENTS_DB_FILE,
+        read_only: bool = False,
+        cache_size: int = CONTEXT_CACHE_SIZE,
+    ):
+        """
+        Initialize summary store.
+        Args:
+            db_file: SQLite file holding the table
+            read_only: Replica mode, file opened read-only and table never created
+            cache_size: Overview contexts kept, least recently used evicted
+        """
+        self.db_file = Path(db_file)
+        self.read_only = read_only
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, tuple[tuple, str | None]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        if not read_only:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            self._execute(
+                f"CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} ("
+                "tenant TEXT NOT NULL, file_id TEXT NOT NULL, level TEXT NOT NULL, "
+                "position INTEGER NOT NULL, title TEXT, filename TEXT, summary TEXT NOT NULL, "
+                "created_at REAL NOT NULL, PRIMARY KEY (tenant, file_id, level, position))")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            return sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+        return sqlite3.connect(self.db_file)
+
+    def _execute(self, sql: str, params: tuple = (), insert: str | None = None, rows: list[tuple] = ()) -> int:
+        """
+        One write transaction, the statement then the rows inserted.
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                changed = connection.execute(sql, params).rowcount
+                if insert is not None:
+                    connection.executemany(insert, rows)
+                return changed
+        finally:
+            connection.close()
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        # Replicas, the table before the primary's first summary missing is
+        try:
+            connection = self._connect()
+        except sqlite3.OperationalError:
+            return []
+        try:
+            return connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return []
+            raise
+        finally:
+            connection.close()
+
+    def save(self, tenant: str, summary: DocumentSummary) -> None:
+        """
+        Store a document's summaries, earlier ones replaced.
+        Args:
+            tenant: Tenant owning the document
+            summary: Document and section summaries
+        """
+        now = time.time()
+        rows = [(tenant, summary.file_id, "document", 0, None, summary.filename, summary.summary, now)]
+        rows += [
+            (tenant, summary.file_id, "section", position, title, summary.filename, text, now)
+            for position, (title, text) in enumerate(summary.sections)
+        ]
+        self._execute(
+            f"DELETE FROM {SUMMARY_TABLE} WHERE tenant = ? AND file_id = ?", (tenant, summary.file_id),
+            insert=f"INSERT INTO {SUMMARY_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows=rows,
+        )
+
+    def delete(self, tenant: str, file_id: str) -> int:
+        """
+        Remove a document's summaries.
+        Args:
+            tenant: Tenant owning the document
+            file_id: Document id
+        Returns:
+            Rows removed
+        """
+        return self._execute(f"DELETE FROM {SUMMARY_TABLE} WHERE tenant = ? AND file_id = ?", (tenant, file_id))
+
+    def get(self, tenant: str, file_id: str) -> DocumentSummary | None:
+        """
+        Summaries of one document, None if not built yet.
+        Args:
+            tenant: Tenant owning the document
+            file_id: Document id
+        Returns:
+            Document summary with its sections
+        """
+        rows = self._query(
+            f"SELECT level, title, filename, summary FROM {SUMMARY_TABLE} "
+            "WHERE tenant = ? AND file_id = ? ORDER BY level, position", (tenant, file_id))
+        document = next((r for r in rows if r[0] == "document"), None)
+        if document is None:
+            return None
+        return DocumentSummary(
+            file_id=file_id,
+            filename=document[2],
+            summary=document[3],
+            sections=[(r[1], r[3]) for r in rows if r[0] == "section"],
+        )
+
+    def documents(self, tenant: str, file_ids: list[str] | None = None) -> list[DocumentSummary]:
+        """
+        Document-level summaries of a tenant, sections not loaded.
+        Args:
+            tenant: Tenant searched
+            file_ids: Documents wanted, all of the tenant's if None
+        Returns:
+            Summaries, oldest document first
+        """
+        sql = (f"SELECT file_id, filename, summary FROM {SUMMARY_TABLE} "
+               "WHERE tenant = ? AND level = 'document'")
+        params: tuple = (tenant,)
+        if file_ids is not None:
+            sql += f" AND file_id IN ({', '.join('?' for _ in file_ids)})"
+            params += tuple(file_ids)
+        rows = self._query(sql + " ORDER BY created_at", params)
+        return [DocumentSummary(file_id=r[0], filename=r[1], summary=r[2]) for r in rows]
+
+    def overview_context(
+        self,
+        tenant: str,
+        file_ids: list[str] | None,
+        max_chars: int,
+    ) -> str | None:
+        """
+        Prompt context for an overview question, cached until the summaries change.
+        One document, its sections included; several, one overview each.
+        Blocking SQLite reads, from a worker thread call it.
+        Args:
+            tenant: Tenant searched
+            file_ids: Documents in scope, all of the tenant's if None
+            max_chars: Context budget in characters
+        Returns:
+            Context text, None if no summaries in scope exist yet
+        """
+        key = (tenant, tuple(sorted(file_ids)) if file_ids is not None else None, max_chars)
+        stamp = tuple(self._query(
+            f"SELECT COUNT(*), MAX(created_at) FROM {SUMMARY_TABLE} WHERE tenant = ?", (tenant,)))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None and cached[0] == stamp:
+            get_metrics().increment("summaries.context_cache_hits")
+            return cached[1]
+
+        documents = self.documents(tenant, file_ids)
+        if not documents:
+            context = None
+        elif len(documents) == 1:
+            document = self.get(tenant, documents[0].file_id) or documents[0]
+            parts = [f"[Document: {document.filename}]\n{document.summary}"]
+            parts += [f"[Section: {title}]\n{text}" for title, text in document.sections]
+            context = _fit(parts, max_chars)
+        else:
+            context = _fit([f"[Document: {d.filename}]\n{d.summary}" for d in documents], max_chars)
+
+        with self._cache_lock:
+            self._cache[key] = (stamp, context)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return context
+
+
+def _fit(parts: list[str], max_chars: int) -> str:
+    """
+    Parts joined while the budget lasts, the first one always kept.
+    """
+    kept: list[str] = []
+    used = 0
+    for part in parts:
+        if kept and used + len(part) > max_chars:
+            break
+        kept.append(part[:max_chars])
+        used += len(part) + 2
+    return "\n\n".join(kept)
+
+
+def _sections(payloads: list[dict[str, Any]], section_chars: int) -> list[tuple[str, str]]:
+    """
+    Chunks in reading order grouped, by section title, long or untitled runs split by size.
+    """
+    def order(payload: dict[str, Any]) -> tuple:
+        meta_data = payload.get("meta_data") or {}
+        return meta_data.get("page") or 0, meta_data.get("chunk") or 0
+
+    groups: list[dict[str, Any]] = []
+    for payload in sorted(payloads, key=order):
+        meta_data = payload.get("meta_data") or {}
+        section = meta_data.get("section")
+        content = payload.get("content") or ""
+        if not groups or groups[-1]["section"] != section or groups[-1]["size"] + len(content) > section_chars:
+            groups.append({"section": section, "pages": [], "texts": [], "size": 0})
+        group = groups[-1]
+        group["pages"].append(meta_data.get("page"))
+        group["texts"].append(content)
+        group["size"] += len(content)
+
+    sections = []
+    for group in groups:
+        pages = [p for p in group["pages"] if p is not None]
+        title = group["section"]
+        if title is None:
+            title = f"Pages {pages[0]}-{pages[-1]}" if pages and pages[0] != pages[-1] else f"Page {pages[0] if pages else 1}"
+        sections.append((title, "\n".join(group["texts"])[:section_chars]))
+    return sections
+
+
+def summarize_document(
+    knowledge: Knowledge,
+    file_id: str,
+    summarize: Callable[[str], str],
+    section_chars: int,
+) -> DocumentSummary | None:
+    """
+    Hierarchical summary of one stored document, sections first then the whole.
+    Too many sections for one prompt, their summaries in rounds reduced they are.
+    Args:
+        knowledge: Knowledge base holding the document's chunks
+        file_id: Document id
+        summarize: Prompt in, summary text out
+        section_chars: Characters of text per summarize call
+    Returns:
+        Summary, None if the document has no stored chunks
+    """
+    payloads = list(knowledge.vector_db.file_rows(file_id).values())
+    if not payloads:
+        return None
+    filename = (payloads[0].get("meta_data") or {}).get("filename") or payloads[0].get("name") or file_id
+
+    sections = [
+        (title, summarize(SECTION_PROMPT.format(filename=filename, title=title, text=text)))
+        for title, text in _sections(payloads, section_chars)
+    ]
+
+    level = [f"{title}: {text}" for title, text in sections]
+    while sum(len(text) for text in level) > section_chars and len(level) > 1:
+        groups: list[list[str]] = [[]]
+        for text in level:
+            if groups[-1] and sum(len(t) for t in groups[-1]) + len(text) > section_chars:
+                groups.append([])
+            groups[-1].append(text)
+        if len(groups) == len(level):
+            # Nothing merged, the overview prompt truncates instead
+            break
+        level = [summarize(DOCUMENT_PROMPT.format(filename=filename, text="\n\n".join(g))) for g in groups]
+
+    overview = summarize(DOCUMENT_PROMPT.format(filename=filename, text="\n\n".join(level)[:section_chars]))
+    return DocumentSummary(file_id=file_id, filename=filename, summary=overview, sections=sections)
+
+
+def llm_summarize(prompt: str) -> str:
+    """
+    Summarize with the configured chat model.
+    Args:
+        prompt: Summarization prompt
+    Returns:
+        Summary text
+    """
+    model = ResilientOpenAIChat(id=settings.llm_model, api_key=settings.llm_api_key, max_retries=0)
+    response = model.response(messages=[Message(role="user", content=prompt)])
+    return (response.content or "").strip()
+
+
+class SummaryQueue:
+    """
+    Background summarization stage, after ingestion documents summarized are.
+    Upload requests never wait on it, bounded concurrency the LLM spares.
+    """
+
+    def __init__(
+        self,
+        store: SummaryStore,
+        summarize: Callable[[str], str],
+        concurrency: int,
+        section_chars: int,
+    ):
+        """
+        Initialize summary queue.
+        Args:
+            store: Summary table writer
+            summarize: Prompt in, summary text out
+            concurrency: Documents summarized at once
+            section_chars: Characters of text per summarize call
+        """
+        self.store = store
+        self.summarize = summarize
+        self.section_chars = section_chars
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._tasks: set[asyncio.Task] = set()
+
+    def schedule(self, file_id: str, tenant: str | None = None, knowledge: Knowledge | None = None) -> None:
+        """
+        Summarize a freshly ingested document, in the background.
+        Args:
+            file_id: Document id
+            tenant: Tenant owning the document, default tenant if None
+            knowledge: Knowledge base holding the chunks, the tenant's own if None
+        """
+        task = asyncio.get_running_loop().create_task(
+            self._build(file_id, normalize_tenant(tenant), knowledge))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        get_metrics().set_gauge("summaries.pending", len(self._tasks))
+
+    async def flush(self) -> None:
+        """
+        Wait for running summarizations, at shutdown and after bulk ingests.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _build(self, file_id: str, tenant: str, knowledge: Knowledge | None) -> None:
+        metrics = get_metrics()
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                summary = await asyncio.to_thread(
+                    summarize_document, knowledge or get_knowledge(tenant), file_id,
+                    self.summarize, self.section_chars)
+                if summary is None:
+                    logger.warning(f"No chunks stored for {file_id}, nothing summarized")
+                    return
+                await asyncio.to_thread(self.store.save, tenant, summary)
+                metrics.increment("summaries.built")
+                logger.info(f"Summarized {file_id}: {len(summary.sections)} sections")
+            except Exception as e:
+                metrics.increment("summaries.failures")
+                logger.warning(f"Summarizing {file_id} failed: {e}")
+            finally:
+                metrics.observe("summaries.build_seconds", time.perf_counter() - start)
+                metrics.set_gauge("summaries.pending", len(self._tasks) - 1)
+
+
+# Global summary store and queue, singleton pattern
+_store: SummaryStore | None = None
+_queue: SummaryQueue | None = None
+
+
+def get_summary_store() -> SummaryStore:
+    """
+    Get or create summary store.
+    Returns:
+        SummaryStore instance
+    """
+    global _store
+    if _store is None:
+        _store = SummaryStore(read_only=settings.role == "read_only")
+    return _store
+
+
+def get_summary_queue() -> SummaryQueue:
+    """
+    Get or create background summary queue.
+    Returns:
+        SummaryQueue instance
+    """
+    global _queue
+    if _queue is None:
+        _queue = SummaryQueue(
+            store=get_summary_store(),
+            summarize=llm_summarize,
+            concurrency=settings.summary_concurrency,
+            section_chars=settings.summary_section_chars,
+        )
+    return _queue
@@ -0,0 +1,171 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from agno.knowledge.knowledge import Knowledge
+
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+TENANT_HEADER = "X-Tenant-ID"
+
+# Tenant ids become table names, so conservative they must be
+_TENANT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Separator between base table name and tenant
+_TABLE_SEPARATOR = "__"
+
+
+def normalize_tenant(tenant: str | None) -> str:
+    """
+    Validate tenant id, default tenant for None or empty.
+    Args:
+        tenant: Tenant id from the request
+    Returns:
+        Tenant id
+    Raises:
+        ValueError: If characters outside letters, digits, - and _ it has
+    """
+    if not tenant:
+        return DEFAULT_TENANT
+    if not _TENANT_PATTERN.match(tenant):
+        raise ValueError(
+            f"Invalid tenant id '{tenant}', letters, digits, - and _ allowed, at most 64")
+    return tenant
+
+
+def tenant_table_name(base_table: str, tenant: str) -> str:
+    """
+    Table of a tenant, default tenant the base table keeps.
+    Args:
+        base_table: Shared table name
+        tenant: Tenant id
+    Returns:
+        Tenant's table name
+    """
+    if tenant == DEFAULT_TENANT:
+        return base_table
+    return f"{base_table}{_TABLE_SEPARATOR}{tenant}"
+
+
+def tenant_from_table_name(base_table: str, table_name: str) -> str | None:
+    """
+    Tenant owning a table, None if another table it is.
+    Args:
+        base_table: Shared table name
+        table_name: Table name found in LanceDB
+    Returns:
+        Tenant id or None
+    """
+    if table_name == base_table:
+        return DEFAULT_TENANT
+    prefix = f"{base_table}{_TABLE_SEPARATOR}"
+    if table_name.startswith(prefix) and _TENANT_PATTERN.match(table_name[len(prefix):]):
+        return table_name[len(prefix):]
+    return None
+
+
+class KnowledgeCache:
+    """
+    Bounded LRU of per-tenant Knowledge handles.
+    Least recently used evicted when full, idle handles on access swept out.
+    Evicted tenants, on next use reopened they are.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Knowledge],
+        max_size: int,
+        idle_seconds: float,
+    ):
+        """
+        Initialize cache.
+        Args:
+            factory: Opens Knowledge of a tenant
+            max_size: Open handles kept at most
+            idle_seconds: Handles unused this long evicted, 0 disables idle eviction
+        """
+        self.factory = factory
+        self.max_size = max(max_size, 1)
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[str, tuple[Knowledge, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tenant: str) -> Knowledge:
+        """
+        Knowledge of a tenant, opened if not cached.
+        Args:
+            tenant: Tenant id
+        Returns:
+            Knowledge instance
+        """
+        metrics = get_metrics()
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+
+            entry = self._entries.get(tenant)
+            if entry is not None:
+                self._entries[tenant] = (entry[0], now)
+                self._entries.move_to_end(tenant)
+                metrics.increment("tenants.cache_hits")
+                return entry[0]
+
+            knowledge = self.factory(tenant)
+            self._entries[tenant] = (knowledge, now)
+            metrics.increment("tenants.opened")
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                metrics.increment("tenants.evicted")
+                logger.info(f"Knowledge of tenant '{evicted}' evicted, cache full")
+            metrics.set_gauge("tenants.open", len(self._entries))
+            return knowledge
+
+    def peek(self, tenant: str) -> Knowledge | None:
+        """
+        Cached Knowledge of a tenant, recency untouched.
+        Args:
+            tenant: Tenant id
+        Returns:
+            Knowledge instance or None if not open
+        """
+        with self._lock:
+            entry = self._entries.get(tenant)
+            return entry[0] if entry else None
+
+    def evict_idle(self) -> int:
+        """
+        Evict idle handles now.
+        Returns:
+            Handles evicted
+        """
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def open_tenants(self) -> list[str]:
+        """
+        Tenants with an open handle, least recently used first.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_idle(self, now: float) -> int:
+        if self.idle_seconds <= 0:
+            return 0
+        idle = [t for t, (_, used) in self._entries.items() if now - used > self.idle_seconds]
+        for tenant in idle:
+            del self._entries[tenant]
+            logger.info(f"Knowledge of tenant '{tenant}' evicted, idle")
+        if idle:
+            metrics = get_metrics()
+            metrics.increment("tenants.evicted", len(idle))
+            metrics.set_gauge("tenants.open", len(self._entries))
+        return len(idle)
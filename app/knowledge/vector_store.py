@@ -0,0 +1,851 @@
+import json
+import logging
+import time
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from agno.knowledge.document import Document
+from agno.vectordb.lancedb import LanceDb
+from agno.vectordb.search import SearchType
+
+logger = logging.getLogger(__name__)
+
+VECTOR_PRECISIONS = ("float32", "float16", "int8")
+
+# Full-precision copy, read only for rescoring candidates it is
+FULL_VECTOR_COLUMN = "vector_full"
+# Candidates per result rescored, tables already keeping full vectors use it
+DEFAULT_RESCORE_FACTOR = 4
+# Per-row int8 scale, codes back to floats it turns
+SCALE_COLUMN = "vector_scale"
+# Metadata promoted to scalar columns, prefiltered inside LanceDB they are
+FILTER_COLUMNS = ("file_id", "filename", "type", "document_key")
+# Scalar index, document-scoped searches few rows it lets read
+INDEXED_FILTER_COLUMN = "file_id"
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    """
+    Normalize vector to unit length, cosine becomes dot product.
+    Args:
+        vector: Vector or matrix of row vectors
+    Returns:
+        Unit length vector(s)
+    """
+    norms = np.linalg.norm(vector, axis=-1, keepdims=True)
+    return vector / np.where(norms == 0, 1.0, norms)
+
+
+def reduce_dimensions(vector: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    Truncate and renormalize, as text-embedding-3 does for `dimensions`.
+    Args:
+        vector: Vector or matrix of row vectors
+        dimensions: Target dimensions
+    Returns:
+        Reduced unit length vector(s)
+    """
+    return normalize(vector[..., :dimensions].astype(np.float32))
+
+
+def quantize_int8(vector: np.ndarray) -> tuple[np.ndarray, float]:
+    """
+    Symmetric scalar quantization, into int8 codes a unit vector goes.
+    Args:
+        vector: Unit length float vector
+    Returns:
+        int8 codes and scale, codes * scale the vector approximates
+    """
+    peak = float(np.max(np.abs(vector))) or 1.0
+    scale = peak / 127.0
+    codes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def _sql_literal(value: Any) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_where(filters: dict[str, Any] | None, columns: tuple[str, ...]) -> tuple[str | None, dict[str, Any]]:
+    """
+    Split metadata filters, into a SQL prefilter and a post-filter remainder.
+    Args:
+        filters: Metadata filters, a value or list of values per key
+        columns: Filter columns the table has
+    Returns:
+        SQL predicate or None, and filters left for post-filtering
+    """
+    clauses: list[str] = []
+    remaining: dict[str, Any] = {}
+    for key, value in (filters or {}).items():
+        if key not in columns:
+            remaining[key] = value
+        elif isinstance(value, (list, tuple, set)):
+            values = list(value)
+            # Empty list, nothing can match
+            clauses.append(f"{key} IN ({', '.join(_sql_literal(v) for v in values)})" if values else "false")
+        else:
+            clauses.append(f"{key} = {_sql_literal(value)}")
+    return (" AND ".join(clauses) or None), remaining
+
+
+def matches_filters(meta_data: dict[str, Any] | None, filters: dict[str, Any]) -> bool:
+    """
+    Post-filter check, list values any-of they mean.
+    Args:
+        meta_data: Document metadata
+        filters: Remaining metadata filters
+    Returns:
+        True if all filters match
+    """
+    meta_data = meta_data or {}
+    for key, value in filters.items():
+        if key not in meta_data:
+            return False
+        if isinstance(value, (list, tuple, set)):
+            if meta_data[key] not in value:
+                return False
+        elif meta_data[key] != value:
+            return False
+    return True
+
+
+def table_size_bytes(uri: str | Path, table_name: str) -> int:
+    """
+    On-disk size of a LanceDB table, data, indexes and versions included.
+    Args:
+        uri: LanceDB directory
+        table_name: Table name
+    Returns:
+        Size in bytes
+    """
+    table_dir = Path(uri) / f"{table_name}.lance"
+    if not table_dir.exists():
+        return 0
+    return sum(f.stat().st_size for f in table_dir.rglob("*") if f.is_file())
+
+
+class PdfLanceDb(LanceDb):
+    """
+    LanceDB vector store, with configurable storage precision.
+    float32 stores as Agno does, float16 halves the vector column,
+    int8 scalar quantization quarters it. int8 codes LanceDB cannot search,
+    a brute-force scan of every matching row each query costs.
+    Rescoring a full float32 copy per row stores, bigger than float32 alone
+    the table then is; only for recall, never for size, enable it.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        precision: str = "float32",
+        rescore_factor: int = 0,
+        read_only: bool = False,
+        result_cache: Any = None,
+        check_dimensions: bool = True,
+        **kwargs: Any,
+    ):
+        """
+        Initialize vector store.
+        Args:
+            precision: Storage precision, float32, float16 or int8
+            rescore_factor: Candidates per result rescored at full precision, 0 disables rescoring
+            read_only: Replica mode, never written or created the table is, refresh swaps versions in
+            result_cache: Search result cache, keyed by table version, None disables caching
+            check_dimensions: Stored vectors of other dimensions than the embedder's rejected,
+                only re-encoding opens such a table
+        Raises:
+            ValueError: Stored dimensions differ from the embedder's, check_dimensions set
+        """
+        if precision not in VECTOR_PRECISIONS:
+            raise ValueError(
+                f"Unknown vector precision '{precision}', one of {VECTOR_PRECISIONS} expected")
+
+        # Set before super init, table creation needs them
+        self.precision = precision
+        self.rescore_factor = rescore_factor
+        self.read_only = read_only
+        self.result_cache = result_cache
+        self.check_dimensions = check_dimensions
+        self._configured_precision = precision
+        self._configured_rescore_factor = rescore_factor
+        super().__init__(*args, **kwargs)
+        self._adopt_table_layout()
+
+    def _adopt_table_layout(self) -> None:
+        """
+        Precision and filter columns from the table taken, configured ones overridden.
+        """
+        self.precision = self._configured_precision
+        self.rescore_factor = self._configured_rescore_factor
+
+        stored_dimensions = self._stored_dimensions()
+        if self.check_dimensions and stored_dimensions not in (None, self.dimensions):
+            raise ValueError(
+                f"Table '{self.table_name}' stores {stored_dimensions}-dimensional vectors, "
+                f"embedder produces {self.dimensions}. Set embedding_dimensions={stored_dimensions} "
+                f"or run run_migrate_embeddings.py to re-encode it.")
+
+        # Existing table wins, until migrated it is
+        stored = self._stored_precision()
+        if stored is not None and stored != self.precision:
+            logger.warning(
+                f"Table '{self.table_name}' stored as {stored}, {self.precision} configured. "
+                f"Run run_migrate_embeddings.py to re-encode it, {stored} used until then.")
+            self.precision = stored
+        if stored not in (None, "float32"):
+            if FULL_VECTOR_COLUMN not in self.table.schema.names:
+                self.rescore_factor = 0
+            elif self.rescore_factor <= 0:
+                # Full vectors in the table, new rows them too must carry
+                self.rescore_factor = DEFAULT_RESCORE_FACTOR
+        self._init_filter_columns()
+
+    def _init_filter_columns(self) -> None:
+        """
+        Filter columns the table has detect, scalar index ensure.
+        """
+        names = self.table.schema.names if self.table is not None else []
+        self.filter_columns = tuple(c for c in FILTER_COLUMNS if c in names)
+        if self.table is None:
+            return
+        if not self.filter_columns:
+            logger.warning(
+                f"Table '{self.table_name}' has no filter columns, filters post-filtered they are. "
+                f"Run run_migrate_embeddings.py to add them.")
+            return
+        if self.read_only:
+            return
+        if INDEXED_FILTER_COLUMN in self.filter_columns and not any(
+                INDEXED_FILTER_COLUMN in index.columns for index in self.table.list_indices()):
+            self.table.create_scalar_index(INDEXED_FILTER_COLUMN)
+            logger.info(f"Scalar index on '{INDEXED_FILTER_COLUMN}' created for '{self.table_name}'")
+
+    def _init_table(self):
+        # Replicas never create the table, the primary node does
+        if self.read_only:
+            logger.info(f"Table '{self.table_name}' not found, read-only replica waits for it")
+            return None
+        return super()._init_table()
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"Table '{self.table_name}' opened read-only")
+
+    @property
+    def version(self) -> int:
+        """
+        Table version searches currently read, 0 if no table yet.
+        """
+        return self.table.version if self.table is not None else 0
+
+    def refresh(self) -> bool:
+        """
+        Newest table version swapped in, if newer than the one served.
+        The new handle fully opened is before the swap, in-flight
+        searches the old handle keep using.
+        Returns:
+            True if a newer version swapped in was
+        """
+        if self.table_name not in self.connection.table_names():
+            return False
+        latest = self.connection.open_table(self.table_name)
+        if self.table is not None and latest.version <= self.table.version:
+            return False
+
+        previous = self.version
+        latest.count_rows()
+        self.table = latest
+        self._adopt_table_layout()
+        logger.info(f"Table '{self.table_name}' refreshed, version {previous} -> {latest.version}")
+        return True
+
+    @property
+    def keeps_full_vectors(self) -> bool:
+        """
+        Full-precision copy kept, only quantized tables with rescoring need it.
+        """
+        return self.precision != "float32" and self.rescore_factor > 0
+
+    def _stored_dimensions(self) -> int | None:
+        if self.table is None:
+            return None
+        return self.table.schema.field(self._vector_col).type.list_size
+
+    def _stored_precision(self) -> str | None:
+        if self.table is None:
+            return None
+        value_type = self.table.schema.field(self._vector_col).type.value_type
+        if value_type == pa.int8():
+            return "int8"
+        if value_type == pa.float16():
+            return "float16"
+        return "float32"
+
+    def _base_schema(self) -> pa.Schema:
+        value_type = {"float32": pa.float32(), "float16": pa.float16(), "int8": pa.int8()}[self.precision]
+        fields = [
+            pa.field(self._vector_col, pa.list_(value_type, self.dimensions)),
+            pa.field(self._id, pa.string()),
+            pa.field("payload", pa.string()),
+            *(pa.field(column, pa.string()) for column in FILTER_COLUMNS),
+        ]
+        if self.precision == "int8":
+            fields.append(pa.field(SCALE_COLUMN, pa.float32()))
+        if self.keeps_full_vectors:
+            fields.append(pa.field(FULL_VECTOR_COLUMN, pa.list_(pa.float32(), self.dimensions)))
+        return pa.schema(fields)
+
+    def encode_vector(self, embedding: list[float] | np.ndarray) -> dict[str, Any]:
+        """
+        Encode embedding into vector columns, configured precision used.
+        Args:
+            embedding: Full-precision embedding
+        Returns:
+            Column values for one row
+        """
+        vector = np.asarray(self._prepare_vector(embedding), dtype=np.float32)
+        if self.precision == "float32":
+            return {self._vector_col: vector.tolist()}
+
+        vector = normalize(vector)
+        if self.precision == "float16":
+            columns = {self._vector_col: vector.astype(np.float16)}
+        else:
+            codes, scale = quantize_int8(vector)
+            columns = {self._vector_col: codes, SCALE_COLUMN: scale}
+
+        if self.keeps_full_vectors:
+            columns[FULL_VECTOR_COLUMN] = vector
+        return columns
+
+    def build_row(self, document: Document, content_hash: str) -> dict[str, Any]:
+        """
+        Build table row for a document, embedding it if needed.
+        Args:
+            document: Document to store
+            content_hash: Hash of the content the document belongs to
+        Returns:
+            Row ready for table.add
+        """
+        if document.embedding is None or (isinstance(document.embedding, list) and len(document.embedding) == 0):
+            document.embed(embedder=self.embedder)
+        cleaned_content = document.content.replace("\x00", "\ufffd")
+        base_id = document.id or md5(cleaned_content.encode()).hexdigest()
+        return {
+            self._id: self.row_id(base_id, content_hash),
+            "payload": self.build_payload(document, content_hash),
+            **self.filter_values(document.meta_data),
+            **self.encode_vector(document.embedding),
+        }
+
+    def filter_values(self, meta_data: dict[str, Any] | None) -> dict[str, str | None]:
+        """
+        Filter column values, from document metadata taken.
+        Args:
+            meta_data: Document metadata
+        Returns:
+            Value per filter column the table has
+        """
+        meta_data = meta_data or {}
+        return {
+            column: None if meta_data.get(column) is None else str(meta_data[column])
+            for column in self.filter_columns
+        }
+
+    @staticmethod
+    def row_id(base_id: str, content_hash: str) -> str:
+        """
+        Row id for a document, as Agno derives it.
+        Args:
+            base_id: Document id
+            content_hash: Hash of the content the document belongs to
+        Returns:
+            Row id
+        """
+        return md5(f"{base_id}_{content_hash}".encode()).hexdigest()
+
+    @staticmethod
+    def build_payload(document: Document, content_hash: str) -> str:
+        """
+        Payload JSON for a document, as Agno stores it.
+        Args:
+            document: Document to store
+            content_hash: Hash of the content the document belongs to
+        Returns:
+            Payload JSON string
+        """
+        return json.dumps({
+            "name": document.name,
+            "meta_data": document.meta_data,
+            "content": document.content.replace("\x00", "\ufffd"),
+            "usage": document.usage,
+            "content_id": document.content_id,
+            "content_hash": content_hash,
+        })
+
+    def insert(self, content_hash: str, documents: list[Document], filters: dict[str, Any] | None = None) -> None:
+        """
+        Insert documents, vectors at configured precision encoded.
+        Args:
+            content_hash: Hash of the content the documents belong to
+            documents: Documents to insert
+            filters: Metadata added to every document
+        """
+        self._check_writable()
+        if not documents:
+            logger.info("No documents to insert")
+            return
+
+        for document in documents:
+            if filters:
+                document.meta_data = {**(document.meta_data or {}), **filters}
+        data = [self.build_row(document, content_hash) for document in documents]
+
+        if self.table is None:
+            logger.error("Table not initialized. Please create the table first")
+            return
+
+        self.add_rows(data)
+        logger.debug(f"Inserted {len(data)} documents as {self.precision}")
+
+    def content_rows(self, content_id: str) -> dict[str, dict[str, Any]]:
+        """
+        Stored rows of one versioned content, vectors not read.
+        Its file_id its content id is, so only rows the indexed column matches read they are;
+        tables without filter columns, fully scanned they still are.
+        Args:
+            content_id: Content whose rows we want
+        Returns:
+            Parsed payloads by row id
+        """
+        return self._scan_payloads(
+            content_id,
+            lambda payload: payload.get("content_id") == content_id,
+            where=self._file_where(content_id),
+        )
+
+    def file_rows(self, file_id: str) -> dict[str, dict[str, Any]]:
+        """
+        Stored rows of one uploaded file, by file_id metadata or content id matched.
+        Rows the indexed file_id column matches read first; none found, rows
+        stored without file_id metadata by a full scan still found are.
+        Args:
+            file_id: Upload or versioned document id
+        Returns:
+            Parsed payloads by row id
+        """
+        def match(payload: dict[str, Any]) -> bool:
+            return (payload.get("content_id") == file_id
+                    or (payload.get("meta_data") or {}).get("file_id") == file_id)
+
+        where = self._file_where(file_id)
+        rows = self._scan_payloads(file_id, match, where=where)
+        if not rows and where is not None:
+            rows = self._scan_payloads(file_id, match)
+        return rows
+
+    def _file_where(self, file_id: str) -> str | None:
+        """
+        Prefilter on the indexed file_id column, None for tables without it.
+        """
+        if INDEXED_FILTER_COLUMN not in self.filter_columns:
+            return None
+        return build_where({INDEXED_FILTER_COLUMN: file_id}, (INDEXED_FILTER_COLUMN,))[0]
+
+    def _scan_payloads(
+        self,
+        needle: str,
+        match: Callable[[dict[str, Any]], bool],
+        where: str | None = None,
+        batch_size: int = 1000,
+    ) -> dict[str, dict[str, Any]]:
+        rows: dict[str, dict[str, Any]] = {}
+        if self.table is None or self.table.count_rows() == 0:
+            return rows
+
+        scan = self.table.search().select([self._id, "payload"])
+        if where:
+            scan = scan.where(where)
+        scan = scan.limit(None)
+        for batch in scan.to_batches(batch_size):
+            for row_id, raw in zip(batch.column(self._id).to_pylist(), batch.column("payload").to_pylist()):
+                # Cheap substring test first, most rows other contents they are
+                if needle not in raw:
+                    continue
+                payload = json.loads(raw)
+                if match(payload):
+                    rows[row_id] = payload
+        return rows
+
+    def delete_rows(self, row_ids: list[str], batch_size: int = 500) -> int:
+        """
+        Delete rows by id, few table versions it creates.
+        Args:
+            row_ids: Rows to delete
+            batch_size: Ids per delete predicate
+        Returns:
+            Number of ids deleted
+        """
+        self._check_writable()
+        for start in range(0, len(row_ids), batch_size):
+            ids = ", ".join(f"'{row_id}'" for row_id in row_ids[start:start + batch_size])
+            self.table.delete(f"{self._id} IN ({ids})")
+        return len(row_ids)
+
+    def delete_files(self, file_ids: list[str]) -> int:
+        """
+        Delete every row of some files, one predicate on the file_id column.
+        Args:
+            file_ids: File ids whose rows go
+        Returns:
+            Number of rows deleted
+        """
+        self._check_writable()
+        if not file_ids or self.table is None:
+            return 0
+        if INDEXED_FILTER_COLUMN in self.filter_columns:
+            where, _ = build_where({INDEXED_FILTER_COLUMN: file_ids}, (INDEXED_FILTER_COLUMN,))
+            rows = self.table.count_rows(where)
+            if rows:
+                self.table.delete(where)
+            return rows
+        # Tables without filter columns, payloads scanned they are
+        return sum(self.delete_rows(list(self.file_rows(file_id))) for file_id in file_ids)
+
+    def add_rows(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Append prepared rows, one table version for all of them.
+        Args:
+            rows: Rows from build_row
+        """
+        self._check_writable()
+        if not rows:
+            return
+        if self.on_bad_vectors is not None:
+            self.table.add(rows, on_bad_vectors=self.on_bad_vectors, fill_value=self.fill_value)
+        else:
+            self.table.add(rows)
+
+    def update_payloads(self, payloads: dict[str, str]) -> int:
+        """
+        Rewrite payloads of existing rows, vectors untouched they stay.
+        Args:
+            payloads: Payload JSON by row id
+        Returns:
+            Number of rows updated
+        """
+        self._check_writable()
+        if not payloads:
+            return 0
+        columns: dict[str, list[Any]] = {
+            self._id: list(payloads.keys()),
+            "payload": list(payloads.values()),
+        }
+        # Filter columns follow the payload, stale they must not become
+        values = [self.filter_values(json.loads(p).get("meta_data")) for p in payloads.values()]
+        for column in self.filter_columns:
+            columns[column] = [v[column] for v in values]
+        updates = pa.table(columns)
+        self.table.merge_insert(self._id).when_matched_update_all().execute(updates)
+        return len(payloads)
+
+    def search(self, query: str, limit: int = 5, filters: Any = None) -> list[Document]:
+        """
+        Search documents, filters on filter columns as a LanceDB prefilter pushed down.
+        Other keys, as Agno does, on the results post-filtered they are.
+        Args:
+            query: Query text
+            limit: Results wanted
+            filters: Metadata filters, a value or list of values per key
+        Returns:
+            Matching documents
+        """
+        if self.search_type != SearchType.vector or isinstance(filters, list):
+            return super().search(query=query, limit=limit, filters=filters)
+
+        results, _, _ = self.ranked_search(query, limit, filters)
+        if results is None:
+            return []
+
+        documents = self._build_search_results(results)
+        if self.reranker and documents:
+            documents = self.reranker.rerank(query=query, documents=documents)
+        return documents
+
+    def ranked_search(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: dict[str, Any] | None = None,
+        deadline: Any = None,
+    ) -> tuple[pd.DataFrame | None, dict[str, float], int]:
+        """
+        Stages of `search`, each one timed, ranked rows with their distances kept.
+        One table handle the whole search reads, so the version returned the rows' own is,
+        whatever other requests on the shared handle swap in meanwhile.
+        Args:
+            query: Query text
+            limit: Results wanted
+            filters: Metadata filters, a value or list of values per key
+            deadline: Request deadline, embedding and search stages entered on it
+        Returns:
+            Rows ordered by distance or None, milliseconds per stage, and the table version searched
+        Raises:
+            StageTimeout: Embedding over its budget, the search not started
+        """
+        timings: dict[str, float] = {}
+        if self.connection and not self.read_only:
+            # Own handle searched, writes through the shared one never move it mid-search
+            table = self.connection.open_table(name=self.table_name)
+            if self.table is None or self.table.version < table.version:
+                # Other processes' writes, the shared handle catches up with
+                self.table = self.connection.open_table(name=self.table_name)
+        else:
+            # Replicas serve the refreshed handle, swapped whole by refresh, never written
+            table = self.table
+        if table is None:
+            return None, timings, 0
+        version = table.version
+
+        where, remaining = build_where(filters, self.filter_columns)
+        if deadline is not None:
+            deadline.enter("embedding")
+        start = time.perf_counter()
+        embedding = self.embedder.get_embedding(query)
+        timings["embed_ms"] = (time.perf_counter() - start) * 1000
+        if deadline is not None:
+            deadline.check()
+        if embedding is None:
+            logger.error(f"Error getting embedding for Query: {query}")
+            return None, timings, version
+
+        # Same vector, k and filters on an unchanged table, a dictionary lookup it costs
+        key = None
+        if self.result_cache is not None:
+            start = time.perf_counter()
+            key = self.result_cache.key(self.table_name, version, embedding, limit, where, remaining)
+            cached = self.result_cache.get(key)
+            timings["cache_ms"] = (time.perf_counter() - start) * 1000
+            if cached is not None:
+                return cached, timings, version
+
+        if deadline is not None:
+            deadline.enter("search")
+        start = time.perf_counter()
+        results = self.search_by_vector(embedding, limit, where=where, table=table)
+        timings["search_ms"] = (time.perf_counter() - start) * 1000
+        if results is None:
+            return None, timings, version
+
+        if remaining and not results.empty:
+            start = time.perf_counter()
+            keep = [matches_filters(json.loads(payload).get("meta_data"), remaining)
+                    for payload in results["payload"]]
+            results = results[keep].reset_index(drop=True)
+            timings["filter_ms"] = (time.perf_counter() - start) * 1000
+
+        if key is not None:
+            self.result_cache.put(key, results)
+        return results, timings, version
+
+    def similarity(self, distance: float) -> float:
+        """
+        Cosine similarity of a search distance, unit embeddings assumed.
+        Rescored and int8 rows 1 - cosine carry, LanceDB's own search squared L2.
+        Args:
+            distance: `_distance` of a ranked row
+        Returns:
+            Similarity, 1.0 for an identical vector
+        """
+        if self.precision == "int8" or self.keeps_full_vectors:
+            return 1.0 - distance
+        return 1.0 - distance / 2.0
+
+    def vector_search(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Any = None,
+        where: str | None = None,
+    ) -> pd.DataFrame | None:
+        query_embedding = self.embedder.get_embedding(query)
+        if query_embedding is None:
+            logger.error(f"Error getting embedding for Query: {query}")
+            return None
+        return self.search_by_vector(query_embedding, limit, where=where)
+
+    def search_by_vector(
+        self,
+        embedding: list[float] | np.ndarray,
+        limit: int = 5,
+        where: str | None = None,
+        table: Any = None,
+    ) -> pd.DataFrame | None:
+        """
+        Search by query vector, quantized candidates at full precision rescored.
+        Args:
+            embedding: Full-precision query embedding
+            limit: Results wanted
+            where: SQL prefilter on filter columns, applied before the vector search
+            table: Table handle searched, the current one if None
+        Returns:
+            Rows ordered by distance, `_distance` column included
+        """
+        table = table if table is not None else self.table
+        if table is None:
+            logger.error("Table not initialized. Please create the table first")
+            return None
+
+        query = np.asarray(self._prepare_vector(embedding), dtype=np.float32)
+        if self.precision == "float32":
+            results = table.search(query=query, vector_column_name=self._vector_col).limit(limit)
+            if where:
+                results = results.where(where, prefilter=True)
+            if self.nprobes:
+                results.nprobes(self.nprobes)
+            return results.to_pandas()
+
+        query = normalize(query)
+        fetch = limit * max(self.rescore_factor, 1)
+        if self.precision == "float16":
+            results = table.search(query=query, vector_column_name=self._vector_col).limit(fetch)
+            if where:
+                results = results.where(where, prefilter=True)
+            candidates = results.to_pandas()
+        else:
+            candidates = self._scan_int8(table, query, fetch, where)
+
+        if candidates.empty:
+            return candidates
+        return self._rescore(candidates, query, limit)
+
+    def _scan_int8(self, table: Any, query: np.ndarray, fetch: int, where: str | None = None) -> pd.DataFrame:
+        """
+        Scan int8 codes, only the compact columns of matching rows read they are.
+        No index over int8 codes LanceDB builds, so every matching row each query
+        scanned is; slower than float32 search it is, a smaller table it buys.
+        """
+        ids: list[str] = []
+        scores: list[np.ndarray] = []
+        q_codes, q_scale = quantize_int8(query)
+        q_codes = q_codes.astype(np.int32)
+        scan = table.search().select([self._id, self._vector_col, SCALE_COLUMN])
+        if where:
+            scan = scan.where(where)
+        for batch in scan.limit(None).to_batches():
+            if batch.num_rows == 0:
+                continue
+            codes = np.asarray(batch.column(self._vector_col).flatten(), dtype=np.int8)
+            codes = codes.reshape(batch.num_rows, self.dimensions).astype(np.int32)
+            scale = np.asarray(batch.column(SCALE_COLUMN), dtype=np.float32)
+            scores.append((codes @ q_codes) * scale * q_scale)
+            ids.extend(batch.column(self._id).to_pylist())
+
+        if not ids:
+            return pd.DataFrame()
+
+        all_scores = np.concatenate(scores)
+        top = np.argsort(-all_scores)[:fetch]
+        selected = ", ".join(f"'{ids[i]}'" for i in top)
+        candidates = table.search().where(f"{self._id} IN ({selected})").limit(len(top)).to_pandas()
+        approx = {ids[i]: float(all_scores[i]) for i in top}
+        candidates["_distance"] = [1.0 - approx[row_id] for row_id in candidates[self._id]]
+        return candidates
+
+    def _rescore(self, candidates: pd.DataFrame, query: np.ndarray, limit: int) -> pd.DataFrame:
+        """
+        Rescore candidates exactly, full-precision vectors if kept they are.
+        """
+        if FULL_VECTOR_COLUMN in candidates.columns:
+            full = np.stack(candidates[FULL_VECTOR_COLUMN].to_numpy()).astype(np.float32)
+            candidates["_distance"] = 1.0 - full @ query
+            candidates[self._vector_col] = list(full)
+        return candidates.sort_values("_distance").head(limit).reset_index(drop=True)
+
+
+def _filter_strings(payload: str) -> list[str | None]:
+    meta_data = json.loads(payload).get("meta_data") or {}
+    return [None if meta_data.get(c) is None else str(meta_data[c]) for c in FILTER_COLUMNS]
+
+
+def reencode_table(
+    vector_db: PdfLanceDb,
+    precision: str,
+    rescore_factor: int,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Re-encode existing table, at the store's dimensions and given precision.
+    Full-precision source vectors truncated and renormalized are, no re-embedding needed.
+    Filter columns from payload metadata filled are, older tables gain them.
+    Encoded batches streamed into one overwrite they are, a single new table version
+    committed only once every row written is. Searches the old version meanwhile
+    keep reading, and a failure halfway the table untouched leaves.
+    Args:
+        vector_db: Store of the table, target dimensions its embedder carries
+        precision: Target storage precision
+        rescore_factor: Target rescore factor, 0 drops full-precision vectors
+        batch_size: Rows re-encoded per batch
+    Returns:
+        Rows re-encoded
+    """
+    if precision not in VECTOR_PRECISIONS:
+        raise ValueError(
+            f"Unknown vector precision '{precision}', one of {VECTOR_PRECISIONS} expected")
+
+    connection = vector_db.connection
+    source = connection.open_table(vector_db.table_name)
+    source_full = FULL_VECTOR_COLUMN if FULL_VECTOR_COLUMN in source.schema.names else None
+    source_type = source.schema.field(source_full or vector_db._vector_col).type
+    if source_type.value_type == pa.int8():
+        raise ValueError("int8 table without full-precision vectors cannot be re-encoded, re-ingest it you must")
+    source_dimensions = source_type.list_size
+    if vector_db.dimensions > source_dimensions:
+        raise ValueError(
+            f"Cannot grow vectors from {source_dimensions} to {vector_db.dimensions} dimensions, re-ingest you must")
+
+    vector_db.precision = vector_db._configured_precision = precision
+    vector_db.rescore_factor = vector_db._configured_rescore_factor = rescore_factor
+    schema = vector_db._base_schema()
+    columns = [vector_db._id, "payload", source_full or vector_db._vector_col]
+    rows = 0
+
+    def encoded_batches():
+        nonlocal rows
+        # Pinned source version read, the overwrite it never sees
+        for batch in source.search().select(columns).limit(None).to_batches(batch_size):
+            if batch.num_rows == 0:
+                continue
+            vectors = np.asarray(batch.column(columns[2]).flatten(), dtype=np.float32)
+            vectors = reduce_dimensions(vectors.reshape(batch.num_rows, source_dimensions), vector_db.dimensions)
+            ids = batch.column(vector_db._id).to_pylist()
+            payloads = batch.column("payload").to_pylist()
+            encoded = [
+                {
+                    vector_db._id: row_id,
+                    "payload": payload,
+                    **{c: v for c, v in zip(FILTER_COLUMNS, _filter_strings(payload))},
+                    **vector_db.encode_vector(vector),
+                }
+                for row_id, payload, vector in zip(ids, payloads, vectors)
+            ]
+            rows += batch.num_rows
+            yield from pa.Table.from_pylist(encoded, schema=schema).to_batches()
+
+    # One overwrite commit, old versions left for maintenance to prune
+    target = connection.create_table(
+        vector_db.table_name,
+        data=pa.RecordBatchReader.from_batches(schema, encoded_batches()),
+        schema=schema,
+        mode="overwrite",
+    )
+
+    vector_db.table = target
+    vector_db._init_filter_columns()
+    logger.info(f"Re-encoded {rows} rows of '{vector_db.table_name}' as {vector_db.precision}")
+    return rows
@@ -0,0 +1,287 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from agno.db.schemas.knowledge import KnowledgeRow
+from agno.knowledge.content import ContentStatus
+from agno.knowledge.document import Document
+from agno.knowledge.knowledge import Knowledge
+from agno.utils.string import generate_id
+
+from app.config import settings
+from app.knowledge.store import get_knowledge, get_pdf_reader, upload_dir
+from app.knowledge.tenants import DEFAULT_TENANT, normalize_tenant
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Re-uploads of one document, one at a time processed they are
+_document_locks: dict[str, threading.Lock] = {}
+_document_locks_guard = threading.Lock()
+
+
+@dataclass
+class IngestResult:
+    """
+    Outcome of one versioned ingest.
+    """
+
+    document_id: str
+    document_key: str
+    version: int
+    pages: int
+    pages_changed: int
+    chunks: int
+    embedded: int
+    reused: int
+    updated: int
+    deleted: int
+    seconds: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def content_hash(text: str) -> str:
+    """
+    Short stable hash of page or chunk text.
+    Args:
+        text: Text to hash, surrounding whitespace ignored
+    Returns:
+        16 hex character hash
+    """
+    return hashlib.sha256(text.strip().encode()).hexdigest()[:16]
+
+
+def document_id_for_key(document_key: str, tenant: str | None = None) -> str:
+    """
+    Stable document id, same for every version of a key.
+    Args:
+        document_key: Logical document key
+        tenant: Tenant owning the key, default tenant if None
+    Returns:
+        Deterministic UUID
+    """
+    tenant = normalize_tenant(tenant)
+    if tenant == DEFAULT_TENANT:
+        return generate_id(f"pdf:{document_key}")
+    return generate_id(f"pdf:{tenant}:{document_key}")
+
+
+def _lock_for(document_id: str) -> threading.Lock:
+    with _document_locks_guard:
+        return _document_locks.setdefault(document_id, threading.Lock())
+
+
+def read_pdf_pages(file_path: str | Path, filename: str) -> list[Document]:
+    """
+    Read PDF into unchunked pages.
+    Page number markers left out, so shifted pages the same hash keep.
+    Args:
+        file_path: PDF to read
+        filename: Document name
+    Returns:
+        One document per page, `page` metadata set
+    """
+    reader = get_pdf_reader()
+    reader.chunk = False
+    reader.page_start_numbering_format = ""
+    reader.page_end_numbering_format = ""
+    return reader.read(str(file_path), name=filename)
+
+
+def ingest_pdf_version(
+    file_path: str | Path,
+    filename: str,
+    document_key: str,
+    chunking: str | None = None,
+    tenant: str | None = None,
+) -> IngestResult:
+    """
+    Ingest new version of a logical document, only changes embedded.
+    Args:
+        file_path: PDF of the new version
+        filename: Uploaded file name
+        document_key: Logical document key, shared by all versions
+        chunking: Chunking strategy name, configured default if None
+        tenant: Tenant owning the document, default tenant if None
+    Returns:
+        Ingest outcome
+    """
+    pages = read_pdf_pages(file_path, filename)
+    return ingest_pages(
+        pages, filename, document_key, chunking,
+        upload_file=Path(file_path).name, tenant=tenant,
+    )
+
+
+def ingest_pages(
+    pages: list[Document],
+    filename: str,
+    document_key: str,
+    chunking: str | None = None,
+    knowledge: Knowledge | None = None,
+    upload_file: str | None = None,
+    tenant: str | None = None,
+) -> IngestResult:
+    """
+    Diff pages and chunks against the stored version, then apply it.
+    New chunks embedded, moved chunks their payload rewritten,
+    stale rows deleted. Unchanged chunks untouched they stay.
+    Args:
+        pages: Unchunked page documents of the new version
+        filename: Uploaded file name
+        document_key: Logical document key
+        chunking: Chunking strategy name, configured default if None
+        knowledge: Knowledge base, the tenant's one if None
+        upload_file: Saved upload in the tenant's uploads directory, previous version's file replaces
+        tenant: Tenant owning the document, default tenant if None
+    Returns:
+        Ingest outcome
+    """
+    start = time.perf_counter()
+    knowledge = knowledge or get_knowledge(tenant)
+    vector_db = knowledge.vector_db
+    contents_db = knowledge.contents_db
+    document_id = document_id_for_key(document_key, tenant)
+    strategy_name = chunking or settings.chunking_strategy
+
+    with _lock_for(document_id):
+        previous = contents_db.get_knowledge_content(document_id) if contents_db else None
+        previous_meta = (previous.metadata or {}) if previous else {}
+        previous_version = int(previous_meta.get("version", 0))
+
+        page_hashes = [content_hash(page.content) for page in pages]
+        old_page_hashes = set(previous_meta.get("page_hashes", []))
+        pages_changed = sum(1 for h in page_hashes if h not in old_page_hashes)
+
+        unchanged = (
+            previous is not None
+            and previous_meta.get("page_hashes") == page_hashes
+            and previous_meta.get("chunking") == strategy_name
+            and previous_meta.get("filename") == filename
+        )
+        if unchanged:
+            logger.info(f"Document '{document_key}' unchanged, version {previous_version} kept")
+            if upload_file and upload_file != previous_meta.get("upload_file"):
+                (upload_dir(tenant) / upload_file).unlink(missing_ok=True)
+            return IngestResult(
+                document_id=document_id, document_key=document_key, version=previous_version,
+                pages=len(pages), pages_changed=0, chunks=int(previous_meta.get("chunks", 0)),
+                embedded=0, reused=int(previous_meta.get("chunks", 0)), updated=0, deleted=0,
+                seconds=time.perf_counter() - start,
+            )
+
+        chunks = _chunk_pages(pages, strategy_name, filename, document_key, document_id)
+        stored = vector_db.content_rows(document_id)
+
+        to_embed: list[Document] = []
+        payloads: dict[str, str] = {}
+        wanted: set[str] = set()
+        for chunk in chunks:
+            row_id = vector_db.row_id(chunk.id, document_id)
+            wanted.add(row_id)
+            old = stored.get(row_id)
+            if old is None:
+                to_embed.append(chunk)
+            elif old.get("meta_data") != chunk.meta_data or old.get("name") != chunk.name:
+                payloads[row_id] = vector_db.build_payload(chunk, document_id)
+        stale = [row_id for row_id in stored if row_id not in wanted]
+
+        # New rows first, searchable the document stays throughout
+        vector_db.insert(content_hash=document_id, documents=to_embed)
+        updated = vector_db.update_payloads(payloads)
+        deleted = vector_db.delete_rows(stale)
+
+        version = previous_version + 1
+        if contents_db:
+            now = int(time.time())
+            contents_db.upsert_knowledge_content(knowledge_row=KnowledgeRow(
+                id=document_id,
+                name=filename,
+                description="",
+                metadata={
+                    "filename": filename,
+                    "file_id": document_id,
+                    "type": "pdf",
+                    "document_key": document_key,
+                    "version": version,
+                    "chunking": strategy_name,
+                    "chunks": len(chunks),
+                    "page_hashes": page_hashes,
+                    "upload_file": upload_file,
+                },
+                type=".pdf",
+                linked_to=knowledge.name or "",
+                status=ContentStatus.COMPLETED,
+                created_at=previous.created_at if previous else now,
+                updated_at=now,
+            ))
+
+        # Previous version's upload, no longer needed it is
+        previous_file = previous_meta.get("upload_file")
+        if previous_file and previous_file != upload_file:
+            (upload_dir(tenant) / previous_file).unlink(missing_ok=True)
+
+    result = IngestResult(
+        document_id=document_id,
+        document_key=document_key,
+        version=version,
+        pages=len(pages),
+        pages_changed=pages_changed,
+        chunks=len(chunks),
+        embedded=len(to_embed),
+        reused=len(chunks) - len(to_embed),
+        updated=updated,
+        deleted=deleted,
+        seconds=time.perf_counter() - start,
+    )
+
+    metrics = get_metrics()
+    metrics.increment("ingest.chunks_embedded", result.embedded)
+    metrics.increment("ingest.chunks_reused", result.reused)
+    metrics.increment("ingest.chunks_deleted", result.deleted)
+    metrics.observe("ingest.seconds", result.seconds)
+    logger.info(
+        f"Document '{document_key}' v{version}: {pages_changed}/{len(pages)} pages changed, "
+        f"{result.embedded} chunks embedded, {result.reused} reused, {deleted} deleted")
+    return result
+
+
+def _chunk_pages(
+    pages: list[Document],
+    strategy_name: str,
+    filename: str,
+    document_key: str,
+    document_id: str,
+) -> list[Document]:
+    """
+    Chunk pages, chunk ids from content hashes derived.
+    Identical text in the same document, by occurrence told apart.
+    """
+    strategy = get_pdf_reader(strategy_name).chunking_strategy
+    occurrences: dict[str, int] = {}
+    chunks: list[Document] = []
+    for page in pages:
+        for chunk in strategy.chunk(page):
+            chunk_hash = content_hash(chunk.content)
+            occurrence = occurrences.get(chunk_hash, 0)
+            occurrences[chunk_hash] = occurrence + 1
+
+            chunk.id = f"{chunk_hash}_{occurrence}"
+            chunk.name = filename
+            chunk.content_id = document_id
+            chunk.meta_data = {
+                **(chunk.meta_data or {}),
+                "filename": filename,
+                "file_id": document_id,
+                "type": "pdf",
+                "document_key": document_key,
+                "chunk_hash": chunk_hash,
+            }
+            chunks.append(chunk)
+    return chunks
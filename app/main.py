@@ -1,12 +1,26 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.chat_routes import router as chat_router
+from app.api.document_routes import router as document_router
 from app.api.file_upload_routes import router as upload_router
+from app.api.history_routes import router as history_router
+from app.api.metrics_routes import router as metrics_router
+from app.api.search_routes import router as search_router
+from app.api.snapshot_routes import router as snapshot_router
+from app.api.usage_routes import router as usage_router
 
+from app.agent.chat_agent import flush_memories
+from app.agent.usage import get_usage_recorder
 from app.config import settings
+from app.health import get_health_checker
+from app.knowledge.maintenance import get_maintenance_scheduler
+from app.knowledge.replica import get_replica_refresher
+from app.knowledge.summaries import get_summary_queue
 
 # Logging configuration
 logging.basicConfig(
@@ -15,11 +29,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Background jobs with the app start, and with it stop they do.
+    Replicas poll for new versions, the primary maintains the tables.
+    """
+    if settings.role == "read_only":
+        job = get_replica_refresher()
+    else:
+        job = get_maintenance_scheduler()
+    job.start()
+    yield
+    await job.stop()
+    # Summaries of just ingested documents, before exit stored
+    await get_summary_queue().flush()
+    # Partial memory batches, before exit extracted
+    await flush_memories()
+    # Buffered usage, before exit written
+    await get_usage_recorder().flush()
+
+
 # App initialization
 app = FastAPI(
     title="RAG Chatbot API",
     description="A chatbot with RAG capabilities, wise and helpful it is.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Cors Middleware support
@@ -33,7 +70,15 @@ app.add_middleware(
 
 # Mount routes
 app.include_router(chat_router)
-app.include_router(upload_router)
+app.include_router(history_router)
+app.include_router(metrics_router)
+app.include_router(search_router)
+app.include_router(snapshot_router)
+app.include_router(usage_router)
+# Writes only on the primary, replicas these routes never expose
+if settings.role != "read_only":
+    app.include_router(upload_router)
+    app.include_router(document_router)
 
 
 @app.get("/")
@@ -60,4 +105,18 @@ async def health_check():
         "status": "healthy",
         "llm_model": settings.llm_model,
         "max_upload_size_mb": settings.max_upload_size_mb,
+        "role": settings.role,
     }
+
+
+@app.get("/health/details")
+async def health_details():
+    """
+    Deep health check, every dependency probed with a timeout.
+    LanceDB searched, both SQLite DBs counted, embedder and model called.
+    Returns:
+        Per-dependency status, latency, row counts and versions, 503 if any failed
+    """
+    report = await get_health_checker().check()
+    status_code = 200 if report["status"] == "healthy" else 503
+    return JSONResponse(report, status_code=status_code)
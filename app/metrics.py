@@ -0,0 +1,114 @@
+import threading
+
+
+class _Summary:
+    """
+    Running statistics of one observed value, count, total, max and last it keeps.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.last = value
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "total": round(self.total, 4),
+            "avg": round(self.total / self.count, 4) if self.count else 0.0,
+            "max": round(self.max, 4),
+            "last": round(self.last, 4),
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process metrics, counters, gauges and summaries it holds.
+    Thread safe it is, from executors also record you may.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._summaries: dict[str, _Summary] = {}
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        """
+        Increase counter, by value given.
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set gauge, current value only it remembers.
+        Args:
+            name: Gauge name
+            value: Current value
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Observe value, into running summary it goes.
+        Args:
+            name: Summary name
+            value: Observed value
+        """
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = _Summary()
+            summary.observe(value)
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Snapshot of all metrics, for the metrics endpoint it is.
+        Returns:
+            Counters, gauges and summaries
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {
+                    name: summary.to_dict() for name, summary in self._summaries.items()
+                },
+            }
+
+    def reset(self) -> None:
+        """
+        Reset all metrics, clean slate for tests it gives.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+# Global metrics registry, singleton pattern
+_metrics: MetricsRegistry | None = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get metrics registry, singleton instance it ensures.
+    Returns:
+        MetricsRegistry instance
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry()
+    return _metrics
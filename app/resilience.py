@@ -0,0 +1,425 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, TypeVar
+
+import openai
+from agno.exceptions import ModelProviderError
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+from agno.models.openai import OpenAIChat
+
+from app.agent.usage import current_usage
+from app.config import settings
+from app.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status codes worth another try, server errors besides them
+TRANSIENT_STATUS = {408, 409, 429}
+
+# Hedged duplicates run here, callers' own threads never starved
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Error a retry may fix, timeouts, dropped connections, rate limits, 5xx.
+    Wrapped errors, by their cause judged they are.
+    Args:
+        error: Raised exception
+    Returns:
+        True if transient
+    """
+    while error is not None:
+        if isinstance(error, (openai.APIConnectionError, TimeoutError, ConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in TRANSIENT_STATUS or error.status_code >= 500
+        if error.__cause__ is None and isinstance(error, ModelProviderError):
+            return error.status_code in TRANSIENT_STATUS or error.status_code >= 500
+        error = error.__cause__
+    return False
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """
+    Full-jitter exponential backoff, retries of many clients spread out.
+    Args:
+        attempt: Retry number, 0 for the first
+        base_seconds: Ceiling of the first delay
+        max_seconds: Ceiling of any delay
+    Returns:
+        Seconds to sleep
+    """
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+
+class CircuitOpen(RuntimeError):
+    """
+    Upstream marked unhealthy, call refused without trying.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} unavailable, circuit open for another {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Consecutive transient failures counted, past the threshold calls fail fast.
+    After the reset time one trial call let through, its outcome the circuit closes or reopens.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize circuit breaker.
+        Args:
+            name: Upstream name, in metrics and errors
+            failure_threshold: Consecutive failures that open the circuit, 0 never opens it
+            reset_seconds: Seconds open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        closed, open or half_open.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> None:
+        """
+        Permission for one call.
+        Raises:
+            CircuitOpen: Circuit open, or its trial call still running
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.reset_seconds and not self._trial_running:
+                self._trial_running = True
+                return
+            get_metrics().increment(f"circuit.{self.name}.rejected")
+            raise CircuitOpen(self.name, max(self.reset_seconds - waited, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit of {self.name} closed")
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        get_metrics().set_gauge(f"circuit.{self.name}.open", 0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            reopen = self._trial_running
+            self._trial_running = False
+            if not reopen and (self.failure_threshold <= 0 or self.failures < self.failure_threshold):
+                return
+            self._opened_at = time.monotonic()
+        logger.warning(f"Circuit of {self.name} opened after {self.failures} failures")
+        get_metrics().increment(f"circuit.{self.name}.opened")
+        get_metrics().set_gauge(f"circuit.{self.name}.open", 1)
+
+
+class LatencyWindow:
+    """
+    Latencies of the last calls, for the hedging delay a quantile.
+    """
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Latency below which q of the recent calls finished.
+        Args:
+            q: Quantile, 0.95 for p95
+        Returns:
+            Seconds, None until enough calls were seen
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Resilience:
+    """
+    Retries with jitter, optional hedging and a circuit breaker, around one upstream.
+    Only idempotent calls through it should go.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        breaker: CircuitBreaker,
+        attempts: int,
+        base_delay: float,
+        max_delay: float,
+        hedge_quantile: float = 0.0,
+        hedge_min_delay: float = 0.0,
+        latencies: LatencyWindow | None = None,
+    ):
+        """
+        Initialize resilience policy.
+        Args:
+            name: Upstream name, in metrics
+            breaker: Circuit breaker of the upstream
+            attempts: Tries per call, 1 disables retries
+            base_delay: Ceiling of the first retry delay
+            max_delay: Ceiling of any retry delay
+            hedge_quantile: Latency quantile after which a duplicate is sent, 0 disables hedging
+            hedge_min_delay: Seconds waited at least before hedging
+            latencies: Recent call latencies, a new window if None
+        """
+        self.name = name
+        self.breaker = breaker
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = latencies or LatencyWindow()
+
+    def _retry_or_raise(self, error: Exception, attempt: int) -> None:
+        """
+        Failure recorded, then slept before the next try, or the error re-raised.
+        """
+        if not is_transient(error):
+            # Upstream answered, a bad request its health says nothing about
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+        get_metrics().increment(f"{self.name}.failures")
+        if attempt + 1 >= self.attempts:
+            raise error
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        get_metrics().increment(f"{self.name}.retries")
+        logger.warning(f"{self.name} call failed ({error}), retry {attempt + 1} in {delay:.2f}s")
+        time.sleep(delay)
+
+    def call(self, fn: Callable[[], T], hedge: bool = False) -> T:
+        """
+        Call with retries, hedged if asked and enough latencies seen.
+        Args:
+            fn: Idempotent call
+            hedge: Duplicate sent once the call is slower than the latency quantile
+        Returns:
+            Result of the first successful try
+        Raises:
+            CircuitOpen: Upstream unhealthy, nothing tried
+        """
+        for attempt in range(self.attempts):
+            self.breaker.allow()
+            try:
+                if not hedge:
+                    # Latencies only of hedgeable calls kept, slow batches the quantile never skew
+                    result = fn()
+                elif self.hedge_quantile > 0:
+                    result = self._hedged(fn)
+                else:
+                    result = self._timed(fn)
+            except Exception as e:
+                self._retry_or_raise(e, attempt)
+                continue
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+    def stream(self, fn: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """
+        Stream with retries until its first item, afterwards errors propagate.
+        Nothing yielded yet, a retry duplicates nothing.
+        Args:
+            fn: Starts the stream
+        Yields:
+            Items of the first stream that produced one
+        """
+        for attempt in range(self.attempts):
+            self.breaker.allow()
+            iterator = iter(fn())
+            try:
+                first = next(iterator)
+            except StopIteration:
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                self._retry_or_raise(e, attempt)
+                continue
+            self.breaker.record_success()
+            break
+
+        yield first
+        try:
+            yield from iterator
+        except Exception as e:
+            if is_transient(e):
+                self.breaker.record_failure()
+            raise
+
+    def _timed(self, fn: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = fn()
+        self.latencies.record(time.perf_counter() - start)
+        return result
+
+    def _hedged(self, fn: Callable[[], T]) -> T:
+        """
+        Call, and past the latency quantile a duplicate; first success wins.
+        """
+        threshold = self.latencies.quantile(self.hedge_quantile)
+        if threshold is None:
+            return self._timed(fn)
+
+        primary = _hedge_executor.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=max(threshold, self.hedge_min_delay))
+        if done:
+            return primary.result()
+
+        get_metrics().increment(f"{self.name}.hedges")
+        hedge = _hedge_executor.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        get_metrics().increment(f"{self.name}.hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+
+_resilience: dict[str, Resilience] = {}
+_resilience_lock = threading.Lock()
+
+
+def get_resilience(name: str) -> Resilience:
+    """
+    Get or create the resilience policy of an upstream, one breaker per name.
+    Args:
+        name: Upstream name, embedder or model
+    Returns:
+        Resilience instance
+    """
+    with _resilience_lock:
+        if name not in _resilience:
+            _resilience[name] = Resilience(
+                name=name,
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=settings.circuit_failure_threshold,
+                    reset_seconds=settings.circuit_reset_seconds,
+                ),
+                attempts=settings.upstream_retries + 1,
+                base_delay=settings.upstream_retry_base_seconds,
+                max_delay=settings.upstream_retry_max_seconds,
+                hedge_quantile=settings.embedding_hedge_quantile if name == "embedder" else 0.0,
+                hedge_min_delay=settings.embedding_hedge_min_seconds,
+            )
+        return _resilience[name]
+
+
+@dataclass
+class ResilientOpenAIEmbedder(OpenAIEmbedder):
+    """
+    OpenAI embedder whose API calls retried, hedged and circuit broken are.
+    Query embeddings one text per `response` call send, hedged they are;
+    batch embeddings, sync or async, a list per `response` call send, never hedged.
+    The async methods the sync client in a worker thread use, so no call
+    past the retries and the breaker goes.
+    """
+
+    resilience: Resilience | None = None
+
+    def response(self, text: str | list[str]) -> Any:
+        resilience = self.resilience or get_resilience("embedder")
+        # A duplicated batch too costly it is, single texts only hedged
+        response = resilience.call(
+            lambda: super(ResilientOpenAIEmbedder, self).response(text), hedge=isinstance(text, str))
+        # Query embeddings of a chat, charged to its session
+        meter = current_usage.get()
+        if meter is not None and response.usage is not None:
+            meter.add_embedding_tokens(response.usage.total_tokens)
+        return response
+
+    def get_embeddings_batch_and_usage(self, texts: list[str]) -> tuple[list[list[float]], list[dict | None]]:
+        """
+        Embed texts in batch_size requests, each retried and circuit broken.
+        Args:
+            texts: Texts to embed
+        Returns:
+            Embeddings, and per text the usage of its request
+        Raises:
+            CircuitOpen: Upstream unhealthy, nothing tried
+        """
+        embeddings: list[list[float]] = []
+        usages: list[dict | None] = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.response(texts[start:start + self.batch_size])
+            usage = response.usage.model_dump() if response.usage else None
+            embeddings.extend(data.embedding for data in response.data)
+            usages.extend([usage] * len(response.data))
+        return embeddings, usages
+
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: list[str]
+    ) -> tuple[list[list[float]], list[dict | None]]:
+        return await asyncio.to_thread(self.get_embeddings_batch_and_usage, texts)
+
+    async def async_get_embedding(self, text: str) -> list[float]:
+        return await asyncio.to_thread(self.get_embedding, text)
+
+    async def async_get_embedding_and_usage(self, text: str) -> tuple[list[float], dict | None]:
+        return await asyncio.to_thread(self.get_embedding_and_usage, text)
+
+
+@dataclass
+class ResilientOpenAIChat(OpenAIChat):
+    """
+    OpenAI chat model, retried until the first token and circuit broken.
+    Tokens already streamed, never replayed they are.
+    """
+
+    resilience: Resilience | None = None
+
+    def _policy(self) -> Resilience:
+        return self.resilience or get_resilience("model")
+
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        return self._policy().call(lambda: super(ResilientOpenAIChat, self).invoke(*args, **kwargs))
+
+    def invoke_stream(self, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        yield from self._policy().stream(
+            lambda: super(ResilientOpenAIChat, self).invoke_stream(*args, **kwargs))
@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 import httpx
 
 from nicegui import ui
@@ -7,6 +10,14 @@ from app.config import settings
 # backend URL
 BACKEND_URL = settings.backend_url
 
+# Typing pause before a draft prefetched is, and shortest draft worth it
+PREFETCH_DEBOUNCE_SECONDS = 0.4
+PREFETCH_MIN_CHARS = 8
+
+# Messages kept as live elements, older ones from the history API refetched on scroll
+MAX_LIVE_MESSAGES = 50
+HISTORY_PAGE_TURNS = 10
+
 
 class ChatInterface:
     """Chat interface.
@@ -15,13 +26,23 @@ class ChatInterface:
 
     def __init__(self):
         """Initialize interface, UI components"""
+        # Live window, (element, turn) pairs, turn None for notices outside the session
         self.messages = []
         self.session_id = "nicegui_session_001"
+        self.scroll_area = None
         self.chat_container = None
+        # First turn above the window and below it, None when the window reaches that end
+        self.older_before = None
+        self.newer_from = None
+        self.total_turns = 0
+        self._loading = False
+        self._sending = False
         self.input_field = None
         self.status_label = None
         self.send_button = None
         self.upload_status = None
+        self.prefetch_token = None
+        self._prefetch_task = None
 
     def create_ui(self):
         """
@@ -56,16 +77,18 @@ class ChatInterface:
             with ui.card().classes('w-full flex-grow'):
                 ui.label('Chat').classes('text-lg font-semibold mb-2')
 
-                # Scrollable chat area
-                self.chat_container = ui.column().classes(
-                    'w-full h-96 overflow-y-auto p-2 bg-gray-50 rounded').props(f'id=chat_container')
-                self.chat_container.props(f'id={self.chat_container.id}')
+                # Scrollable chat area, only a window of messages live it keeps
+                self.scroll_area = ui.scroll_area(on_scroll=self.handle_scroll).classes(
+                    'w-full h-96 p-2 bg-gray-50 rounded')
+                with self.scroll_area:
+                    self.chat_container = ui.column().classes('w-full')
 
                 # Input area
                 with ui.row().classes('w-full gap-2 mt-4'):
                     self.input_field = ui.input(
                         label='Type your message...',
                         placeholder='Ask about the uploaded document...',
+                        on_change=self.schedule_prefetch,
                     ).classes('flex-grow').on('keydown.enter', self.send_message)
 
                     self.send_button = ui.button(
@@ -77,6 +100,9 @@ class ChatInterface:
             ui.label('Upload a PDF, then ask questions about it!').classes(
                 'text-sm text-gray-500 mt-2')
 
+        # Latest turns of the session, once the page is up
+        ui.timer(0.1, self.load_latest, once=True)
+
     async def handle_upload(self, event):
         """
         Handle PDF upload, async operation.
@@ -131,6 +157,36 @@ class ChatInterface:
             self.upload_status.set_text(f'Error: {str(e)}')
             self.set_status('Ready', 'ready')
 
+    def schedule_prefetch(self, event):
+        """
+        Debounce typing, the draft prefetched once the user pauses.
+        """
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+        text = (event.value or '').strip()
+        if len(text) >= PREFETCH_MIN_CHARS:
+            self._prefetch_task = asyncio.create_task(self.prefetch(text))
+
+    async def prefetch(self, text: str):
+        """
+        Retrieval of the draft, its token kept for the send request.
+        """
+        try:
+            await asyncio.sleep(PREFETCH_DEBOUNCE_SECONDS)
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.post(
+                    f'{BACKEND_URL}/api/chat/prefetch',
+                    json={'message': text},
+                )
+            if response.status_code == 200:
+                self.prefetch_token = response.json()['prefetch_token']
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Speculative only, the send request retrieves by itself
+            pass
+
     async def send_message(self):
         """
         Send chat message, Non-blocking streaming, status updates show.
@@ -140,12 +196,24 @@ class ChatInterface:
         if not message:
             return
 
+        # Prefetched retrieval, the send request reuses it
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+        prefetch_token, self.prefetch_token = self.prefetch_token, None
+
         # Clear input
         self.input_field.value = ''
         self.send_button.disable()
+        self._sending = True
+
+        # Scrolled back in history, the latest turns first reloaded
+        if self.newer_from is not None:
+            await self.load_latest()
 
         # Add user message
-        self.add_message(message, is_user=True)
+        turn = self.total_turns
+        self.add_message(message, is_user=True, turn=turn)
 
         try:
             # Update status - Searching
@@ -156,72 +224,254 @@ class ChatInterface:
             assistant_msg_label = None
 
             async with httpx.AsyncClient(timeout=120.0) as client:
-                # Update status - Generating
-                self.set_status('Generating response...', 'generating')
-
-                # Stream response
+                # Stream typed events, sources before the first token arrive
                 async with client.stream(
                     'POST',
                     f'{BACKEND_URL}/api/chat/stream',
                     json={
                         'message': message,
                         'session_id': self.session_id,
+                        'events': True,
+                        'prefetch_token': prefetch_token,
                     },
                 ) as response:
                     response.raise_for_status()
 
                     accumulated_response = ""
+                    event_type = None
 
                     async for line in response.aiter_lines():
-                        if line.startswith('data: '):
-                            chunk = line[6:]
-
-                            if chunk == '[DONE]':
-                                break
-                            elif chunk.startswith('[ERROR'):
-                                self.add_message(
-                                    f"Error: {chunk}", is_user=False, is_error=True)
-                                break
+                        if line.startswith('event: '):
+                            event_type = line[7:]
+                            continue
+                        if not line.startswith('data: '):
+                            continue
+                        data = json.loads(line[6:])
+
+                        if event_type == 'sources':
+                            self.add_sources(data['sources'], data['mode'], turn)
+                            # Update status - Generating
+                            self.set_status('Generating response...', 'generating')
+                        elif event_type == 'error':
+                            self.add_message(
+                                f"Error: {data['message']}", is_user=False, is_error=True, turn=turn)
+                            break
+                        elif event_type == 'done':
+                            self.total_turns = turn + 1
+                            break
+                        elif event_type == 'token':
+                            accumulated_response += data['text']
+
+                            # Create or update assistant message
+                            if assistant_msg_container is None:
+                                assistant_msg_container, assistant_msg_label = self.add_answer(
+                                    accumulated_response, turn)
                             else:
-                                accumulated_response += chunk
-
-                                # Create or update assistant message
-                                if assistant_msg_container is None:
-                                    with self.chat_container:
-                                        assistant_msg_container = ui.card().classes('w-full bg-blue-50 p-3 mb-2')
-                                        with assistant_msg_container:
-                                            ui.label('Assistant').classes(
-                                                'text-sm font-semibold text-blue-600 mb-1')
-                                            assistant_msg_label = ui.label(accumulated_response).classes(
-                                                'text-gray-800 whitespace-pre-wrap')
-                                else:
-                                    # Update existing message
-                                    assistant_msg_label.set_text(
-                                        accumulated_response)
-
-                                # Scroll to bottom
-                                await ui.run_javascript(
-                                    f"document.getElementById('{self.chat_container.id}').scrollTop = "
-                                    f"document.getElementById('{self.chat_container.id}').scrollHeight;"
-                                )
+                                # Update existing message
+                                assistant_msg_label.set_text(
+                                    accumulated_response)
+
+                            await self.scroll_to_bottom()
 
             # Clear status
             self.set_status('Ready', 'ready')
 
         except Exception as e:
-            self.add_message(f"Error: {str(e)}", is_user=False, is_error=True)
+            self.add_message(f"Error: {str(e)}", is_user=False, is_error=True, turn=turn)
             self.set_status('Ready', 'ready')
 
         finally:
+            self._sending = False
             self.send_button.enable()
 
-    def add_message(self, text: str, is_user: bool = False, is_system: bool = False, is_error: bool = False):
+    async def fetch_history(self, before: int | None, limit: int = HISTORY_PAGE_TURNS) -> dict | None:
+        """Fetch one page of past turns from the backend.
+        Args:
+            before: Turns before this one, newest page if None
+            limit: Turns in the page
+        Returns:
+            History page, None if the backend failed
+        """
+        params = {'limit': limit}
+        if before is not None:
+            params['before'] = before
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(
+                    f'{BACKEND_URL}/api/sessions/{self.session_id}/history',
+                    params=params,
+                )
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            # History only, the chat itself still works
+            return None
+
+    async def load_latest(self):
+        """Replace the window with the newest page of the session."""
+        page = await self.fetch_history(None)
+        if page is None:
+            return
+        self.chat_container.clear()
+        self.messages = []
+        for message in page['messages']:
+            self.add_history_message(message)
+        self.older_before = page['before']
+        self.newer_from = None
+        self.total_turns = page['total_turns']
+        await self.scroll_to_bottom()
+
+    async def handle_scroll(self, event):
+        """Near the top older turns load, near the bottom newer ones, if trimmed they were."""
+        if self._loading or self._sending:
+            return
+        if event.vertical_percentage <= 0.0 and self.older_before is not None:
+            await self.load_older()
+        elif event.vertical_percentage >= 1.0 and self.newer_from is not None:
+            await self.load_newer()
+
+    async def load_older(self):
+        """Prepend the page above the window, turns at the bottom trimmed."""
+        self._loading = True
+        try:
+            page = await self.fetch_history(self.older_before)
+            if page is None:
+                return
+            for index, message in enumerate(page['messages']):
+                self.add_history_message(message, index=index)
+            self.older_before = page['before']
+            self.trim_window(from_top=False)
+            # Just below the new page, so at once again the top is not hit
+            self.scroll_area.scroll_to(percent=len(page['messages']) / max(len(self.messages), 1))
+        finally:
+            self._loading = False
+
+    async def load_newer(self):
+        """Append the page below the window, turns at the top trimmed."""
+        self._loading = True
+        try:
+            end = min(self.newer_from + HISTORY_PAGE_TURNS, self.total_turns)
+            page = await self.fetch_history(end, limit=end - self.newer_from)
+            if page is None:
+                return
+            for message in page['messages']:
+                self.add_history_message(message)
+            self.total_turns = page['total_turns']
+            self.newer_from = end if end < self.total_turns else None
+            self.trim_window(from_top=True)
+        finally:
+            self._loading = False
+
+    def trim_window(self, from_top: bool = True):
+        """Drop whole turns from one end until the window fits, cursors kept in step.
+        Args:
+            from_top: Oldest turns dropped if True, newest if False
+        """
+        while len(self.messages) > MAX_LIVE_MESSAGES:
+            position = 0 if from_top else -1
+            element, turn = self.messages.pop(position)
+            self.chat_container.remove(element)
+            # Rest of the same turn, together it goes
+            while turn is not None and self.messages and self.messages[position][1] == turn:
+                self.chat_container.remove(self.messages.pop(position)[0])
+            if turn is None:
+                continue
+            if from_top:
+                self.older_before = turn + 1
+            else:
+                self.newer_from = turn
+
+    def track(self, element, turn: int | None, index: int | None = None):
+        """Register a message element in the live window.
+        Args:
+            element: Card of the message
+            turn: Session turn, None for notices
+            index: Position in the window, appended if None
+        """
+        if index is None:
+            self.messages.append((element, turn))
+        else:
+            element.move(self.chat_container, target_index=index)
+            self.messages.insert(index, (element, turn))
+
+    def add_history_message(self, message: dict, index: int | None = None):
+        """Render one message of a history page.
+        Args:
+            message: Message from the history API
+            index: Position in the window, appended if None
+        """
+        if message['role'] == 'user':
+            self.add_message(message['content'], is_user=True, turn=message['turn'], index=index)
+        else:
+            self.add_answer(message['content'], message['turn'], index=index)
+
+    def add_answer(self, text: str, turn: int | None, index: int | None = None):
+        """Add assistant message to chat.
+        Args:
+            text: Answer so far
+            turn: Session turn
+            index: Position in the window, appended if None
+        Returns:
+            Card and label, the label for streamed updates
+        """
+        with self.chat_container:
+            card = ui.card().classes('w-full bg-blue-50 p-3 mb-2')
+            with card:
+                ui.label('Assistant').classes(
+                    'text-sm font-semibold text-blue-600 mb-1')
+                label = ui.label(text).classes(
+                    'text-gray-800 whitespace-pre-wrap')
+        self.track(card, turn, index)
+        if index is None:
+            self.trim_window()
+        return card, label
+
+    def add_sources(self, sources: list[dict], mode: str, turn: int | None = None):
+        """Show retrieved sources, before the answer streams in.
+        Args:
+            sources: Source metadata from the sources event
+            mode: chunks, summaries or none
+            turn: Session turn the sources belong to
+        """
+        with self.chat_container:
+            with ui.card().classes('w-full bg-yellow-50 p-2 mb-2') as card:
+                if mode == 'summaries':
+                    ui.label('📚 Answering from document summaries').classes('text-xs text-gray-600')
+                elif not sources:
+                    ui.label('📚 No matching passages found').classes('text-xs text-gray-600')
+                else:
+                    ui.label('📚 Sources').classes('text-xs font-semibold text-gray-600')
+                    for source in sources:
+                        where = source.get('filename') or source.get('name') or 'document'
+                        if source.get('page') is not None:
+                            where += f", p. {source['page']}"
+                        if source.get('score') is not None:
+                            where += f" ({source['score']:.2f})"
+                        ui.label(where).classes('text-xs text-gray-700').tooltip(source.get('snippet') or '')
+        self.track(card, turn)
+        self.trim_window()
+
+    async def scroll_to_bottom(self):
+        """Scroll chat to latest message."""
+        self.scroll_area.scroll_to(percent=1.0)
+
+    def add_message(
+        self,
+        text: str,
+        is_user: bool = False,
+        is_system: bool = False,
+        is_error: bool = False,
+        turn: int | None = None,
+        index: int | None = None,
+    ):
         """Add message to chat.
         Args:
             text: Message content
             is_user: User message flag
             is_system: System message flag
             is_error: Error message flag
+            turn: Session turn, None for notices outside the session
+            index: Position in the window, appended if None
         """
         with self.chat_container:
             if is_error:
@@ -241,7 +491,10 @@ class ChatInterface:
                         'text-sm font-semibold text-gray-600 mb-1')
                     ui.label(text).classes('text-gray-800 whitespace-pre-wrap')
             else:
-                pass
+                return
+        self.track(card, turn, index)
+        if index is None:
+            self.trim_window()
 
     def set_status(self, text: str, status_type: str = 'ready'):
         """Update status label.
@@ -0,0 +1,135 @@
+"""
+Chunking benchmark, chunk count, chunking throughput and retrieval hit rate per strategy it reports.
+
+Run from the repository root:
+    python -m benchmarks.bench_chunking
+    python -m benchmarks.bench_chunking --pdf manual.pdf --questions questions.json
+
+Without a PDF, a synthetic manual with headings, tables and long paragraphs used it is.
+Questions file, a JSON list of {"question": ..., "answer": ...} objects it holds;
+a hit it counts when the answer text in one of the top-k chunks found is.
+Hashed bag-of-words embeddings used they are, no API key needed.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from agno.knowledge.document import Document
+from agno.knowledge.reader.pdf_reader import PDFReader
+from agno.utils.log import set_log_level_to_warning
+
+from app.knowledge.chunking import CHUNKING_STRATEGIES
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.vector_store import PdfLanceDb
+
+TOPICS = ["pump", "filter", "valve", "sensor", "motor", "battery", "display", "fan"]
+
+
+def synthetic_pages(pages: int, seed: int = 7) -> tuple[list[Document], list[dict[str, str]]]:
+    """
+    Synthetic manual pages and a fixed question set, generated they are.
+    """
+    rng = random.Random(seed)
+    documents = []
+    questions = []
+    section = 0
+    for number in range(1, pages + 1):
+        lines = []
+        for topic in rng.sample(TOPICS, 3):
+            section += 1
+            code = f"{topic.upper()}-{section:03d}"
+            lines.append(f"{section}. {topic.title()} Service")
+            filler = " ".join(
+                f"Step {i} for the {topic} requires the {rng.choice(TOPICS)} to be checked first."
+                for i in range(rng.randint(4, 12)))
+            lines.append(f"{filler} The {topic} service code is {code}.")
+            lines.append("")
+            lines.append("Part | Torque | Interval |")
+            lines.extend(f"{topic} bolt {i} | {rng.randint(5, 40)} Nm | {rng.randint(1, 12)} months |"
+                         for i in range(4))
+            lines.append("")
+            questions.append({"question": f"what is the {topic} service code in section {section}",
+                              "answer": code})
+        documents.append(Document(name="manual", id=f"manual_{number}",
+                                  meta_data={"page": number}, content="\n".join(lines)))
+    return documents, questions
+
+
+def pdf_pages(path: str) -> list[Document]:
+    """
+    PDF pages, unchunked, read they are.
+    """
+    return PDFReader(chunk=False).read(path)
+
+
+def run_strategy(
+    workdir: Path,
+    name: str,
+    pages: list[Document],
+    questions: list[dict[str, str]],
+    chunk_size: int,
+    overlap: int,
+    k: int,
+) -> dict[str, float]:
+    """
+    One strategy, chunked, indexed and queried it is.
+    """
+    strategy = CHUNKING_STRATEGIES[name](chunk_size, overlap)
+    start = time.perf_counter()
+    chunks = [chunk for document in pages for chunk in strategy.chunk(document)]
+    elapsed = time.perf_counter() - start
+    characters = sum(len(document.content) for document in pages)
+
+    store = PdfLanceDb(table_name=name, uri=str(workdir / name), embedder=HashEmbedder(dimensions=256))
+    store.insert(content_hash=name, documents=chunks)
+
+    hits = 0
+    context_chars = 0
+    for item in questions:
+        results = store.search(item["question"], limit=k)
+        context_chars += sum(len(r.content) for r in results)
+        hits += any(item["answer"].lower() in r.content.lower() for r in results)
+
+    return {
+        "chunks": len(chunks),
+        "avg_chars": sum(len(c.content) for c in chunks) / max(len(chunks), 1),
+        "mb_per_s": characters / max(elapsed, 1e-9) / 1e6,
+        "hit_rate": hits / max(len(questions), 1),
+        "context_chars": context_chars / max(len(questions), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to chunk instead of the synthetic manual")
+    parser.add_argument("--questions", help="JSON question set, required with --pdf")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    set_log_level_to_warning()
+
+    if args.pdf:
+        if not args.questions:
+            parser.error("--questions is required with --pdf")
+        pages = pdf_pages(args.pdf)
+        questions = json.loads(Path(args.questions).read_text())
+    else:
+        pages, questions = synthetic_pages(args.pages)
+
+    print(f"{len(pages)} pages, {len(questions)} questions, chunk_size={args.chunk_size}, overlap={args.overlap}")
+    print(f"{'strategy':>9} {'chunks':>7} {'avg chars':>9} {'MB/s':>7} {'hit@' + str(args.k):>7} {'ctx chars':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in CHUNKING_STRATEGIES:
+            result = run_strategy(Path(workdir), name, pages, questions, args.chunk_size, args.overlap, args.k)
+            print(
+                f"{name:>9} {result['chunks']:>7} {result['avg_chars']:>9.0f} {result['mb_per_s']:>7.2f} "
+                f"{result['hit_rate']:>7.3f} {result['context_chars']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
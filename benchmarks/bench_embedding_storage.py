@@ -0,0 +1,135 @@
+"""
+Embedding storage benchmark, index size, search latency and recall per option it reports.
+
+Run from the repository root:
+    python -m benchmarks.bench_embedding_storage --rows 20000 --queries 200
+
+Real vectors from data/lancedb/pdf_knowledge used when present they are,
+otherwise synthetic vectors with decaying variance, like text-embedding-3, generated.
+Recall is measured against exact float32 search at full dimensions.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import lancedb
+import numpy as np
+from agno.knowledge.embedder.base import Embedder
+
+from app.knowledge.vector_store import (
+    VECTOR_PRECISIONS,
+    PdfLanceDb,
+    normalize,
+    reduce_dimensions,
+    table_size_bytes,
+)
+
+
+def load_vectors(uri: str, table_name: str, rows: int, dimensions: int) -> np.ndarray:
+    """
+    Corpus vectors load, real ones if a float32 table exists.
+    """
+    if (Path(uri) / f"{table_name}.lance").exists():
+        table = lancedb.connect(uri).open_table(table_name)
+        if table.count_rows() and table.schema.field("vector").type.value_type.bit_width == 32:
+            column = table.search().select(["vector"]).limit(rows).to_arrow().column("vector")
+            size = column.type.list_size
+            print(f"Using {len(column)} real vectors from {uri}/{table_name}")
+            return np.asarray(column.combine_chunks().flatten(), dtype=np.float32).reshape(-1, size)
+
+    print(f"Using {rows} synthetic vectors")
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(max(rows // 50, 1), dimensions))
+    vectors = centers[rng.integers(len(centers), size=rows)] + 0.6 * rng.normal(size=(rows, dimensions))
+    # Variance decays with position, so truncated prefixes keep meaning
+    vectors *= 1.0 / np.sqrt(1.0 + np.arange(dimensions) / 64.0)
+    return normalize(vectors.astype(np.float32))
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run_option(
+    workdir: Path,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    dimensions: int,
+    precision: str,
+    rescore_factor: int,
+    k: int,
+) -> dict[str, float]:
+    """
+    One storage option, built, measured and searched it is.
+    """
+    uri = str(workdir / f"{precision}_{dimensions}_{rescore_factor}")
+    store = PdfLanceDb(
+        table_name="bench",
+        uri=uri,
+        embedder=Embedder(dimensions=dimensions),
+        precision=precision,
+        rescore_factor=rescore_factor,
+    )
+    reduced = reduce_dimensions(corpus, dimensions)
+    batch = 2000
+    for start in range(0, len(reduced), batch):
+        store.table.add([
+            {"id": str(start + i), "payload": "{}", **store.encode_vector(vector)}
+            for i, vector in enumerate(reduced[start:start + batch])
+        ])
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(reduce_dimensions(queries, dimensions), truth):
+        start = time.perf_counter()
+        results = store.search_by_vector(query, limit=k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(results["id"].astype(int)) & set(expected.tolist()))
+
+    return {
+        "size_mb": table_size_bytes(uri, "bench") / 1e6,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "recall": hits / (len(truth) * k),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1536, 768, 512, 256])
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--uri", default="data/lancedb")
+    parser.add_argument("--table", default="pdf_knowledge")
+    args = parser.parse_args()
+
+    corpus = load_vectors(args.uri, args.table, args.rows, max(args.dimensions))
+    rng = np.random.default_rng(7)
+    picks = rng.integers(len(corpus), size=args.queries)
+    queries = normalize(corpus[picks] + 0.3 * rng.normal(size=(args.queries, corpus.shape[1])) / np.sqrt(corpus.shape[1]))
+    truth = exact_top_k(corpus, queries, args.k)
+
+    print(f"{'dims':>5} {'precision':>9} {'rescore':>7} {'size MB':>9} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(args.k):>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for dimensions in args.dimensions:
+            if dimensions > corpus.shape[1]:
+                continue
+            for precision in VECTOR_PRECISIONS:
+                rescore_options = [0] if precision == "float32" else [0, args.rescore_factor]
+                for rescore_factor in rescore_options:
+                    result = run_option(
+                        Path(workdir), corpus, queries, truth,
+                        dimensions, precision, rescore_factor, args.k,
+                    )
+                    print(
+                        f"{dimensions:>5} {precision:>9} {rescore_factor:>7} {result['size_mb']:>9.1f} "
+                        f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['recall']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+from app.config import settings
+from app.knowledge.bulk_ingest import BulkIngester, BulkIngestReport, Checkpoint
+from app.knowledge.chunking import CHUNKING_STRATEGIES
+from app.knowledge.store import get_knowledge
+from app.knowledge.summaries import get_summary_queue
+from app.knowledge.tenants import normalize_tenant
+
+
+def print_progress(report: BulkIngestReport) -> None:
+    done = report.files_ingested + report.files_failed + report.files_skipped
+    print(f"{done}/{report.files_found} files, {report.chunks} chunks | "
+          f"{report.files_per_second:.1f} files/s, {report.chunks_per_second:.0f} chunks/s, "
+          f"{report.tokens_per_second:.0f} embedding tokens/s", flush=True)
+
+
+# Ingest a directory tree of PDFs, parsed in parallel and resumable
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk ingest a directory of PDFs into the knowledge base, resuming from a checkpoint.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--tenant", default=None, help="Tenant receiving the PDFs, default tenant if omitted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parsing processes")
+    parser.add_argument("--batch-chunks", type=int, default=500,
+                        help="Chunks embedded and appended per batch")
+    parser.add_argument("--chunking", choices=sorted(CHUNKING_STRATEGIES), default=None)
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="Checkpoint file, data/ingest_<tenant>.checkpoint.jsonl by default")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and ingest everything")
+    parser.add_argument("--report", type=Path, default=None, help="Write the final report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+    tenant = normalize_tenant(args.tenant)
+
+    checkpoint_path = args.checkpoint or Path("data") / f"ingest_{tenant}.checkpoint.jsonl"
+    if args.restart:
+        checkpoint_path.unlink(missing_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    ingester = BulkIngester(
+        knowledge=get_knowledge(tenant),
+        checkpoint=checkpoint,
+        workers=args.workers,
+        batch_chunks=args.batch_chunks,
+        chunking=args.chunking,
+        tenant=tenant,
+        on_progress=print_progress,
+        summaries=get_summary_queue() if settings.document_summaries else None,
+    )
+    report = asyncio.run(ingester.run(args.directory))
+
+    print()
+    print(f"Ingested {report.files_ingested} files ({report.files_skipped} already done, "
+          f"{report.files_failed} failed) in {report.seconds:.1f}s")
+    print(f"{report.chunks} chunks, {report.embedding_tokens} embedding tokens")
+    print(f"{report.files_per_second:.2f} files/s, {report.chunks_per_second:.1f} chunks/s, "
+          f"{report.tokens_per_second:.0f} embedding tokens/s")
+    for failure in report.failures:
+        print(f"  FAILED {failure['path']}: {failure['error']}")
+
+    if args.report:
+        args.report.write_text(json.dumps(report.to_dict(), indent=2))
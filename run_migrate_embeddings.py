@@ -0,0 +1,47 @@
+import argparse
+import logging
+
+from app.config import settings
+from app.knowledge.store import KNOWLEDGE_TABLE, LANCEDB_URI, get_embedder, list_tenants
+from app.knowledge.tenants import tenant_table_name
+from app.knowledge.vector_store import VECTOR_PRECISIONS, PdfLanceDb, reencode_table, table_size_bytes
+
+# Re-encode the pdf_knowledge table, at configured dimensions and precision
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-encode pdf_knowledge vectors, reduced dimensions and precision applied.")
+    parser.add_argument("--precision", choices=VECTOR_PRECISIONS,
+                        default=settings.vector_precision)
+    parser.add_argument("--rescore-factor", type=int,
+                        default=settings.vector_rescore_factor)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--tenant", action="append",
+                        help="Tenant to re-encode, repeatable, all tenants if omitted")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+
+    for tenant in args.tenant or list_tenants():
+        table_name = tenant_table_name(KNOWLEDGE_TABLE, tenant)
+        # Opened without the dimension check, re-encoding it is what fixes them
+        vector_db = PdfLanceDb(
+            table_name=table_name,
+            uri=LANCEDB_URI,
+            embedder=get_embedder(),
+            precision=settings.vector_precision,
+            rescore_factor=settings.vector_rescore_factor,
+            check_dimensions=False,
+        )
+        size_before = table_size_bytes(LANCEDB_URI, table_name)
+        rows = reencode_table(
+            vector_db,
+            precision=args.precision,
+            rescore_factor=args.rescore_factor,
+            batch_size=args.batch_size,
+        )
+        size_after = table_size_bytes(LANCEDB_URI, table_name)
+
+        print(f"[{tenant}] Re-encoded {rows} rows as {args.precision}, "
+              f"{settings.embedding_dimensions} dims")
+        print(f"[{tenant}] Table size: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+              f"(old versions included until maintenance prunes them)")
@@ -0,0 +1,41 @@
+import argparse
+import logging
+import tarfile
+from pathlib import Path
+
+from app.config import settings
+from app.knowledge.snapshots import SNAPSHOT_DIR, export_snapshot, extract_snapshot_tar, import_snapshot
+
+# Export or import a knowledge snapshot, for bootstrapping new nodes
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the knowledge tables and contents DB as a snapshot, or import one.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a new snapshot")
+    export_parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR)
+    export_parser.add_argument("--tar", type=Path, default=None,
+                               help="Also pack the snapshot into this tar file")
+    import_parser = commands.add_parser("import", help="Replace local knowledge with a snapshot")
+    import_parser.add_argument("source", type=Path, help="Snapshot directory or tar file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+
+    if args.command == "export":
+        manifest = export_snapshot(args.dir)
+        path = args.dir / manifest.snapshot_id
+        if args.tar:
+            with tarfile.open(args.tar, "w") as tar:
+                tar.add(path, arcname=path.name)
+        print(f"Snapshot {manifest.snapshot_id} written to {args.tar or path}")
+    else:
+        source = args.source
+        if source.is_file():
+            with open(source, "rb") as f:
+                source = extract_snapshot_tar(f)
+        manifest = import_snapshot(source)
+        print(f"Snapshot {manifest.snapshot_id} imported")
+
+    for tenant, table in manifest.tables.items():
+        print(f"  [{tenant}] {table['table']}: {table['rows']} rows at version {table['version']}, "
+              f"indexes {table['indexes']}")
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import openai
+from agno.db.sqlite import SqliteDb
+from agno.knowledge.document import Document
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.knowledge import Knowledge
+
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.vector_store import PdfLanceDb
+
+# Five unrelated chunks, one clear match per query the search tests use
+DOCS = [
+    "The contract renewal date is March first",
+    "Payment terms are net thirty days",
+    "The warranty covers parts and labour for two years",
+    "Termination requires ninety days written notice",
+    "Shipping takes five business days",
+]
+
+
+def make_knowledge(path: Path, embedder: Embedder | None = None) -> Knowledge:
+    """
+    Knowledge with temp LanceDB and contents DB, hash embedder by default it uses.
+    """
+    return Knowledge(
+        name="PDF Documents",
+        vector_db=PdfLanceDb(table_name="pdf_knowledge", uri=str(path / "lancedb"),
+                             embedder=embedder or HashEmbedder(dimensions=32)),
+        contents_db=SqliteDb(db_file=str(path / "contents.db")),
+    )
+
+
+def fake_parse(path, filename, file_id, chunking) -> list[Document]:
+    """
+    Parser stand-in, two chunks per readable PDF it returns.
+    Broken files it fails on, scanned ones no text they give.
+    """
+    if "broken" in filename:
+        raise ValueError("not a PDF")
+    if "scanned" in filename:
+        return []
+    return [
+        Document(id=f"{file_id}_{n}", name=filename, content_id=file_id, content=f"{filename} part {n}",
+                 meta_data={"filename": filename, "file_id": file_id, "type": "pdf"})
+        for n in range(2)
+    ]
+
+
+class FakeOpenAIServer:
+    """
+    In-process OpenAI embeddings endpoint, faults injected per request.
+    One embedding per input text, single or batched, it returns.
+    Queued faults served first, then healthy answers it gives.
+    Fault: an HTTP status code, or seconds of delay as a float.
+    """
+
+    def __init__(self, dimensions: int = 8):
+        self.dimensions = dimensions
+        self.faults: list[int | float] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def inject(self, *faults: int | float) -> None:
+        with self._lock:
+            self.faults.extend(faults)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            fault = self.faults.pop(0) if self.faults else None
+        if isinstance(fault, int):
+            return httpx.Response(fault, json={"error": {"message": f"injected {fault}"}})
+        if isinstance(fault, float):
+            time.sleep(fault)
+        texts = json.loads(request.content)["input"]
+        texts = [texts] if isinstance(texts, str) else texts
+        return httpx.Response(200, json={
+            "object": "list",
+            "model": "text-embedding-3-small",
+            "data": [{"object": "embedding", "index": i, "embedding": [1.0] + [0.0] * (self.dimensions - 1)}
+                     for i in range(len(texts))],
+            "usage": {"prompt_tokens": 2 * len(texts), "total_tokens": 2 * len(texts)},
+        })
+
+    def client(self) -> openai.OpenAI:
+        """
+        OpenAI client talking to this server, its own retries disabled.
+        """
+        return openai.OpenAI(
+            api_key="sk-test",
+            base_url="http://fake-openai/v1",
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(self.handle)),
+        )
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+import pytest_check as check
+
+from app.agent.admission import AdmissionController, AdmissionRejected
+
+
+def make_controller(**overrides) -> AdmissionController:
+    """
+    Small controller build, tests quick to saturate it are.
+    """
+    options = {"max_concurrency": 1, "max_queue": 2, "queue_timeout": 1.0, "max_per_session": 0}
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejected_fast_with_retry_after():
+    """
+    Slots and queue full, rejected at once the request is, Retry-After it carries.
+    """
+    controller = make_controller(max_queue=1)
+    slot = await controller.acquire("a")
+    waiter = asyncio.create_task(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("c")
+
+    check.equal(rejected.value.reason, "queue_full")
+    check.greater_equal(rejected.value.retry_after, 1)
+
+    slot.release()
+    (await waiter).release()
+    check.equal(controller.active, 0)
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_times_out():
+    """
+    Slot never freed, after the timeout rejected the waiter is and dequeued.
+    """
+    controller = make_controller(queue_timeout=0.05)
+    slot = await controller.acquire("a")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("b")
+
+    check.equal(rejected.value.reason, "timeout")
+    check.equal(controller.queued, 0)
+    slot.release()
+
+
+@pytest.mark.asyncio
+async def test_waiting_sessions_served_round_robin():
+    """
+    One session many waiters queued, another session's waiter not starved it is.
+    """
+    controller = make_controller(max_queue=8)
+    order = []
+
+    async def request(session: str) -> None:
+        slot = await controller.acquire(session)
+        order.append(session)
+        await asyncio.sleep(0)
+        slot.release()
+
+    first = await controller.acquire("greedy")
+    tasks = [asyncio.create_task(request(s)) for s in ["greedy", "greedy", "greedy", "polite"]]
+    await asyncio.sleep(0)
+    first.release()
+    await asyncio.gather(*tasks)
+
+    check.equal(order, ["greedy", "polite", "greedy", "greedy"])
+
+
+@pytest.mark.asyncio
+async def test_session_share_limited():
+    """
+    Session at its share, further requests of it rejected are, others still queue.
+    """
+    controller = make_controller(max_queue=8, max_per_session=2)
+    slot = await controller.acquire("a")
+    waiter = asyncio.create_task(controller.acquire("a"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("a")
+    other = asyncio.create_task(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    check.equal(rejected.value.reason, "session_limit")
+    check.equal(controller.queued, 2)
+
+    slot.release()
+    (await waiter).release()
+    (await other).release()
+    check.equal(controller.active, 0)
+
+
+@pytest.mark.asyncio
+async def test_session_share_enforced_while_slots_free():
+    """
+    Free slots left, one session still only its share takes; another session then admitted is.
+    """
+    controller = make_controller(max_concurrency=4, max_per_session=2)
+    slots = [await controller.acquire("a"), await controller.acquire("a")]
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("a")
+    check.equal(rejected.value.reason, "session_limit")
+
+    slots.append(await controller.acquire("b"))
+    check.equal(controller.active, 3)
+    for slot in slots:
+        slot.release()
@@ -22,18 +22,18 @@ def fake_stream():
 def reset_singletons():
     chat_agent_module._agent_instance = None
     chat_agent_module._db = None
-    knowledge_module._knowledge = None
+    knowledge_module._knowledge_cache = None
     knowledge_module._contents_db = None
     yield
     chat_agent_module._agent_instance = None
-    knowledge_module._knowledge = None
+    knowledge_module._knowledge_cache = None
 
 
 @pytest.mark.asyncio
-@patch("app.agent.chat_agent.OpenAIChat")
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
 @patch("app.agent.chat_agent.Agent")
-@patch("app.knowledge.store.OpenAIEmbedder")
-@patch("app.knowledge.store.LanceDb")
+@patch("app.knowledge.store.ResilientOpenAIEmbedder")
+@patch("app.knowledge.store.PdfLanceDb")
 async def test_agent_can_stream(
     mock_lancedb,
     mock_embedder,
@@ -61,10 +61,10 @@ async def test_agent_can_stream(
 
 
 @pytest.mark.asyncio
-@patch("app.agent.chat_agent.OpenAIChat")
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
 @patch("app.agent.chat_agent.Agent")
-@patch("app.knowledge.store.OpenAIEmbedder")
-@patch("app.knowledge.store.LanceDb")
+@patch("app.knowledge.store.ResilientOpenAIEmbedder")
+@patch("app.knowledge.store.PdfLanceDb")
 async def test_agent_streaming_with_long_message(
     mock_lancedb,
     mock_embedder,
@@ -87,3 +87,40 @@ async def test_agent_streaming_with_long_message(
             chunks.append(chunk)
 
         check.greater(len(chunks), 3)
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+@patch("app.knowledge.store.ResilientOpenAIEmbedder")
+@patch("app.knowledge.store.PdfLanceDb")
+async def test_sources_event_before_first_token(
+    mock_lancedb,
+    mock_embedder,
+    MockAgent,
+    MockOpenAIChat,
+):
+    """
+    Sources first, tokens after, done with timings last.
+    """
+    from agno.knowledge.document import Document
+
+    fake_kb = MagicMock()
+    fake_kb.search.return_value = [
+        Document(content="Renewal is in March", name="contract",
+                 meta_data={"file_id": "f1", "filename": "contract.pdf", "page": 2}),
+    ]
+
+    with patch("app.agent.chat_agent.get_knowledge", return_value=fake_kb):
+        mock_agent_instance = MagicMock()
+        mock_agent_instance.run.return_value = fake_stream()
+        MockAgent.return_value = mock_agent_instance
+
+        agent = chat_agent_module.get_agent()
+        events = [e async for e in agent.stream_events("When is renewal?", "test", coalesce=False)]
+
+    check.equal([e.type for e in events], ["sources", "token", "token", "token", "token", "done"])
+    source = events[0].data["sources"][0]
+    check.equal((source["filename"], source["page"]), ("contract.pdf", 2))
+    check.equal(events[0].data["mode"], "chunks")
+    check.is_in("first_token_ms", events[-1].data["timings"])
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import pytest_check as check
+
+from app.knowledge.bulk_ingest import BulkIngester, Checkpoint
+from app.knowledge.summaries import SummaryQueue, SummaryStore
+from tests.fakes import fake_parse, make_knowledge
+
+
+def make_archive(root) -> None:
+    """
+    Small directory tree of PDFs, one broken among them.
+    """
+    (root / "a" / "b").mkdir(parents=True)
+    for name in ["one.pdf", "a/two.PDF", "a/b/three.pdf", "a/broken.pdf", "notes.txt"]:
+        (root / name).write_bytes(b"%PDF " + name.encode())
+
+
+async def run(tmp_path, knowledge, batch_chunks=3):
+    ingester = BulkIngester(knowledge, Checkpoint(tmp_path / "ckpt.jsonl"), workers=1,
+                            batch_chunks=batch_chunks)
+    with patch("app.knowledge.bulk_ingest.parse_pdf", fake_parse):
+        return await ingester.run(tmp_path / "archive")
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_reports_and_stores_every_file(tmp_path):
+    """
+    Every PDF in the tree ingested is, failures reported not fatal.
+    """
+    make_archive(tmp_path / "archive")
+    knowledge = make_knowledge(tmp_path)
+    progress = []
+
+    ingester = BulkIngester(knowledge, Checkpoint(tmp_path / "ckpt.jsonl"), workers=1,
+                            batch_chunks=3, on_progress=lambda r: progress.append(r.files_ingested))
+    with patch("app.knowledge.bulk_ingest.parse_pdf", fake_parse):
+        report = await ingester.run(tmp_path / "archive")
+
+    check.equal(report.files_found, 4)
+    check.equal(report.files_ingested, 3)
+    check.equal(report.files_failed, 1)
+    check.equal(report.chunks, 6)
+    check.greater(report.embedding_tokens, 0)
+    check.equal(progress, [2, 3])
+    check.equal(knowledge.vector_db.get_count(), 6)
+    _, count = knowledge.contents_db.get_knowledge_contents()
+    check.equal(count, 3)
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_resumes_from_checkpoint(tmp_path):
+    """
+    Second run, done files skipped are. Changed file, replaced not duplicated it is.
+    """
+    make_archive(tmp_path / "archive")
+    knowledge = make_knowledge(tmp_path)
+    await run(tmp_path, knowledge)
+
+    again = await run(tmp_path, knowledge)
+    check.equal(again.files_skipped, 3)
+    check.equal(again.files_ingested, 0)
+
+    (tmp_path / "archive" / "one.pdf").write_bytes(b"%PDF changed and longer")
+    changed = await run(tmp_path, knowledge)
+    check.equal(changed.files_ingested, 1)
+    check.equal(knowledge.vector_db.get_count(), 6)
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_summarizes_every_stored_file(tmp_path):
+    """
+    Bulk ingested files, like uploads summarized they are, before the run returns.
+    """
+    make_archive(tmp_path / "archive")
+    store = SummaryStore(tmp_path / "summaries.db")
+    queue = SummaryQueue(store=store, summarize=lambda prompt: "summary", concurrency=2, section_chars=6000)
+
+    ingester = BulkIngester(make_knowledge(tmp_path), Checkpoint(tmp_path / "ckpt.jsonl"), workers=1,
+                            batch_chunks=3, tenant="acme", summaries=queue)
+    with patch("app.knowledge.bulk_ingest.parse_pdf", fake_parse):
+        await ingester.run(tmp_path / "archive")
+
+    check.equal(sorted(s.filename for s in store.documents("acme")), ["one.pdf", "three.pdf", "two.PDF"])
+
+
+@pytest.mark.asyncio
+async def test_parse_workers_spawned_not_forked(tmp_path):
+    """
+    Several workers, processes from a spawn context started they are.
+    """
+    make_archive(tmp_path / "archive")
+    contexts = []
+
+    def pool(workers, mp_context=None):
+        contexts.append(mp_context.get_start_method())
+        return ThreadPoolExecutor(workers)
+
+    ingester = BulkIngester(make_knowledge(tmp_path), Checkpoint(tmp_path / "ckpt.jsonl"), workers=2)
+    with patch("app.knowledge.bulk_ingest.ProcessPoolExecutor", pool), \
+            patch("app.knowledge.bulk_ingest.parse_pdf", fake_parse):
+        report = await ingester.run(tmp_path / "archive")
+
+    check.equal(contexts, ["spawn"])
+    check.equal(report.files_ingested, 3)
+
+
+def test_checkpoint_ignores_torn_last_line(tmp_path):
+    """
+    Killed mid-write, the torn line skipped is, earlier entries kept.
+    """
+    path = tmp_path / "ckpt.jsonl"
+    path.write_text('{"path": "one.pdf", "size": 1, "mtime_ns": 2}\n{"path": "tw')
+
+    check.equal(len(Checkpoint(path)), 1)
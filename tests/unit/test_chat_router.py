@@ -1,3 +1,5 @@
+import json
+
 import pytest
 import pytest_check as check
 from httpx import AsyncClient, ASGITransport
@@ -28,7 +30,7 @@ async def test_chat_stream_endpoint():
 
     mock_agent = MagicMock()
 
-    mock_agent.stream_response = lambda message, session_id=None: async_generator_mock(
+    mock_agent.stream_response = lambda message, session_id=None, filters=None, tenant=None, coalesce=True, prefetch_token=None, deadline=None: async_generator_mock(
         fake_tokens)
 
     with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
@@ -63,7 +65,7 @@ async def test_chat_non_stream_endpoint():
     fake_tokens = ["Hello", " ", "world", "!"]
 
     mock_agent = MagicMock()
-    mock_agent.stream_response = lambda message, session_id=None: async_generator_mock(
+    mock_agent.stream_response = lambda message, session_id=None, filters=None, tenant=None, coalesce=True, prefetch_token=None, deadline=None: async_generator_mock(
         fake_tokens)
 
     with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
@@ -107,3 +109,106 @@ async def test_chat_non_stream_with_empty_message():
         )
 
     check.equal(response.status_code, 422, "Should reject empty message!")
+
+
+@pytest.mark.asyncio
+async def test_chat_passes_document_scope():
+    """
+    File ids and filters, merged into retrieval filters they are.
+    """
+    calls = []
+
+    def fake_stream(message, session_id=None, filters=None, tenant=None, coalesce=True, prefetch_token=None, deadline=None):
+        calls.append(filters)
+        return async_generator_mock(["ok"])
+
+    mock_agent = MagicMock()
+    mock_agent.stream_response = fake_stream
+
+    with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/chat", json={
+                "message": "Hi", "file_ids": ["a", "b"], "filters": {"type": "pdf"}})
+            await client.post("/api/chat", json={"message": "Hi"})
+
+    check.equal(calls[0], {"type": "pdf", "file_id": ["a", "b"]})
+    check.is_none(calls[1])
+
+
+@pytest.mark.asyncio
+async def test_chat_passes_tenant_header():
+    """
+    Tenant header, to the agent passed it is. Invalid ids, rejected they are.
+    """
+    tenants = []
+
+    def fake_stream(message, session_id=None, filters=None, tenant=None, coalesce=True, prefetch_token=None, deadline=None):
+        tenants.append(tenant)
+        return async_generator_mock(["ok"])
+
+    mock_agent = MagicMock()
+    mock_agent.stream_response = fake_stream
+
+    with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/chat", json={"message": "Hi"}, headers={"X-Tenant-ID": "acme"})
+            await client.post("/api/chat", json={"message": "Hi"})
+            bad = await client.post("/api/chat", json={"message": "Hi"},
+                                    headers={"X-Tenant-ID": "../etc"})
+
+    check.equal(tenants, ["acme", "default"])
+    check.equal(bad.status_code, 400)
+
+
+@pytest.mark.asyncio
+async def test_chat_rejected_with_retry_after_when_saturated():
+    """
+    Admission refused, 429 with Retry-After returned it is, the agent never called.
+    """
+    from app.agent.admission import AdmissionController
+
+    controller = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1.0,
+                                     max_per_session=0)
+    held = await controller.acquire("other")
+    mock_agent = MagicMock()
+
+    with patch("app.api.chat_routes.get_agent", return_value=mock_agent), \
+            patch("app.api.chat_routes.get_admission_controller", return_value=controller):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/chat/stream", json={"message": "Hi"})
+
+    check.equal(response.status_code, 429)
+    check.greater_equal(int(response.headers["Retry-After"]), 1)
+    mock_agent.stream_response.assert_not_called()
+    held.release()
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_typed_events():
+    """
+    Events requested, sources then tokens then done as typed SSE frames arrive.
+    """
+    from app.agent.events import StreamEvent
+
+    events = [
+        StreamEvent("sources", {"mode": "chunks", "sources": [{"rank": 1, "filename": "a.pdf"}]}),
+        StreamEvent.token("Hello\nworld"),
+        StreamEvent("done", {"usage": {"total_tokens": 12}, "timings": {"total_ms": 5.0}}),
+    ]
+    mock_agent = MagicMock()
+    mock_agent.stream_events = lambda message, session_id=None, filters=None, tenant=None, coalesce=True, prefetch_token=None, deadline=None: async_generator_mock(
+        events)
+
+    with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/chat/stream", json={"message": "Hi", "session_id": "s1", "events": True})
+
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    check.equal([f.split("\n")[0] for f in frames], ["event: sources", "event: token", "event: done"])
+    check.equal(json.loads(frames[1].split("\n")[1][6:])["text"], "Hello\nworld")
+    check.equal(json.loads(frames[2].split("\n")[1][6:])["usage"]["total_tokens"], 12)
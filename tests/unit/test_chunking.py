@@ -0,0 +1,136 @@
+import pytest
+import pytest_check as check
+
+from agno.knowledge.chunking.fixed import FixedSizeChunking
+from agno.knowledge.document import Document
+
+from app.knowledge.chunking import StructureAwareChunking, iter_blocks
+from app.knowledge.store import get_pdf_reader
+
+
+def page(number: int, content: str, name: str = "manual") -> Document:
+    """
+    Page document builds, like the PDF reader does it.
+    """
+    return Document(name=name, id=f"{name}_{number}", meta_data={"page": number}, content=content)
+
+
+def test_iter_blocks_detects_headings_and_tables():
+    """
+    Headings, paragraphs and tables, apart told they are.
+    """
+    text = (
+        "1. Introduction\n"
+        "This manual describes the device. It is short.\n"
+        "\n"
+        "Name | Value |\n"
+        "Voltage | 5V |\n"
+        "Current | 2A |\n"
+    )
+    blocks = list(iter_blocks(text))
+
+    check.equal(blocks[0], ("heading", "1. Introduction"))
+    check.equal(blocks[1], ("paragraph", "This manual describes the device. It is short."))
+    check.equal(blocks[2][0], "table")
+    check.equal(blocks[2][1].count("\n"), 2)
+
+
+def test_chunks_carry_page_and_section():
+    """
+    Page and section, in chunk metadata recorded are.
+    """
+    strategy = StructureAwareChunking(chunk_size=200, overlap=0)
+    text = (
+        "1. Installation\n"
+        "Unpack the device and connect the cable.\n"
+        "\n"
+        "2. Maintenance\n"
+        "Clean the filter every month.\n"
+    )
+    chunks = strategy.chunk(page(3, text))
+
+    check.equal(len(chunks), 2)
+    check.equal([c.meta_data["section"] for c in chunks], ["1. Installation", "2. Maintenance"])
+    check.is_true(all(c.meta_data["page"] == 3 for c in chunks))
+    check.is_true(chunks[1].content.startswith("2. Maintenance"))
+
+
+def test_reader_page_markers_do_not_hide_headings():
+    """
+    Page text as the PDF reader gives it, page markers included, sections still found.
+    """
+    strategy = StructureAwareChunking(chunk_size=200, overlap=0)
+    text = (
+        "<start page 1>\n"
+        "1. Introduction\n"
+        "This manual covers the device.\n"
+        "2. Installation\n"
+        "Unpack the device and connect the cable.\n"
+        "<end page 1>"
+    )
+    chunks = strategy.chunk(page(1, text))
+
+    check.equal([c.meta_data.get("section") for c in chunks], ["1. Introduction", "2. Installation"])
+    check.is_false(any("page 1>" in c.content for c in chunks))
+
+
+def test_section_carried_across_pages():
+    """
+    Section started on one page, on the next page continue it does.
+    """
+    strategy = StructureAwareChunking(chunk_size=200, overlap=0)
+    first = strategy.chunk(page(1, "Safety Notes\nNever open the case while powered."))
+    second = strategy.chunk(page(2, "Keep away from water at all times."))
+    other = strategy.chunk(page(1, "Loose text without a heading.", name="other"))
+
+    check.equal(first[0].meta_data["section"], "Safety Notes")
+    check.equal(second[0].meta_data["section"], "Safety Notes")
+    check.is_false("section" in other[0].meta_data)
+
+
+def test_oversized_paragraph_split_on_sentences_with_overlap():
+    """
+    Long paragraph on sentence boundaries split, overlap within the section kept.
+    """
+    strategy = StructureAwareChunking(chunk_size=120, overlap=60)
+    sentences = [f"Sentence number {i} explains one step." for i in range(8)]
+    chunks = strategy.chunk(page(1, " ".join(sentences)))
+
+    check.greater(len(chunks), 2)
+    check.is_true(all(len(c.content) <= 120 for c in chunks))
+    check.is_true(all(c.content.endswith(".") for c in chunks))
+    # Last sentence of a chunk, the next one starts with
+    for previous, current in zip(chunks, chunks[1:]):
+        check.is_true(current.content.startswith(previous.content.split("\n")[-1]))
+
+
+def test_table_kept_whole():
+    """
+    Table fitting a chunk, never split it is.
+    """
+    strategy = StructureAwareChunking(chunk_size=150, overlap=0)
+    table = "\n".join(f"Row {i} | {i * 10} |" for i in range(6))
+    text = "Filler paragraph text that takes up room in the chunk.\n\n" + table
+    chunks = strategy.chunk(page(1, text))
+
+    check.is_true(any(table in c.content for c in chunks))
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    """
+    Overlap too large, rejected it is.
+    """
+    with pytest.raises(ValueError):
+        StructureAwareChunking(chunk_size=100, overlap=100)
+
+
+def test_get_pdf_reader_selects_strategy():
+    """
+    Strategy by name chosen, unknown names rejected.
+    Fixed chunks, as before no overlap they get.
+    """
+    check.is_instance(get_pdf_reader("fixed").chunking_strategy, FixedSizeChunking)
+    check.equal(get_pdf_reader("fixed").chunking_strategy.overlap, 0)
+    check.is_instance(get_pdf_reader("structure").chunking_strategy, StructureAwareChunking)
+    with pytest.raises(ValueError):
+        get_pdf_reader("nonsense")
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_check as check
+from agno.run.base import RunStatus
+
+import app.agent.chat_agent as chat_agent_module
+from app.agent.coalescing import SingleFlight, coalescing_key, normalize_question
+from app.knowledge.retrieval import RetrievalResult
+from app.metrics import get_metrics
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+
+def test_normalized_questions_share_a_key():
+    """
+    Case, spacing and trailing punctuation, the key they do not change.
+    """
+    check.equal(normalize_question("  What is   the Policy?? "), "what is the policy")
+    check.equal(coalescing_key("What is the policy?", "default", 3, {"type": "pdf"}),
+                coalescing_key("what is  the policy", "default", 3, {"type": "pdf"}))
+    check.not_equal(coalescing_key("What is the policy?", "default", 3, None),
+                    coalescing_key("What is the policy?", "default", 4, None))
+    check.not_equal(coalescing_key("What is the policy?", "default", 3, None),
+                    coalescing_key("What is the policy?", "acme", 3, None))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_subscribers_share_one_generation():
+    """
+    Identical requests in flight, one upstream generation they share, all tokens each gets.
+    """
+    flights = SingleFlight()
+    started = []
+    release = asyncio.Event()
+
+    async def generate():
+        started.append(1)
+        yield "Hello"
+        await release.wait()
+        yield " world"
+
+    async def collect():
+        return "".join([token async for token in flights.stream("key", generate)])
+
+    hits_before = get_metrics().snapshot()["counters"].get("coalescing.hits", 0)
+    leader = asyncio.create_task(collect())
+    await asyncio.sleep(0.01)
+    # Late joiner, the already streamed token replayed it gets
+    follower = asyncio.create_task(collect())
+    await asyncio.sleep(0.01)
+    release.set()
+
+    check.equal(await leader, "Hello world")
+    check.equal(await follower, "Hello world")
+    check.equal(len(started), 1)
+    check.equal(get_metrics().snapshot()["counters"]["coalescing.hits"], hits_before + 1)
+    check.equal(flights.in_flight, 0)
+
+
+@pytest.mark.asyncio
+async def test_finished_generation_not_reused():
+    """
+    Generation finished, the next request a fresh one starts.
+    """
+    flights = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        yield "answer"
+
+    first = [token async for token in flights.stream("key", generate)]
+    second = [token async for token in flights.stream("key", generate)]
+
+    check.equal(first, second)
+    check.equal(len(calls), 2)
+
+
+async def ask_concurrently(MockAgent, sessions: dict) -> tuple[list[str], list]:
+    """
+    Same question from two sessions at once, answers and recorded usage returned.
+    Args:
+        MockAgent: Patched Agent class
+        sessions: Stored session per session id, None for a fresh one
+    """
+    release = threading.Event()
+
+    def run(*args, **kwargs):
+        yield FakeChunk("Hello")
+        release.wait(5)
+        yield FakeChunk(" world")
+
+    MockAgent.return_value.run.side_effect = run
+    MockAgent.return_value.get_session.side_effect = lambda session_id: sessions[session_id]
+    usage = MagicMock()
+
+    async def ask(session_id):
+        events = [e async for e in chat_agent_module.get_agent().stream_events("What is the policy?", session_id)]
+        return "".join(e.data["text"] for e in events if e.type == "token")
+
+    chat_agent_module._agent_instance = None
+    with patch("app.agent.chat_agent.get_knowledge"), \
+            patch("app.agent.chat_agent.adaptive_search", return_value=RetrievalResult()), \
+            patch("app.agent.chat_agent.get_usage_recorder", return_value=usage):
+        tasks = [asyncio.create_task(ask(session_id)) for session_id in sessions]
+        await asyncio.sleep(0.2)
+        release.set()
+        answers = await asyncio.gather(*tasks)
+    chat_agent_module._agent_instance = None
+    return answers, [c.args[0] for c in usage.record.call_args_list]
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.MemoryManager")
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_sessions_with_history_never_share_a_generation(MockAgent, MockOpenAIChat, MockMemoryManager):
+    """
+    Same question, different histories, each session its own generation gets.
+    """
+    def with_history():
+        return MagicMock(runs=[MagicMock(parent_run_id=None, status=RunStatus.completed)], summary=None)
+
+    answers, recorded = await ask_concurrently(MockAgent, {"s1": with_history(), "s2": with_history()})
+
+    check.equal(answers, ["Hello world", "Hello world"])
+    check.equal(sorted(c.kwargs["session_id"] for c in MockAgent.return_value.run.call_args_list), ["s1", "s2"])
+    check.equal(sorted(m.session_id for m in recorded), ["s1", "s2"])
+    MockAgent.return_value.save_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.MemoryManager")
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_fresh_sessions_share_and_each_keep_the_turn(MockAgent, MockOpenAIChat, MockMemoryManager):
+    """
+    No history nor memories, one generation shared it is.
+    Follower's turn into its own session saved, its own usage recorded.
+    """
+    MockMemoryManager.return_value.get_user_memories.return_value = []
+
+    answers, recorded = await ask_concurrently(MockAgent, {"s1": None, "s2": None})
+
+    check.equal(answers, ["Hello world", "Hello world"])
+    check.equal(MockAgent.return_value.run.call_count, 1)
+    leader = MockAgent.return_value.run.call_args.kwargs["session_id"]
+    follower = ({"s1", "s2"} - {leader}).pop()
+    saved = MockAgent.return_value.save_session.call_args.args[0]
+    check.equal(saved.session_id, follower)
+    check.equal(saved.runs[0].content, "Hello world")
+    check.equal(saved.runs[0].metadata["user_message"], "What is the policy?")
+    check.equal(sorted(m.session_id for m in recorded), ["s1", "s2"])
+    check.equal(next(m for m in recorded if m.session_id == follower).prompt_tokens, 0)
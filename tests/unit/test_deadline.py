@@ -0,0 +1,139 @@
+import time
+from dataclasses import dataclass
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+import app.agent.chat_agent as chat_agent_module
+from app.deadline import Deadline, StageTimeout, request_deadline
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.retrieval import RetrievalResult
+from app.knowledge.vector_store import PdfLanceDb
+from app.metrics import get_metrics
+
+BUDGETS = {"embedding": 0.05, "search": 0.05, "generation": 0.2}
+
+
+@dataclass
+class SlowEmbedder(HashEmbedder):
+    delay: float = 0.0
+
+    def get_embedding(self, text: str) -> list[float]:
+        time.sleep(self.delay)
+        return super().get_embedding(text)
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture(autouse=True)
+def reset_agent():
+    chat_agent_module._agent_instance = None
+    get_metrics().reset()
+    yield
+    chat_agent_module._agent_instance = None
+
+
+def test_deadline_caps_stage_budgets():
+    """
+    Little time left, smaller than the stage budget the timeout is.
+    """
+    deadline = Deadline(0.5, budgets={"embedding": 5, "search": 5, "generation": 50})
+    check.less_equal(deadline.budget("embedding", "search"), 0.5)
+    check.equal(Deadline(60, budgets=BUDGETS).budget("embedding", "search"), 0.1)
+
+    # Header shortens the default, never extends it
+    check.less_equal(request_deadline(10).remaining(), 10)
+    check.less_equal(request_deadline(10_000).remaining(), 60)
+
+
+def test_slow_embedding_skips_search(tmp_path):
+    """
+    Embedding over its budget, no search started it is.
+    """
+    store = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=SlowEmbedder())
+    store.insert("hash", [Document(content="Payment terms are net thirty days", name="terms.pdf")])
+    store.embedder.delay = 0.1
+
+    with patch.object(store, "search_by_vector") as mock_search, pytest.raises(StageTimeout) as error:
+        store.ranked_search("payment terms", 3, deadline=Deadline(60, budgets=BUDGETS))
+
+    check.equal(error.value.stage, "embedding")
+    mock_search.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_retrieval_timeout_answers_without_context(MockAgent, MockOpenAIChat):
+    """
+    Retrieval past its budget, without context the question answered is.
+    """
+    def slow_search(*args, **kwargs):
+        time.sleep(0.5)
+        return RetrievalResult(documents=[Document(content="never used")], scores=[0.9])
+
+    MockAgent.return_value.run.return_value = iter([FakeChunk("No idea.")])
+    with patch("app.agent.chat_agent.get_knowledge"), \
+            patch("app.agent.chat_agent.adaptive_search", side_effect=slow_search):
+        agent = chat_agent_module.get_agent()
+        events = [e async for e in agent.stream_events(
+            "When does the contract renew?", "s1", coalesce=False, deadline=Deadline(60, budgets=BUDGETS))]
+
+    check.equal([e.type for e in events], ["sources", "token", "done"])
+    check.equal(events[0].data["mode"], "none")
+    check.equal(events[-1].data["timeouts"], ["embedding"])
+    check.equal(MockAgent.return_value.run.call_args.args[0], "When does the contract renew?")
+    check.equal(get_metrics().snapshot()["counters"]["timeouts.embedding"], 1)
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_generation_timeout_ends_stream_with_error(MockAgent, MockOpenAIChat):
+    """
+    Model hangs, an error event after the generation budget it gets.
+    """
+    def hanging_stream():
+        yield FakeChunk("Partial")
+        time.sleep(1)
+        yield FakeChunk(" never sent")
+
+    MockAgent.return_value.run.return_value = hanging_stream()
+    with patch("app.agent.chat_agent.get_knowledge"), \
+            patch("app.agent.chat_agent.adaptive_search", return_value=RetrievalResult()):
+        agent = chat_agent_module.get_agent()
+        start = time.monotonic()
+        events = [e async for e in agent.stream_events(
+            "Hello", "s1", coalesce=False, deadline=Deadline(60, budgets=BUDGETS))]
+
+    check.less(time.monotonic() - start, 0.9)
+    check.equal([e.type for e in events], ["sources", "token", "error"])
+    check.is_in("generation timed out", events[-1].data["message"])
+    check.equal(get_metrics().snapshot()["counters"]["timeouts.generation"], 1)
+
+
+def test_deadline_header_reaches_agent(client):
+    """
+    X-Request-Timeout header, the deadline of the agent call it sets.
+    """
+    seen = {}
+
+    async def fake_stream(message, deadline=None, **kwargs):
+        seen["remaining"] = deadline.remaining()
+        yield "ok"
+
+    mock_agent = MagicMock()
+    mock_agent.stream_response = fake_stream
+    with patch("app.api.chat_routes.get_agent", return_value=mock_agent):
+        response = client.post("/api/chat", json={"message": "hi"}, headers={"X-Request-Timeout": "2.5"})
+        invalid = client.post("/api/chat", json={"message": "hi"}, headers={"X-Request-Timeout": "-1"})
+
+    check.equal(response.status_code, 200)
+    check.less_equal(seen["remaining"], 2.5)
+    check.greater(seen["remaining"], 0)
+    check.equal(invalid.status_code, 422)
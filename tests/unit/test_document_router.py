@@ -0,0 +1,39 @@
+import pytest_check as check
+from unittest.mock import patch
+
+FILE_ID = "0f8e4c1a-2b3d-4e5f-8a9b-0c1d2e3f4a5b"
+
+
+def test_delete_document_returns_counts(client):
+    """
+    Document deleted, removal counts returned they are.
+    """
+    removed = {"rows": 4, "contents": 1, "files": 1}
+    with patch("app.api.document_routes.delete_document", return_value=removed) as mock_delete:
+        response = client.delete(f"/api/documents/{FILE_ID}", headers={"X-Tenant-ID": "acme"})
+
+    check.equal(response.status_code, 200)
+    check.equal(response.json()["removed"], removed)
+    mock_delete.assert_called_once_with(FILE_ID, tenant="acme")
+
+
+def test_delete_unknown_document_is_404(client):
+    """
+    Nothing removed, not found the document is.
+    """
+    removed = {"rows": 0, "contents": 0, "files": 0}
+    with patch("app.api.document_routes.delete_document", return_value=removed):
+        response = client.delete(f"/api/documents/{FILE_ID}")
+
+    check.equal(response.status_code, 404)
+
+
+def test_delete_with_invalid_id_is_400(client):
+    """
+    Not a UUID, a wildcard least of all, rejected before anything deleted it is.
+    """
+    with patch("app.api.document_routes.delete_document") as mock_delete:
+        response = client.delete("/api/documents/%2A")
+
+    check.equal(response.status_code, 400)
+    mock_delete.assert_not_called()
@@ -0,0 +1,101 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.health import HealthChecker, probe_lancedb, probe_sqlite
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.vector_store import PdfLanceDb
+
+
+def make_checker(probes, timeout_seconds: float = 1, cache_seconds: float = 0) -> HealthChecker:
+    return HealthChecker(probes=probes, timeout_seconds=timeout_seconds, cache_seconds=cache_seconds)
+
+
+def test_sqlite_probe_counts_rows(tmp_path):
+    """
+    Rows of every table counted, missing files reported not failed.
+    """
+    db_file = tmp_path / "agno.db"
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("CREATE TABLE agno_sessions (id TEXT)")
+        conn.executemany("INSERT INTO agno_sessions VALUES (?)", [("a",), ("b",)])
+
+    result = probe_sqlite(db_file, timeout_seconds=1)
+    check.equal(result["tables"], {"agno_sessions": 2})
+    check.is_true(result["exists"])
+    check.equal(probe_sqlite(tmp_path / "missing.db", timeout_seconds=1), {"exists": False, "tables": {}})
+
+
+def test_lancedb_probe_reports_rows_and_version(tmp_path):
+    """
+    Table opened and searched, rows and version reported.
+    """
+    store = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=HashEmbedder())
+    store.insert("hash", [Document(content=text, name="terms.pdf") for text in ("one", "two", "three")])
+
+    with patch("app.health.get_knowledge", return_value=SimpleNamespace(vector_db=store)):
+        result = probe_lancedb()
+
+    check.equal(result["rows"], 3)
+    check.equal(result["version"], store.version)
+    check.is_true(result["exists"])
+    check.is_in("search_ms", result)
+
+
+@pytest.mark.asyncio
+async def test_failing_and_slow_probes_make_report_unhealthy():
+    """
+    Error or timeout of one dependency, unhealthy the report is, latency still given.
+    """
+    def broken():
+        raise RuntimeError("database is locked")
+
+    checker = make_checker({
+        "ok": lambda: {"rows": 1},
+        "broken": broken,
+        "slow": lambda: time.sleep(0.5) or {},
+    }, timeout_seconds=0.1)
+    report = await checker.check()
+
+    check.equal(report["status"], "unhealthy")
+    check.equal(report["dependencies"]["ok"]["status"], "ok")
+    check.equal(report["dependencies"]["ok"]["rows"], 1)
+    check.equal(report["dependencies"]["broken"]["error"], "database is locked")
+    check.equal(report["dependencies"]["slow"]["status"], "timeout")
+    check.less(report["dependencies"]["slow"]["latency_ms"], 400)
+
+
+@pytest.mark.asyncio
+async def test_report_cached_between_polls():
+    """
+    Within the cache window, probes not run again.
+    """
+    calls = []
+    checker = make_checker({"ok": lambda: calls.append(1) or {}}, cache_seconds=60)
+
+    first = await checker.check()
+    second = await checker.check()
+
+    check.equal(len(calls), 1)
+    check.is_false(first["cached"])
+    check.is_true(second["cached"])
+
+
+def test_health_details_endpoint(client):
+    """
+    Unhealthy dependency, 503 the endpoint returns.
+    """
+    def model_down():
+        raise ConnectionError("down")
+
+    checker = make_checker({"model": model_down})
+    with patch("app.main.get_health_checker", return_value=checker):
+        response = client.get("/health/details")
+
+    check.equal(response.status_code, 503)
+    check.equal(response.json()["dependencies"]["model"]["status"], "error")
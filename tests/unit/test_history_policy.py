@@ -0,0 +1,148 @@
+import pytest
+import pytest_check as check
+from unittest.mock import MagicMock
+
+from agno.models.message import Message
+from agno.run.agent import RunOutput
+from agno.run.base import RunStatus
+from agno.session.agent import AgentSession
+from agno.session.summary import SessionSummary
+
+from app.agent.history import FOLDED_RUNS_KEY, SessionHistoryManager, estimate_tokens
+
+
+def make_run(i: int, answer: str = "answer") -> RunOutput:
+    """
+    Completed run builds, one question and one answer it holds.
+    """
+    return RunOutput(
+        run_id=f"run_{i}",
+        content=f"{answer} {i}",
+        status=RunStatus.completed,
+        metadata={"user_message": f"question {i}"},
+        messages=[
+            Message(role="system", content="system prompt"),
+            Message(role="user", content=f"question {i}"),
+            Message(role="assistant", content=f"{answer} {i}"),
+        ],
+    )
+
+
+def make_manager(session: AgentSession, max_turns: int = 2, max_tokens: int = 3000):
+    """
+    History manager with fake agent and summary manager, it builds.
+    """
+    agent = MagicMock()
+    agent.get_session.return_value = session
+    summary_manager = MagicMock()
+    summary_manager.create_session_summary.return_value = SessionSummary(
+        summary="they talked")
+    manager = SessionHistoryManager(
+        agent=agent,
+        summary_manager=summary_manager,
+        max_turns=max_turns,
+        max_tokens=max_tokens,
+    )
+    return manager, agent, summary_manager
+
+
+def test_estimate_tokens():
+    """
+    Token estimate, four characters per token it assumes.
+    """
+    check.equal(estimate_tokens(None), 0)
+    check.equal(estimate_tokens("abcd" * 10), 10)
+
+
+def test_refresh_folds_turns_outside_window():
+    """
+    Older turns folded, last turns verbatim kept they are.
+    """
+    session = AgentSession(session_id="s1", runs=[make_run(i) for i in range(5)])
+    manager, agent, summary_manager = make_manager(session, max_turns=2)
+
+    check.is_true(manager._refresh("s1"))
+
+    folded_turns = summary_manager.create_session_summary.call_args.args[0]
+    questions = [m.content for m in folded_turns.get_messages() if m.role == "user"]
+    check.equal(questions, ["question 0", "question 1", "question 2"])
+
+    check.equal(session.session_data[FOLDED_RUNS_KEY], 3)
+    check.equal(session.summary.summary, "they talked")
+    check.is_true(all(m.from_history for m in session.runs[0].messages))
+    check.is_false(any(m.from_history for m in session.runs[4].messages))
+    agent.save_session.assert_called_once_with(session)
+
+
+def test_refresh_respects_token_ceiling():
+    """
+    Token ceiling exceeded, more turns folded must be.
+    """
+    long_answer = "x" * 400
+    session = AgentSession(
+        session_id="s2", runs=[make_run(i, long_answer) for i in range(4)])
+    manager, _, _ = make_manager(session, max_turns=4, max_tokens=150)
+
+    check.is_true(manager._refresh("s2"))
+    check.equal(session.session_data[FOLDED_RUNS_KEY], 3)
+
+
+def test_refresh_skips_when_window_not_full():
+    """
+    Nothing to fold, no summary call made.
+    """
+    session = AgentSession(session_id="s3", runs=[make_run(0)])
+    manager, agent, summary_manager = make_manager(session, max_turns=2)
+
+    check.is_false(manager._refresh("s3"))
+    summary_manager.create_session_summary.assert_not_called()
+    agent.save_session.assert_not_called()
+
+
+def test_refresh_defers_while_turn_active():
+    """
+    Turn in flight, summary not saved, overwritten it would be.
+    """
+    session = AgentSession(session_id="s4", runs=[make_run(i) for i in range(4)])
+    manager, agent, _ = make_manager(session, max_turns=1)
+    manager.begin_turn("s4")
+
+    check.is_false(manager._refresh("s4"))
+    agent.save_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_end_turn_schedules_background_refresh():
+    """
+    Turn ended, refresh in background scheduled it is.
+    """
+    session = AgentSession(session_id="s5", runs=[make_run(i) for i in range(3)])
+    manager, agent, _ = make_manager(session, max_turns=1)
+
+    manager.begin_turn("s5")
+    manager.end_turn("s5")
+    check.equal(len(manager._tasks), 1)
+
+    await next(iter(manager._tasks))
+    agent.save_session.assert_called_once()
+
+
+def test_record_turn_saves_into_stored_session(tmp_path):
+    """
+    Turn answered elsewhere, into the session saved, as history read back it is.
+    """
+    from agno.agent import Agent
+    from agno.db.sqlite import SqliteDb
+
+    agent = Agent(name="test", db=SqliteDb(db_file=str(tmp_path / "agno.db")))
+    agent.set_id()
+    manager = SessionHistoryManager(agent=agent, summary_manager=MagicMock(), max_turns=2, max_tokens=3000)
+    check.is_false(manager.has_context("s1"))
+
+    manager.record_turn("s1", "question 0", "answer 0", {"coalesced": True})
+
+    check.is_true(manager.has_context("s1"))
+    session = agent.get_session(session_id="s1")
+    check.equal([(m.role, m.content) for m in session.get_messages()],
+                [("user", "question 0"), ("assistant", "answer 0")])
+    check.equal(session.runs[0].metadata, {"coalesced": True, "user_message": "question 0"})
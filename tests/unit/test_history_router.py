@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest_check as check
+from agno.db.sqlite import SqliteDb
+from agno.run.agent import RunOutput
+from agno.run.base import RunStatus
+from agno.session.agent import AgentSession
+
+from app.agent.history import history_page
+
+
+def make_session(session_id: str, turns: int) -> AgentSession:
+    """
+    Session of completed turns, one failed run among them.
+    """
+    runs = [
+        RunOutput(run_id=f"run_{i}", agent_id="rag", content=f"answer {i}", status=RunStatus.completed,
+                  metadata={"user_message": f"question {i}"}, created_at=1000 + i)
+        for i in range(turns)
+    ]
+    runs.insert(2, RunOutput(run_id="failed", agent_id="rag", content="partial", status=RunStatus.error))
+    return AgentSession(session_id=session_id, runs=runs, created_at=1000)
+
+
+def test_history_pages_newest_first():
+    """
+    Newest page first, older pages with the cursor, oldest first inside a page.
+    """
+    session = make_session("s1", 5)
+
+    newest = history_page(session, None, 2)
+    check.equal([m["content"] for m in newest["messages"]],
+                ["question 3", "answer 3", "question 4", "answer 4"])
+    check.equal(newest["before"], 3)
+    check.equal(newest["total_turns"], 5)
+
+    older = history_page(session, newest["before"], 2)
+    check.equal([m["turn"] for m in older["messages"]], [1, 1, 2, 2])
+    last = history_page(session, older["before"], 2)
+    check.equal([m["content"] for m in last["messages"]], ["question 0", "answer 0"])
+    check.is_none(last["before"])
+
+    check.equal(history_page(None, None, 2), {"messages": [], "before": None, "total_turns": 0})
+
+
+def test_history_endpoint_reads_tenant_session(client, tmp_path):
+    """
+    Session of the tenant from the store read, unknown sessions empty they are.
+    """
+    db = SqliteDb(db_file=str(tmp_path / "agno.db"))
+    db.upsert_session(make_session("acme:s1", 3))
+
+    with patch("app.api.history_routes.get_db", return_value=db):
+        response = client.get("/api/sessions/s1/history?limit=2", headers={"X-Tenant-ID": "acme"})
+        other = client.get("/api/sessions/s1/history")
+
+    check.equal(response.status_code, 200)
+    body = response.json()
+    check.equal(body["session_id"], "s1")
+    check.equal(body["total_turns"], 3)
+    check.equal(body["before"], 1)
+    check.equal(body["messages"][0], {"role": "user", "content": "question 1", "turn": 1, "created_at": 1001})
+    check.equal(other.json()["messages"], [])
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.knowledge import store
+from app.knowledge.maintenance import compact_table
+from app.knowledge.store import delete_document
+from app.knowledge.versioning import ingest_pages
+from tests.fakes import make_knowledge
+
+
+def page_docs(texts: list[str], name: str) -> list[Document]:
+    """
+    Page documents build, one per text.
+    """
+    return [
+        Document(name=name, id=f"{name}_{n}", meta_data={"page": n}, content=text)
+        for n, text in enumerate(texts, start=1)
+    ]
+
+
+def test_delete_document_removes_rows_contents_and_upload(tmp_path):
+    """
+    Document deleted, rows, contents entry and upload file gone they are.
+    """
+    knowledge = make_knowledge(tmp_path)
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    upload = uploads / "abc_manual.pdf"
+    upload.write_bytes(b"%PDF")
+
+    with patch.object(store, "UPLOAD_DIR", uploads):
+        kept = ingest_pages(page_docs(["Other text here."], "other.pdf"), "other.pdf", "other",
+                            knowledge=knowledge)
+        result = ingest_pages(page_docs(["First page.", "Second page."], "manual.pdf"), "manual.pdf",
+                              "manual", knowledge=knowledge, upload_file=upload.name)
+
+        removed = delete_document(result.document_id, knowledge=knowledge)
+
+    check.equal(removed, {"rows": result.chunks, "contents": 1, "files": 1})
+    check.is_false(upload.exists())
+    check.is_none(knowledge.contents_db.get_knowledge_content(result.document_id))
+    check.equal(knowledge.vector_db.get_count(), kept.chunks)
+
+
+def test_delete_unknown_document_removes_nothing(tmp_path):
+    """
+    Unknown id, nothing removed it reports.
+    """
+    knowledge = make_knowledge(tmp_path)
+    with patch.object(store, "UPLOAD_DIR", tmp_path):
+        removed = delete_document("0f8e4c1a-2b3d-4e5f-8a9b-0c1d2e3f4a5b", knowledge=knowledge)
+
+    check.equal(removed, {"rows": 0, "contents": 0, "files": 0})
+
+
+def test_delete_document_never_globs_other_uploads(tmp_path):
+    """
+    Pattern characters in the id, rejected they are; only the recorded upload removed is.
+    """
+    knowledge = make_knowledge(tmp_path)
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    upload = uploads / "manual_upload.pdf"
+    upload.write_bytes(b"%PDF")
+    bystander = uploads / "0f8e4c1a-2b3d-4e5f-8a9b-0c1d2e3f4a5b_other.pdf"
+    bystander.write_bytes(b"%PDF")
+
+    with patch.object(store, "UPLOAD_DIR", uploads):
+        result = ingest_pages(page_docs(["First page."], "manual.pdf"), "manual.pdf", "manual",
+                              knowledge=knowledge, upload_file=upload.name)
+        with pytest.raises(ValueError):
+            delete_document("*", knowledge=knowledge)
+        removed = delete_document(result.document_id, knowledge=knowledge)
+
+    check.equal(removed["files"], 1)
+    check.is_false(upload.exists())
+    check.is_true(bystander.exists())
+
+
+def test_delete_document_stays_in_tenant_upload_dir(tmp_path):
+    """
+    Same upload name in two tenants, only the deleting tenant's file removed is.
+    """
+    knowledge = make_knowledge(tmp_path)
+    uploads = tmp_path / "uploads"
+
+    with patch.object(store, "UPLOAD_DIR", uploads):
+        theirs = store.upload_dir() / "manual_upload.pdf"
+        ours = store.upload_dir("acme") / "manual_upload.pdf"
+        for path in (theirs, ours):
+            path.write_bytes(b"%PDF")
+        result = ingest_pages(page_docs(["First page."], "manual.pdf"), "manual.pdf", "manual",
+                              knowledge=knowledge, upload_file=ours.name, tenant="acme")
+        removed = delete_document(result.document_id, knowledge=knowledge, tenant="acme")
+
+    check.equal(ours.parent, uploads / "acme")
+    check.equal(removed["files"], 1)
+    check.is_false(ours.exists())
+    check.is_true(theirs.exists())
+
+
+def test_compact_table_merges_fragments_and_prunes_versions(tmp_path):
+    """
+    Many small appends, into fewer fragments and versions compacted they are.
+    """
+    vector_db = make_knowledge(tmp_path).vector_db
+    for i in range(8):
+        vector_db.insert(f"hash{i}", [Document(content=f"document number {i} text", name="doc")])
+    vector_db.delete_rows([vector_db.row_id("x", "y")])
+
+    report = compact_table(vector_db, retention=timedelta(0), retrain_ratio=0.25)
+
+    check.less(report.fragments_after, report.fragments_before)
+    check.less(report.versions_after, report.versions_before)
+    check.greater(report.reclaimed_bytes, 0)
+    check.greater(report.latency_before_ms, 0)
+    check.equal(vector_db.get_count(), 8)
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+import pytest_check as check
+from unittest.mock import MagicMock
+
+from app.agent.memory_queue import MemoryExtractionQueue
+from app.metrics import get_metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+
+@pytest.mark.asyncio
+async def test_turns_batched_per_extraction_call():
+    """
+    Turns batched, one extraction call per batch made it is.
+    """
+    memory_manager = MagicMock()
+    queue = MemoryExtractionQueue(
+        memory_manager=memory_manager, agent_id="agent", every=2, concurrency=1)
+
+    queue.enqueue("user_1", "I like tea")
+    check.equal(memory_manager.create_user_memories.call_count, 0)
+
+    queue.enqueue("user_1", "My name is Ana")
+    await queue.flush()
+
+    memory_manager.create_user_memories.assert_called_once()
+    kwargs = memory_manager.create_user_memories.call_args.kwargs
+    check.equal([m.content for m in kwargs["messages"]], ["I like tea", "My name is Ana"])
+    check.equal(kwargs["user_id"], "user_1")
+
+    snapshot = get_metrics().snapshot()
+    check.equal(snapshot["counters"]["memory.turns_extracted"], 2)
+    check.equal(snapshot["summaries"]["memory.extraction_seconds"]["count"], 1)
+
+
+@pytest.mark.asyncio
+async def test_flush_extracts_partial_batches():
+    """
+    Flush called, partial batches extracted they are.
+    """
+    memory_manager = MagicMock()
+    queue = MemoryExtractionQueue(
+        memory_manager=memory_manager, agent_id="agent", every=5, concurrency=2)
+
+    queue.enqueue("user_1", "hello")
+    queue.enqueue("user_2", "hi")
+    await queue.flush()
+
+    check.equal(memory_manager.create_user_memories.call_count, 2)
+
+
+@pytest.mark.asyncio
+async def test_disabled_queue_extracts_nothing():
+    """
+    Zero frequency, extraction disabled it is.
+    """
+    memory_manager = MagicMock()
+    queue = MemoryExtractionQueue(
+        memory_manager=memory_manager, agent_id="agent", every=0, concurrency=1)
+
+    queue.enqueue("user_1", "hello")
+    await queue.flush()
+
+    memory_manager.create_user_memories.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_extraction_failure_counted():
+    """
+    Extraction fails, counted not raised it is.
+    """
+    memory_manager = MagicMock()
+    memory_manager.create_user_memories.side_effect = RuntimeError("boom")
+    queue = MemoryExtractionQueue(
+        memory_manager=memory_manager, agent_id="agent", every=1, concurrency=1)
+
+    queue.enqueue("user_1", "hello")
+    await queue.flush()
+
+    check.equal(get_metrics().snapshot()["counters"]["memory.failures"], 1)
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_extracted_after_max_wait():
+    """
+    Session ended before the batch filled, after the wait its turns extracted are.
+    """
+    memory_manager = MagicMock()
+    queue = MemoryExtractionQueue(
+        memory_manager=memory_manager, agent_id="agent", every=3, concurrency=1, max_wait_seconds=0.05)
+
+    queue.enqueue("user_1", "I like tea")
+    await asyncio.sleep(0.1)
+    await queue.flush()
+
+    memory_manager.create_user_memories.assert_called_once()
+    check.equal(get_metrics().snapshot()["counters"]["memory.expired_batches"], 1)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_flushes_pending_turns():
+    """
+    App shutting down, pending turns of the agent extracted they are.
+    """
+    import app.agent.chat_agent as chat_agent_module
+    from app.main import app, lifespan
+
+    agent = MagicMock()
+    agent.memories = MemoryExtractionQueue(
+        memory_manager=MagicMock(), agent_id="agent", every=3, concurrency=1)
+    agent.memories.enqueue("user_1", "hello")
+    chat_agent_module._agent_instance = agent
+    try:
+        async with lifespan(app):
+            pass
+    finally:
+        chat_agent_module._agent_instance = None
+
+    agent.memories.memory_manager.create_user_memories.assert_called_once()
@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+import app.agent.chat_agent as chat_agent_module
+from app.agent.prefetch import PrefetchCache, get_prefetch_cache
+from app.knowledge.retrieval import RetrievalResult
+
+RESULT = RetrievalResult(
+    documents=[Document(content="Renewal is in March", name="contract", meta_data={"file_id": "f1"})],
+    scores=[0.8],
+    candidates=5,
+)
+
+
+def make_cache(ttl_seconds: float = 30) -> PrefetchCache:
+    return PrefetchCache(ttl_seconds=ttl_seconds, match_ratio=0.9, max_entries=8)
+
+
+def test_close_enough_text_reuses_prefetch():
+    """
+    Draft and sent text nearly equal, the prefetch reused is, once only.
+    """
+    cache = make_cache()
+    token = cache.put("When does the contract ren", "default", None, RESULT)
+
+    check.is_none(cache.take("unknown", "When does the contract renew?", "default", None))
+    check.is_true(cache.take(token, "When does the contract renew?", "default", None) is RESULT)
+    check.is_none(cache.take(token, "When does the contract renew?", "default", None))
+
+
+def test_different_text_or_scope_not_reused():
+    """
+    Other question, tenant or filters, a fresh retrieval they need.
+    """
+    cache = make_cache()
+    scoped = {"file_id": ["f1"]}
+
+    token = cache.put("When does the contract renew", "default", scoped, RESULT)
+    check.is_none(cache.take(token, "What are the payment terms?", "default", scoped))
+
+    token = cache.put("When does the contract renew", "default", scoped, RESULT)
+    check.is_none(cache.take(token, "When does the contract renew", "acme", scoped))
+
+    token = cache.put("When does the contract renew", "default", scoped, RESULT)
+    check.is_none(cache.take(token, "When does the contract renew", "default", None))
+
+
+def test_expired_prefetch_not_reused():
+    """
+    Token past its lifetime, dropped it is.
+    """
+    cache = make_cache(ttl_seconds=0)
+    token = cache.put("When does the contract renew", "default", None, RESULT)
+    check.is_none(cache.take(token, "When does the contract renew", "default", None))
+
+
+def test_prefetch_endpoint_returns_token(client):
+    """
+    Draft searched, token of its retrieval returned.
+    """
+    with patch("app.api.chat_routes.get_knowledge"), \
+            patch("app.api.chat_routes.adaptive_search", return_value=RESULT) as mock_search:
+        response = client.post("/api/chat/prefetch", json={"message": "When does the contract renew"},
+                               headers={"X-Tenant-ID": "acme"})
+
+    check.equal(response.status_code, 200)
+    body = response.json()
+    check.equal(body["results"], 1)
+    mock_search.assert_called_once()
+    check.is_true(get_prefetch_cache().take(
+        body["prefetch_token"], "When does the contract renew?", "acme", None) is RESULT)
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_stream_reuses_prefetched_retrieval(MockAgent, MockOpenAIChat):
+    """
+    Valid token sent, no search on the critical path happens.
+    """
+    chat_agent_module._agent_instance = None
+    MockAgent.return_value.run.return_value = iter([MagicMock(content="In March.")])
+    token = get_prefetch_cache().put("When does the contract renew", "default", None, RESULT)
+
+    with patch("app.agent.chat_agent.get_knowledge"), \
+            patch("app.agent.chat_agent.adaptive_search") as mock_search:
+        agent = chat_agent_module.get_agent()
+        events = [e async for e in agent.stream_events(
+            "When does the contract renew?", "s1", coalesce=False, prefetch_token=token)]
+
+    mock_search.assert_not_called()
+    check.equal(events[0].data["sources"][0]["file_id"], "f1")
+    check.is_in("Renewal is in March", MockAgent.return_value.run.call_args.args[0])
+    chat_agent_module._agent_instance = None
@@ -0,0 +1,195 @@
+import time
+
+import httpx
+import openai
+import pytest
+import pytest_check as check
+
+from app.metrics import get_metrics
+from app.resilience import (
+    CircuitBreaker,
+    CircuitOpen,
+    LatencyWindow,
+    Resilience,
+    ResilientOpenAIEmbedder,
+    is_transient,
+)
+from tests.fakes import FakeOpenAIServer
+
+REQUEST = httpx.Request("POST", "http://fake-openai/v1/embeddings")
+
+
+def status_error(code: int) -> openai.APIStatusError:
+    return openai.APIStatusError("injected", response=httpx.Response(code, request=REQUEST), body=None)
+
+
+def make_policy(attempts: int = 3, threshold: int = 10, reset_seconds: float = 30, **kwargs) -> Resilience:
+    return Resilience(
+        name="embedder",
+        breaker=CircuitBreaker("embedder", failure_threshold=threshold, reset_seconds=reset_seconds),
+        attempts=attempts,
+        base_delay=0.001,
+        max_delay=0.01,
+        **kwargs,
+    )
+
+
+def make_embedder(server: FakeOpenAIServer, policy: Resilience) -> ResilientOpenAIEmbedder:
+    return ResilientOpenAIEmbedder(dimensions=server.dimensions, openai_client=server.client(), resilience=policy)
+
+
+@pytest.fixture
+def server():
+    get_metrics().reset()
+    return FakeOpenAIServer()
+
+
+def test_transient_errors():
+    """
+    Rate limits, server errors and dropped connections retried; bad requests not.
+    """
+    check.is_true(is_transient(status_error(503)))
+    check.is_true(is_transient(status_error(429)))
+    check.is_true(is_transient(openai.APIConnectionError(request=REQUEST)))
+    check.is_false(is_transient(status_error(400)))
+    check.is_false(is_transient(ValueError("bad input")))
+
+    wrapped = RuntimeError("provider failed")
+    wrapped.__cause__ = status_error(502)
+    check.is_true(is_transient(wrapped))
+
+
+def test_embedder_retries_server_errors(server):
+    """
+    Two injected 5xx, on the third try the embedding arrives.
+    """
+    server.inject(500, 503)
+    embedder = make_embedder(server, make_policy())
+
+    check.equal(len(embedder.get_embedding("contract renewal")), server.dimensions)
+    check.equal(server.requests, 3)
+    counters = get_metrics().snapshot()["counters"]
+    check.equal(counters["embedder.failures"], 2)
+    check.equal(counters["embedder.retries"], 2)
+
+
+def test_bad_request_not_retried(server):
+    """
+    A 400, once only sent it is.
+    """
+    server.inject(400)
+    embedder = make_embedder(server, make_policy())
+
+    with pytest.raises(openai.BadRequestError):
+        embedder.response("contract renewal")
+    check.equal(server.requests, 1)
+
+
+def test_circuit_opens_then_recovers(server):
+    """
+    Failures past the threshold, fast failures without requests; after the reset one trial closes it.
+    """
+    policy = make_policy(attempts=1, threshold=2, reset_seconds=0.05)
+    embedder = make_embedder(server, policy)
+    server.inject(500, 500)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            embedder.response("text")
+    with pytest.raises(CircuitOpen):
+        embedder.response("text")
+    check.equal(server.requests, 2)
+    check.equal(policy.breaker.state, "open")
+
+    time.sleep(0.06)
+    check.equal(policy.breaker.state, "half_open")
+    embedder.response("text")
+    check.equal(policy.breaker.state, "closed")
+    check.equal(get_metrics().snapshot()["counters"]["circuit.embedder.opened"], 1)
+
+
+@pytest.mark.asyncio
+async def test_async_batch_embeddings_retried(server):
+    """
+    Batch embeddings of uploads, a 429 and a 5xx retried they are, never hedged.
+    """
+    server.inject(429, 503)
+    policy = make_policy(hedge_quantile=0.95, latencies=LatencyWindow(min_samples=1))
+    embedder = make_embedder(server, policy)
+    embedder.batch_size = 2
+
+    embeddings, usages = await embedder.async_get_embeddings_batch_and_usage(["a", "b", "c"])
+
+    check.equal([len(e) for e in embeddings], [server.dimensions] * 3)
+    check.equal([u["total_tokens"] for u in usages], [4, 4, 2])
+    check.equal(server.requests, 4)
+    check.equal(get_metrics().snapshot()["counters"]["embedder.retries"], 2)
+    check.is_none(policy.latencies.quantile(0.95))
+
+
+@pytest.mark.asyncio
+async def test_async_batch_fails_fast_while_circuit_open(server):
+    """
+    Circuit open, batch embeddings without a request fail, never empty vectors stored.
+    """
+    policy = make_policy(attempts=1, threshold=1)
+    embedder = make_embedder(server, policy)
+    server.inject(500)
+
+    with pytest.raises(openai.InternalServerError):
+        await embedder.async_get_embeddings_batch_and_usage(["a"])
+    with pytest.raises(CircuitOpen):
+        await embedder.async_get_embeddings_batch_and_usage(["a"])
+    check.equal(server.requests, 1)
+
+
+def test_slow_embedding_hedged(server):
+    """
+    Call slower than the p95, a duplicate sent; the fast one wins.
+    """
+    policy = make_policy(hedge_quantile=0.95, hedge_min_delay=0.01, latencies=LatencyWindow(min_samples=5))
+    embedder = make_embedder(server, policy)
+    for _ in range(5):
+        embedder.response("warm up")
+
+    server.inject(0.5)
+    start = time.perf_counter()
+    embedder.response("text")
+
+    check.less(time.perf_counter() - start, 0.4)
+    check.equal(server.requests, 7)
+    counters = get_metrics().snapshot()["counters"]
+    check.equal(counters["embedder.hedges"], 1)
+    check.equal(counters["embedder.hedge_wins"], 1)
+
+
+def test_stream_retried_only_before_first_item():
+    """
+    Failure before the first token retried; after it, no replay.
+    """
+    policy = make_policy()
+    calls = []
+
+    def flaky_start():
+        calls.append(1)
+        if len(calls) == 1:
+            raise openai.APIConnectionError(request=REQUEST)
+        yield "Hello"
+        yield " world"
+
+    check.equal(list(policy.stream(flaky_start)), ["Hello", " world"])
+    check.equal(len(calls), 2)
+
+    calls.clear()
+
+    def broken_midway():
+        calls.append(1)
+        yield "Hello"
+        raise openai.APIConnectionError(request=REQUEST)
+
+    received = []
+    with pytest.raises(openai.APIConnectionError):
+        for item in policy.stream(broken_midway):
+            received.append(item)
+    check.equal(received, ["Hello"])
+    check.equal(len(calls), 1)
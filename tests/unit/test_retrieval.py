@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.config import settings
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.retrieval import adaptive_search, select_by_score
+from app.knowledge.vector_store import PdfLanceDb
+from app.metrics import get_metrics
+from tests.fakes import DOCS
+
+@pytest.fixture
+def knowledge(tmp_path):
+    """
+    Knowledge over five unrelated chunks, hash embedder it uses.
+    """
+    vector_db = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=HashEmbedder())
+    vector_db.insert("hash", [Document(content=text, name="terms.pdf") for text in DOCS])
+    get_metrics().reset()
+    return SimpleNamespace(vector_db=vector_db)
+
+
+@pytest.mark.parametrize("scores, min_k, expected", [
+    ([0.9, 0.85, 0.5, 0.4], 1, 2),     # Gap cuts the tail
+    ([0.9, 0.2, 0.1], 1, 1),           # Threshold cuts the rest
+    ([0.25, 0.2], 1, 0),               # Nothing passes, no context
+    ([0.9, 0.88, 0.87, 0.86], 1, 3),   # Max k caps
+    ([0.9, 0.5, 0.45], 2, 2),          # Min k refills from threshold passers
+])
+def test_select_by_score(scores, min_k, expected):
+    """
+    Threshold, relative gap, min and max k, together they decide.
+    """
+    check.equal(select_by_score(scores, min_k=min_k, max_k=3, min_score=0.3, relative_gap=0.1), expected)
+
+
+def test_relevant_query_keeps_only_close_matches(knowledge):
+    """
+    One clearly matching chunk, alone it is kept and tokens saved are.
+    """
+    result = adaptive_search(knowledge, "when is the contract renewal date")
+
+    check.equal([d.content for d in result.documents], [DOCS[0]])
+    check.equal(result.candidates, len(DOCS))
+    check.greater(result.tokens_saved, 0)
+    summary = get_metrics().snapshot()["summaries"]["retrieval.context_tokens_saved"]
+    check.equal(summary["avg"], result.tokens_saved)
+
+
+def test_irrelevant_query_skips_context(knowledge):
+    """
+    Nothing above the threshold, no chunks at all returned.
+    """
+    result = adaptive_search(knowledge, "quantum chromodynamics lecture")
+
+    check.equal(result.documents, [])
+    check.equal(get_metrics().snapshot()["counters"]["retrieval.context_skipped"], 1)
+
+
+def test_reranked_chunks_keep_their_own_scores(knowledge, monkeypatch):
+    """
+    Reranker the kept chunks reorders, each score with its chunk it moves.
+    Deeper than the fixed depth kept, no negative saving reported.
+    """
+    monkeypatch.setattr(settings, "retrieval_min_score", -1.0)
+    monkeypatch.setattr(settings, "retrieval_relative_gap", 0.0)
+    plain = adaptive_search(knowledge, "contract renewal days", max_k=5)
+    similarity = dict(zip((d.content for d in plain.documents), plain.scores))
+
+    knowledge.vector_db.reranker = MagicMock()
+    knowledge.vector_db.reranker.rerank.side_effect = lambda query, documents: documents[::-1]
+    result = adaptive_search(knowledge, "contract renewal days", max_k=5)
+
+    check.equal(len(result.documents), 5)
+    check.equal(result.documents[-1].content, plain.documents[0].content)
+    check.equal(result.scores, [similarity[d.content] for d in result.documents])
+    check.equal(result.tokens_saved, 0)
+
+
+def test_max_k_from_caller(knowledge):
+    """
+    Tool asks for fewer, fewer it gets.
+    """
+    result = adaptive_search(knowledge, "days", max_k=1)
+    check.equal(len(result.documents), 1)
+
+
+def test_other_vector_dbs_use_fixed_depth():
+    """
+    No scores available, plain knowledge search it falls back to.
+    """
+    knowledge = MagicMock()
+    knowledge.search.return_value = [Document(content="x")]
+
+    result = adaptive_search(knowledge, "anything", max_k=4)
+
+    check.equal(len(result.documents), 1)
+    knowledge.search.assert_called_once_with("anything", max_results=4, filters=None)
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.vector_store import PdfLanceDb
+from tests.fakes import DOCS
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Vector store of five chunks, two files across.
+    """
+    store = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=HashEmbedder())
+    store.insert("hash", [
+        Document(content=text, name="terms.pdf",
+                 meta_data={"file_id": "file-a" if i % 2 else "file-b", "page": i + 1})
+        for i, text in enumerate(DOCS)
+    ])
+    return store
+
+
+def search(client, store, body, **kwargs):
+    with patch("app.api.search_routes.get_knowledge",
+               return_value=SimpleNamespace(vector_db=store)) as mock_knowledge:
+        response = client.post("/api/search", json=body, **kwargs)
+    return response, mock_knowledge
+
+
+def test_search_returns_ranked_chunks_with_scores(client, store):
+    """
+    Best match first, scores, metadata and stage timings it returns.
+    """
+    response, _ = search(client, store, {"query": "contract renewal date", "top_k": 3})
+
+    check.equal(response.status_code, 200)
+    body = response.json()
+    results = body["results"]
+    check.equal([r["rank"] for r in results], [1, 2, 3])
+    check.equal(results[0]["content"], DOCS[0])
+    check.equal(results[0]["meta_data"]["page"], 1)
+    check.is_true(results[0]["score"] >= results[1]["score"] >= results[2]["score"])
+    check.is_true(0.0 < results[0]["score"] <= 1.0)
+    check.is_true({"embed_ms", "search_ms", "build_ms", "total_ms"} <= set(body["timings"]))
+    check.equal(body["table_version"], store.version)
+
+
+def test_search_pages_through_every_result(client, store):
+    """
+    Cursor followed, every chunk exactly once it yields.
+    """
+    seen, cursor, pages = [], None, 0
+    while True:
+        response, _ = search(client, store, {"query": "days", "top_k": 2, "cursor": cursor})
+        check.equal(response.status_code, 200)
+        body = response.json()
+        seen.extend(r["content"] for r in body["results"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    check.equal(pages, 3)
+    check.equal(sorted(seen), sorted(DOCS))
+
+
+def test_search_scoped_to_file_and_tenant(client, store):
+    """
+    File ids honoured, tenant from the header the knowledge picks.
+    """
+    response, mock_knowledge = search(
+        client, store, {"query": "days", "top_k": 10, "file_ids": ["file-a"]},
+        headers={"X-Tenant-ID": "acme"})
+
+    check.equal(response.status_code, 200)
+    check.is_true(all(r["meta_data"]["file_id"] == "file-a" for r in response.json()["results"]))
+    check.equal(len(response.json()["results"]), 2)
+    mock_knowledge.assert_called_once_with("acme")
+
+
+def test_search_rejects_stale_or_foreign_cursor(client, store):
+    """
+    Cursor of another query a 400 gives, after new uploads a 409.
+    """
+    first, _ = search(client, store, {"query": "days", "top_k": 1})
+    cursor = first.json()["next_cursor"]
+
+    other, _ = search(client, store, {"query": "contract", "top_k": 1, "cursor": cursor})
+    check.equal(other.status_code, 400)
+
+    store.insert("more", [Document(content="Refunds within thirty days", name="refunds.pdf")])
+    stale, _ = search(client, store, {"query": "days", "top_k": 1, "cursor": cursor})
+    check.equal(stale.status_code, 409)
+
+    garbage, _ = search(client, store, {"query": "days", "top_k": 1, "cursor": "not-a-cursor"})
+    check.equal(garbage.status_code, 400)
@@ -0,0 +1,183 @@
+import functools
+import io
+import sqlite3
+
+import lancedb
+import pytest
+import pytest_check as check
+from agno.db.schemas.knowledge import KnowledgeRow
+from agno.db.sqlite import SqliteDb
+from agno.knowledge.document import Document
+
+from app.config import settings
+from app.knowledge import snapshots
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.snapshots import (
+    export_snapshot,
+    extract_snapshot_tar,
+    import_snapshot,
+    iter_snapshot_tar,
+    list_snapshots,
+)
+from app.knowledge.store import contents_table_name
+from app.knowledge.summaries import SUMMARY_TABLE, DocumentSummary, SummaryStore
+from app.knowledge.vector_store import PdfLanceDb
+from app.knowledge.versioning import ingest_pages
+
+
+def make_source(path):
+    """
+    Source node build, default and tenant tables and a contents DB it has.
+    """
+    embedder = HashEmbedder(dimensions=32)
+    for table_name, count in [("pdf_knowledge", 3), ("pdf_knowledge__acme", 2)]:
+        vector_db = PdfLanceDb(table_name=table_name, uri=str(path / "lancedb"), embedder=embedder)
+        vector_db.insert("hash", [Document(content=f"text {i}", name="doc") for i in range(count)])
+    contents = SqliteDb(db_file=str(path / "contents.db"))
+    contents.get_knowledge_contents()
+    return embedder
+
+
+def test_export_import_round_trip(tmp_path):
+    """
+    Snapshot imported elsewhere, tables, indexes and contents DB the same they are.
+    Rows written after the export, left out they are.
+    """
+    make_source(tmp_path / "src")
+    source_uri = tmp_path / "src" / "lancedb"
+    manifest = export_snapshot(tmp_path / "snapshots", source_uri, tmp_path / "src" / "contents.db")
+
+    # Written after the export, not in the snapshot it must be
+    late = lancedb.connect(str(source_uri)).open_table("pdf_knowledge")
+    late.delete("true")
+
+    imported = import_snapshot(tmp_path / "snapshots" / manifest.snapshot_id,
+                               tmp_path / "dst" / "lancedb", tmp_path / "dst" / "contents.db")
+
+    connection = lancedb.connect(str(tmp_path / "dst" / "lancedb"))
+    check.equal(set(manifest.tables), {"default", "acme"})
+    check.equal(connection.open_table("pdf_knowledge").count_rows(), 3)
+    check.equal(connection.open_table("pdf_knowledge__acme").count_rows(), 2)
+    check.equal(imported.snapshot_id, manifest.snapshot_id)
+    check.is_in("file_id_idx", [i.name for i in connection.open_table("pdf_knowledge").list_indices()])
+    check.is_true((tmp_path / "dst" / "contents.db").exists())
+    check.equal([m.snapshot_id for m in list_snapshots(tmp_path / "snapshots")], [manifest.snapshot_id])
+
+
+def test_tar_stream_round_trip(tmp_path):
+    """
+    Streamed tar, back into the same snapshot extracted it is.
+    """
+    make_source(tmp_path / "src")
+    manifest = export_snapshot(tmp_path / "snapshots", tmp_path / "src" / "lancedb",
+                               tmp_path / "src" / "contents.db")
+    archive = b"".join(iter_snapshot_tar(tmp_path / "snapshots" / manifest.snapshot_id))
+
+    extracted = extract_snapshot_tar(io.BytesIO(archive), tmp_path / "other")
+
+    check.equal(extracted.name, manifest.snapshot_id)
+    check.is_true((extracted / "lancedb" / "pdf_knowledge.lance").is_dir())
+
+
+def test_import_rejects_other_dimensions(tmp_path):
+    """
+    Snapshot of other embedding dimensions, refused it is.
+    """
+    make_source(tmp_path / "src")
+    manifest = export_snapshot(tmp_path / "snapshots", tmp_path / "src" / "lancedb",
+                               tmp_path / "src" / "contents.db")
+    manifest_file = tmp_path / "snapshots" / manifest.snapshot_id / "manifest.json"
+    manifest_file.write_text(manifest_file.read_text().replace(
+        f'"embedding_dimensions": {manifest.embedding_dimensions}', '"embedding_dimensions": 7'))
+
+    with pytest.raises(ValueError):
+        import_snapshot(manifest_file.parent, tmp_path / "dst" / "lancedb", tmp_path / "dst" / "contents.db")
+
+
+def add_tenant_contents(path, tenants):
+    """
+    Contents row and summary per tenant, in the contents DB of a node written.
+    """
+    store = SummaryStore(db_file=path / "contents.db")
+    for tenant in tenants:
+        db = SqliteDb(db_file=str(path / "contents.db"), knowledge_table=contents_table_name(tenant))
+        db.upsert_knowledge_content(knowledge_row=KnowledgeRow(id="doc", name=f"{tenant}.pdf", description=""))
+        store.save(tenant, DocumentSummary(file_id="doc", filename="doc.pdf", summary=f"about {tenant}"))
+    return store
+
+
+def content_names(path, tenant):
+    """
+    Contents rows of a tenant, by name.
+    """
+    db = SqliteDb(db_file=str(path / "contents.db"), knowledge_table=contents_table_name(tenant))
+    return [row.name for row in db.get_knowledge_contents()[0]]
+
+
+def test_tenant_snapshot_holds_only_its_tenant(tmp_path):
+    """
+    Tenant snapshot, only that tenant's table, contents and summaries it carries.
+    Imported, the other tenants of the node untouched they stay.
+    """
+    make_source(tmp_path / "src")
+    add_tenant_contents(tmp_path / "src", ["default", "acme"])
+    manifest = export_snapshot(tmp_path / "snapshots", tmp_path / "src" / "lancedb",
+                               tmp_path / "src" / "contents.db", tenant="acme")
+
+    exported = sqlite3.connect(tmp_path / "snapshots" / manifest.snapshot_id / "agno_contents.db")
+    tables = {name for (name,) in exported.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    check.equal(manifest.tenant, "acme")
+    check.equal(set(manifest.tables), {"acme"})
+    check.is_in(contents_table_name("acme"), tables)
+    check.is_not_in(contents_table_name("default"), tables)
+    check.equal(exported.execute(f"SELECT DISTINCT tenant FROM {SUMMARY_TABLE}").fetchall(), [("acme",)])
+    exported.close()
+
+    make_source(tmp_path / "dst")
+    other = add_tenant_contents(tmp_path / "dst", ["default"])
+    import_snapshot(tmp_path / "snapshots" / manifest.snapshot_id,
+                    tmp_path / "dst" / "lancedb", tmp_path / "dst" / "contents.db")
+
+    check.equal(other.get("default", "doc").summary, "about default")
+    check.equal(other.get("acme", "doc").summary, "about acme")
+    check.equal(content_names(tmp_path / "dst", "default"), ["default.pdf"])
+    check.equal(content_names(tmp_path / "dst", "acme"), ["acme.pdf"])
+    check.equal(lancedb.connect(str(tmp_path / "dst" / "lancedb")).open_table("pdf_knowledge").count_rows(), 3)
+    check.equal(list_snapshots(tmp_path / "snapshots", tenant="default"), [])
+
+
+def test_snapshot_routes_scoped_to_tenant(tmp_path, monkeypatch, client):
+    """
+    Another tenant's snapshot, neither listed nor downloaded it is.
+    """
+    make_source(tmp_path / "src")
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    manifest = export_snapshot(tmp_path / "snapshots", tmp_path / "src" / "lancedb",
+                               tmp_path / "src" / "contents.db", tenant="acme")
+    url = f"/api/snapshots/{manifest.snapshot_id}/download"
+
+    check.equal(client.get("/api/snapshots").json(), [])
+    check.equal(len(client.get("/api/snapshots", headers={"X-Tenant-ID": "acme"}).json()), 1)
+    check.equal(client.get(url).status_code, 404)
+    check.equal(client.get(url, headers={"X-Tenant-ID": "other"}).status_code, 404)
+    check.equal(client.get(url, headers={"X-Tenant-ID": "acme"}).status_code, 200)
+
+
+def test_replica_imports_snapshot(tmp_path, monkeypatch, client):
+    """
+    Read-only replica, from a snapshot its own data directory seeded it is.
+    """
+    make_source(tmp_path / "src")
+    manifest = export_snapshot(tmp_path / "snapshots", tmp_path / "src" / "lancedb",
+                               tmp_path / "src" / "contents.db", tenant="acme")
+    monkeypatch.setattr(settings, "role", "read_only")
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    monkeypatch.setattr(snapshots, "import_snapshot", functools.partial(
+        snapshots.import_snapshot, lancedb_uri=tmp_path / "replica" / "lancedb",
+        contents_db_file=tmp_path / "replica" / "contents.db"))
+
+    response = client.post(f"/api/snapshots/{manifest.snapshot_id}/import", headers={"X-Tenant-ID": "acme"})
+
+    check.equal(response.status_code, 200)
+    connection = lancedb.connect(str(tmp_path / "replica" / "lancedb"))
+    check.equal(connection.open_table("pdf_knowledge__acme").count_rows(), 2)
@@ -0,0 +1,198 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+import app.agent.chat_agent as chat_agent_module
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.summaries import (
+    SummaryQueue,
+    SummaryStore,
+    is_overview_question,
+    summarize_document,
+)
+from app.knowledge.vector_store import PdfLanceDb
+from app.metrics import get_metrics
+
+CHUNKS = [
+    (1, "Introduction", "This agreement covers the supply of parts."),
+    (1, "Introduction", "It starts on March first."),
+    (2, "Payment", "Payment terms are net thirty days."),
+    (3, "Termination", "Termination requires ninety days written notice."),
+]
+
+
+def fake_summarize(prompt: str) -> str:
+    """
+    Offline summarizer, prompts it records and numbered summaries returns.
+    """
+    fake_summarize.prompts.append(prompt)
+    return f"summary {len(fake_summarize.prompts)}"
+
+
+fake_summarize.prompts = []
+
+
+@pytest.fixture
+def knowledge(tmp_path):
+    """
+    Knowledge with one three-section document stored.
+    """
+    vector_db = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path / "lancedb"), embedder=HashEmbedder())
+    vector_db.insert("hash", [
+        Document(content=text, name="contract.pdf",
+                 meta_data={"file_id": "file-a", "filename": "contract.pdf",
+                            "page": page, "chunk": i, "section": section})
+        for i, (page, section, text) in enumerate(CHUNKS)
+    ])
+    fake_summarize.prompts = []
+    return SimpleNamespace(vector_db=vector_db)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Summarize this document", True),
+    ("What is this PDF about?", True),
+    ("Give me the key takeaways", True),
+    ("When does the contract renew?", False),
+    ("What are the payment terms?", False),
+])
+def test_overview_questions_detected(question, expected):
+    """
+    Whole-document questions only, routed to summaries they are.
+    """
+    check.equal(is_overview_question(question), expected)
+
+
+def test_document_summarized_per_section_then_whole(knowledge):
+    """
+    One call per section, then one for the document overview.
+    """
+    summary = summarize_document(knowledge, "file-a", fake_summarize, section_chars=6000)
+
+    check.equal([title for title, _ in summary.sections], ["Introduction", "Payment", "Termination"])
+    check.equal(len(fake_summarize.prompts), 4)
+    check.is_in("It starts on March first.", fake_summarize.prompts[0])
+    check.equal(summary.summary, "summary 4")
+    check.equal(summary.filename, "contract.pdf")
+    check.is_none(summarize_document(knowledge, "missing", fake_summarize, section_chars=6000))
+
+
+def test_overview_context_cached_until_summaries_change(knowledge, tmp_path):
+    """
+    Context cached it is, a new summary a fresh one builds.
+    """
+    store = SummaryStore(tmp_path / "contents.db")
+    store.save("default", summarize_document(knowledge, "file-a", fake_summarize, section_chars=6000))
+    get_metrics().reset()
+
+    context = store.overview_context("default", ["file-a"], max_chars=4000)
+    check.is_in("[Document: contract.pdf]", context)
+    check.is_in("[Section: Payment]", context)
+    check.equal(store.overview_context("default", ["file-a"], max_chars=4000), context)
+    check.equal(get_metrics().snapshot()["counters"].get("summaries.context_cache_hits"), 1)
+
+    check.is_none(store.overview_context("acme", None, max_chars=4000))
+    check.equal(store.delete("default", "file-a"), 4)
+    check.is_none(store.overview_context("default", ["file-a"], max_chars=4000))
+
+
+def test_document_rows_read_through_file_id_prefilter(knowledge):
+    """
+    Summarized document, through the indexed file_id column its rows read are.
+    """
+    wheres = []
+    scan = PdfLanceDb._scan_payloads
+
+    def record(self, needle, match, where=None, batch_size=1000):
+        wheres.append(where)
+        return scan(self, needle, match, where=where, batch_size=batch_size)
+
+    with patch.object(PdfLanceDb, "_scan_payloads", autospec=True, side_effect=record):
+        summarize_document(knowledge, "file-a", fake_summarize, section_chars=6000)
+
+    check.equal(wheres, ["file_id = 'file-a'"])
+
+
+def test_overview_context_cache_bounded(knowledge, tmp_path):
+    """
+    Many client-chosen scopes, least recently used contexts evicted are.
+    """
+    store = SummaryStore(tmp_path / "contents.db", cache_size=2)
+    store.save("default", summarize_document(knowledge, "file-a", fake_summarize, section_chars=6000))
+
+    for scope in (["file-a"], ["file-a", "x"], ["file-a", "y"]):
+        store.overview_context("default", scope, max_chars=4000)
+
+    check.equal(len(store._cache), 2)
+    check.is_not_in(("default", ("file-a",), 4000), store._cache)
+
+
+def test_read_only_store_without_table_returns_nothing(tmp_path):
+    """
+    Replica before the primary's first summary, empty answers it gives.
+    """
+    store = SummaryStore(tmp_path / "missing.db", read_only=True)
+    check.is_none(store.overview_context("default", None, max_chars=4000))
+
+
+@pytest.mark.asyncio
+async def test_queue_builds_summaries_in_background(knowledge, tmp_path):
+    """
+    Scheduled document, summarized and stored it is.
+    """
+    store = SummaryStore(tmp_path / "contents.db")
+    queue = SummaryQueue(store=store, summarize=fake_summarize, concurrency=1, section_chars=6000)
+
+    with patch("app.knowledge.summaries.get_knowledge", return_value=knowledge):
+        queue.schedule("file-a", "default")
+        await queue.flush()
+
+    check.equal(len(store.get("default", "file-a").sections), 3)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_scheduled_summaries(knowledge, tmp_path, monkeypatch):
+    """
+    App shutting down, summaries still running finished and stored they are.
+    """
+    import app.knowledge.summaries as summaries_module
+    from app.main import app, lifespan
+
+    store = SummaryStore(tmp_path / "contents.db")
+    queue = SummaryQueue(store=store, summarize=fake_summarize, concurrency=1, section_chars=6000)
+    monkeypatch.setattr(summaries_module, "_queue", queue)
+
+    queue.schedule("file-a", "default", knowledge)
+    async with lifespan(app):
+        pass
+
+    check.is_not_none(store.get("default", "file-a"))
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_overview_question_answered_from_summaries(MockAgent, MockOpenAIChat):
+    """
+    Overview question, summaries in the prompt and no chunk search.
+    """
+    chat_agent_module._agent_instance = None
+    fake_kb = MagicMock()
+    MockAgent.return_value.run.return_value = iter([SimpleNamespace(content="It is a contract.")])
+    fake_store = MagicMock()
+    fake_store.overview_context.return_value = "[Document: contract.pdf]\nA supply contract."
+
+    with patch("app.agent.chat_agent.get_knowledge", return_value=fake_kb), \
+            patch("app.agent.chat_agent.get_summary_store", return_value=fake_store):
+        agent = chat_agent_module.get_agent()
+        chunks = [c async for c in agent.stream_response(
+            "What is this document about?", "s1", filters={"file_id": ["file-a"]}, coalesce=False)]
+
+    check.equal("".join(chunks), "It is a contract.")
+    fake_kb.search.assert_not_called()
+    fake_store.overview_context.assert_called_once()
+    check.equal(fake_store.overview_context.call_args.args[1], ["file-a"])
+    check.is_in("A supply contract.", MockAgent.return_value.run.call_args.args[0])
+    chat_agent_module._agent_instance = None
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_check as check
+
+from app.knowledge.tenants import (
+    DEFAULT_TENANT,
+    KnowledgeCache,
+    normalize_tenant,
+    tenant_from_table_name,
+    tenant_table_name,
+)
+
+
+def test_table_names_round_trip():
+    """
+    Default tenant, the base table it keeps. Others, suffixed tables they get.
+    """
+    check.equal(tenant_table_name("pdf_knowledge", DEFAULT_TENANT), "pdf_knowledge")
+    check.equal(tenant_table_name("pdf_knowledge", "acme"), "pdf_knowledge__acme")
+    check.equal(tenant_from_table_name("pdf_knowledge", "pdf_knowledge"), DEFAULT_TENANT)
+    check.equal(tenant_from_table_name("pdf_knowledge", "pdf_knowledge__acme"), "acme")
+    check.is_none(tenant_from_table_name("pdf_knowledge", "summaries"))
+
+
+def test_invalid_tenant_rejected():
+    """
+    Missing tenant, default it becomes. Unsafe ids, rejected they are.
+    """
+    check.equal(normalize_tenant(None), DEFAULT_TENANT)
+    check.equal(normalize_tenant("team-1_a"), "team-1_a")
+    for bad in ["../x", "a b", "x" * 65]:
+        with pytest.raises(ValueError):
+            normalize_tenant(bad)
+
+
+def test_cache_bounded_least_recently_used_evicted():
+    """
+    Full cache, least recently used handle evicted it is, on next use reopened.
+    """
+    opened = []
+    cache = KnowledgeCache(factory=lambda t: opened.append(t) or object(), max_size=2, idle_seconds=0)
+
+    a = cache.get("a")
+    cache.get("b")
+    check.is_(cache.get("a"), a)
+    cache.get("c")
+
+    check.equal(cache.open_tenants(), ["a", "c"])
+    cache.get("b")
+    check.equal(opened, ["a", "b", "c", "b"])
+
+
+def test_cache_idle_handles_evicted():
+    """
+    Handles unused past the idle limit, evicted they are.
+    """
+    cache = KnowledgeCache(factory=lambda t: object(), max_size=8, idle_seconds=60)
+    with patch("app.knowledge.tenants.time.monotonic", return_value=0.0):
+        cache.get("a")
+    with patch("app.knowledge.tenants.time.monotonic", return_value=30.0):
+        cache.get("b")
+    with patch("app.knowledge.tenants.time.monotonic", return_value=70.0):
+        evicted = cache.evict_idle()
+
+    check.equal(evicted, 1)
+    check.equal(cache.open_tenants(), ["b"])
+    check.is_none(cache.peek("a"))
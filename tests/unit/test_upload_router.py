@@ -1,4 +1,6 @@
 import io
+import zipfile
+
 import pytest
 import pytest_check as check
 from httpx import AsyncClient, ASGITransport
@@ -6,6 +8,7 @@ from unittest.mock import patch
 
 from app.main import app
 from app.config import settings
+from tests.fakes import fake_parse
 
 
 @pytest.mark.asyncio
@@ -83,3 +86,77 @@ async def test_upload_rejects_large_file():
         )
 
     check.equal(response.status_code, 413)
+
+
+@pytest.mark.asyncio
+async def test_upload_with_document_key_ingests_version():
+    """
+    Document key given, versioned ingest used and version returned.
+    """
+    from app.knowledge.versioning import IngestResult
+
+    fake_pdf = io.BytesIO(b"%PDF-1.4 fake pdf content")
+    result = IngestResult(
+        document_id="doc-1", document_key="handbook", version=2, pages=3, pages_changed=1,
+        chunks=9, embedded=2, reused=7, updated=0, deleted=2, seconds=0.1,
+    )
+
+    with patch("app.api.file_upload_routes.ingest_pdf_version", return_value=result) as mock_ingest, \
+            patch("app.api.file_upload_routes.add_pdf_to_knowledge") as mock_add:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/upload/pdf",
+                files={"file": ("test.pdf", fake_pdf, "application/pdf")},
+                data={"document_key": "handbook"},
+            )
+
+    check.equal(response.status_code, 200)
+    data = response.json()
+    check.equal(data["file_id"], "doc-1")
+    check.equal(data["version"], 2)
+    check.equal(data["ingest"]["embedded"], 2)
+    check.equal(mock_ingest.call_args.kwargs["document_key"], "handbook")
+    mock_add.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_pdfs_and_zip_stored_in_one_call(tmp_path):
+    """
+    PDFs and ZIP entries together, in one store call written they are, per-file results returned.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("docs/inner.pdf", b"%PDF inner")
+        zf.writestr("docs/readme.txt", b"hello")
+        zf.writestr("docs/scanned.pdf", b"%PDF image only")
+    archive.seek(0)
+
+    with patch("app.knowledge.store.UPLOAD_DIR", tmp_path), \
+            patch("app.api.file_upload_routes.parse_pdf", fake_parse), \
+            patch("app.api.file_upload_routes.get_knowledge"), \
+            patch("app.api.file_upload_routes.store_parsed_files") as mock_store:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/upload/batch",
+                files=[
+                    ("files", ("a.pdf", io.BytesIO(b"%PDF a"), "application/pdf")),
+                    ("files", ("b.pdf", io.BytesIO(b""), "application/pdf")),
+                    ("files", ("docs.zip", archive, "application/zip")),
+                ],
+            )
+
+    check.equal(response.status_code, 200)
+    data = response.json()
+    statuses = {r["filename"]: r["status"] for r in data["files"]}
+    check.equal(statuses, {
+        "a.pdf": "completed", "inner.pdf": "completed", "b.pdf": "failed",
+        "docs/readme.txt": "skipped", "scanned.pdf": "failed",
+    })
+    check.equal(data["completed"], 2)
+    mock_store.assert_called_once()
+    stored = mock_store.call_args.args[1]
+    check.equal(sorted(f.filename for f in stored), ["a.pdf", "inner.pdf"])
+    # Failed entries, their saved files removed
+    check.equal(len(list(tmp_path.iterdir())), 2)
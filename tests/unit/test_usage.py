@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_check as check
+from agno.models.metrics import Metrics
+from agno.run.agent import RunOutput
+
+import app.agent.chat_agent as chat_agent_module
+from app.agent.usage import UsageMeter, UsageRecorder, UsageStore, current_usage, since_day
+from app.knowledge.retrieval import RetrievalResult
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    """
+    Recorder over a fresh usage table, written only on flush.
+    """
+    return UsageRecorder(UsageStore(tmp_path / "usage.db"), flush_seconds=60, batch_size=100)
+
+
+def meter(session_id: str, prompt: int, completion: int, total_ms: float, tenant: str = "default") -> UsageMeter:
+    return UsageMeter(tenant=tenant, session_id=session_id, prompt_tokens=prompt,
+                      completion_tokens=completion, embedding_tokens=5, first_token_ms=100.0, total_ms=total_ms)
+
+
+@pytest.mark.asyncio
+async def test_usage_aggregated_per_session_and_day(recorder):
+    """
+    Buffered until flushed, per session and day merged, totals and ranking right.
+    """
+    recorder.record(meter("s1", 1000, 200, 800.0))
+    recorder.record(meter("s1", 3000, 100, 1200.0))
+    recorder.record(meter("s2", 500, 2000, 400.0))
+    recorder.record(meter("s1", 9999, 9999, 1.0, tenant="acme"))
+    check.equal(recorder.store.top_sessions("default", since_day(1), "total_tokens", 10), [])
+
+    await recorder.flush()
+
+    usage = recorder.store.session_usage("default", "s1", since_day(7))
+    totals = usage["totals"]
+    check.equal(totals["requests"], 2)
+    check.equal(totals["prompt_tokens"], 4000)
+    check.equal(totals["embedding_tokens"], 10)
+    check.equal(totals["total_tokens"], 4310)
+    check.equal(totals["avg_total_ms"], 1000.0)
+    check.equal(totals["max_total_ms"], 1200.0)
+    check.equal([d["day"] for d in usage["days"]], [since_day(1)])
+
+    by_tokens = recorder.store.top_sessions("default", since_day(1), "total_tokens", 10)
+    check.equal([s["session_id"] for s in by_tokens], ["s1", "s2"])
+    # Output tokens pricier, by cost the order flips
+    by_cost = recorder.store.top_sessions("default", since_day(1), "cost_usd", 10)
+    check.equal([s["session_id"] for s in by_cost], ["s2", "s1"])
+
+
+@pytest.mark.asyncio
+async def test_full_batch_written_at_once(tmp_path):
+    """
+    Batch size reached, no waiting for the flush interval.
+    """
+    recorder = UsageRecorder(UsageStore(tmp_path / "usage.db"), flush_seconds=60, batch_size=1)
+    recorder.record(meter("s1", 10, 10, 5.0))
+    await asyncio.sleep(0.1)
+
+    check.equal(recorder.store.session_usage("default", "s1", since_day(1))["totals"]["requests"], 1)
+
+
+@pytest.mark.asyncio
+@patch("app.agent.chat_agent.ResilientOpenAIChat")
+@patch("app.agent.chat_agent.Agent")
+async def test_stream_records_tokens_and_timings(MockAgent, MockOpenAIChat, recorder):
+    """
+    Prompt, completion and embedding tokens of a streamed answer, to its session charged.
+    """
+    chat_agent_module._agent_instance = None
+
+    def search(*args, **kwargs):
+        # Embedder calls in the retrieval thread, the meter of the request they see
+        current_usage.get().add_embedding_tokens(7)
+        return RetrievalResult()
+
+    MockAgent.return_value.run.return_value = iter([
+        FakeChunk("Hi"), RunOutput(metrics=Metrics(input_tokens=120, output_tokens=30, total_tokens=150))])
+    with patch("app.agent.chat_agent.get_knowledge"), \
+            patch("app.agent.chat_agent.adaptive_search", side_effect=search), \
+            patch("app.agent.chat_agent.get_usage_recorder", return_value=recorder):
+        agent = chat_agent_module.get_agent()
+        events = [e async for e in agent.stream_events("Hello", "s1", tenant="acme", coalesce=False)]
+    await recorder.flush()
+    chat_agent_module._agent_instance = None
+
+    check.equal(events[-1].data["usage"]["embedding_tokens"], 7)
+    totals = recorder.store.session_usage("acme", "s1", since_day(1))["totals"]
+    check.equal((totals["prompt_tokens"], totals["completion_tokens"], totals["embedding_tokens"]), (120, 30, 7))
+    check.is_not_none(totals["avg_first_token_ms"])
+
+
+def test_usage_endpoints(client, recorder):
+    """
+    Top consumers and session totals, of the header's tenant only.
+    """
+    recorder.store.write([
+        ("acme", "s1", since_day(1), 2, 100, 50, 4, 200.0, 2, 900.0, 600.0),
+        ("acme", "s2", since_day(1), 1, 10, 5, 1, 50.0, 1, 100.0, 100.0),
+        ("default", "s3", since_day(1), 1, 9999, 9999, 1, 50.0, 1, 100.0, 100.0),
+    ])
+    headers = {"X-Tenant-ID": "acme"}
+    with patch("app.api.usage_routes.get_usage_store", return_value=recorder.store), \
+            patch("app.api.usage_routes.get_usage_recorder", return_value=recorder):
+        top = client.get("/api/usage/top?days=1&limit=5", headers=headers)
+        session = client.get("/api/usage/sessions/s1", headers=headers)
+        unknown = client.get("/api/usage/sessions/nobody", headers=headers)
+        invalid = client.get("/api/usage/top?order_by=bogus", headers=headers)
+
+    check.equal(top.status_code, 200)
+    check.equal([s["session_id"] for s in top.json()["sessions"]], ["s1", "s2"])
+    check.equal(session.json()["totals"]["total_tokens"], 154)
+    check.equal(session.json()["totals"]["avg_first_token_ms"], 100.0)
+    check.is_none(unknown.json()["totals"])
+    check.equal(invalid.status_code, 422)
@@ -0,0 +1,341 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.store import SearchResultCache
+from app.knowledge.vector_store import (
+    FILTER_COLUMNS,
+    FULL_VECTOR_COLUMN,
+    PdfLanceDb,
+    build_where,
+    quantize_int8,
+    reduce_dimensions,
+    reencode_table,
+)
+
+DOCS = [
+    "The contract renewal date is March first",
+    "Payment terms are net thirty days",
+    "The warranty covers parts and labour for two years",
+    "Termination requires ninety days written notice",
+]
+
+
+def make_store(path, precision: str, rescore_factor: int = 4, dimensions: int = 64) -> PdfLanceDb:
+    """
+    Vector store in temp dir, hash embedder it uses.
+    """
+    store = PdfLanceDb(
+        table_name="pdf_knowledge",
+        uri=str(path),
+        embedder=HashEmbedder(dimensions=dimensions),
+        precision=precision,
+        rescore_factor=rescore_factor,
+    )
+    store.insert("hash", [Document(content=text, name="doc") for text in DOCS])
+    return store
+
+
+def test_quantize_int8_round_trip():
+    """
+    Quantized vector, close to the original it stays.
+    """
+    vector = reduce_dimensions(np.random.default_rng(0).normal(size=128), 128)
+    codes, scale = quantize_int8(vector)
+
+    check.equal(codes.dtype, np.int8)
+    check.less(np.max(np.abs(codes * scale - vector)), scale)
+
+
+def test_reduce_dimensions_renormalizes():
+    """
+    Truncated vector, unit length again it is.
+    """
+    vector = reduce_dimensions(np.ones(8), 4)
+    check.equal(len(vector), 4)
+    check.almost_equal(float(np.linalg.norm(vector)), 1.0, abs=1e-6)
+
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_search_finds_best_match(tmp_path, precision):
+    """
+    Every precision, the matching chunk first it returns.
+    """
+    store = make_store(tmp_path, precision)
+
+    results = store.search("when is the contract renewal date", limit=2)
+
+    check.equal(len(results), 2)
+    check.equal(results[0].content, DOCS[0])
+
+
+def test_int8_without_rescoring_drops_full_vectors(tmp_path):
+    """
+    Rescoring disabled, no full-precision column stored.
+    """
+    store = make_store(tmp_path, "int8", rescore_factor=0)
+
+    check.is_not_in(FULL_VECTOR_COLUMN, store.table.schema.names)
+    check.equal(store.search("payment terms", limit=1)[0].content, DOCS[1])
+
+
+def test_existing_table_precision_wins(tmp_path):
+    """
+    Table stored as float16, reopened as int8 configured, float16 still used.
+    """
+    make_store(tmp_path, "float16")
+    reopened = PdfLanceDb(
+        table_name="pdf_knowledge",
+        uri=str(tmp_path),
+        embedder=HashEmbedder(dimensions=64),
+        precision="int8",
+    )
+
+    check.equal(reopened.precision, "float16")
+
+
+def test_reencode_table_to_int8_with_fewer_dimensions(tmp_path):
+    """
+    float32 table re-encoded, reduced int8 vectors searchable they are.
+    Old version, readable throughout it stays.
+    """
+    old = make_store(tmp_path, "float32", dimensions=64)
+    version = old.version
+    target = PdfLanceDb(
+        table_name="pdf_knowledge",
+        uri=str(tmp_path),
+        embedder=HashEmbedder(dimensions=32),
+        precision="float32",
+        check_dimensions=False,
+    )
+
+    rows = reencode_table(target, precision="int8", rescore_factor=2)
+
+    check.equal(rows, len(DOCS))
+    check.equal(target.precision, "int8")
+    check.greater(target.version, version)
+    check.equal(target.table.count_rows(), len(DOCS))
+    check.equal(target.table.schema.field("vector").type.list_size, 32)
+    check.equal(target.connection.table_names(), ["pdf_knowledge"])
+    check.equal(old.table.count_rows(), len(DOCS))
+
+
+def test_stored_dimensions_mismatch_rejected(tmp_path):
+    """
+    Table of other dimensions than the embedder's, loudly refused it is.
+    """
+    make_store(tmp_path, "float32", dimensions=64)
+
+    with pytest.raises(ValueError, match="64-dimensional"):
+        PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=HashEmbedder(dimensions=32))
+
+
+def test_quantized_table_keeps_no_full_vectors_by_default(tmp_path):
+    """
+    Rescoring off by default, no float32 copy a quantized table stores.
+    Table already keeping full vectors, new rows them still carry.
+    """
+    store = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path / "plain"),
+                       embedder=HashEmbedder(dimensions=64), precision="float16")
+    store.insert("hash", [Document(content=text, name="doc") for text in DOCS])
+    check.is_not_in(FULL_VECTOR_COLUMN, store.table.schema.names)
+
+    make_store(tmp_path / "rescored", "int8", rescore_factor=4)
+    reopened = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path / "rescored"),
+                          embedder=HashEmbedder(dimensions=64), precision="int8")
+    reopened.insert("more", [Document(content="Shipping takes five business days", name="doc")])
+    check.is_true(reopened.keeps_full_vectors)
+    check.equal(reopened.table.count_rows(), len(DOCS) + 1)
+
+
+def make_scoped_store(path, precision: str) -> PdfLanceDb:
+    """
+    Store with the same text in two files, file_id metadata set.
+    """
+    store = PdfLanceDb(
+        table_name="pdf_knowledge",
+        uri=str(path),
+        embedder=HashEmbedder(dimensions=64),
+        precision=precision,
+    )
+    for file_id in ("file-a", "file-b"):
+        store.insert(file_id, [
+            Document(content=text, name=f"{file_id}.pdf",
+                     meta_data={"file_id": file_id, "filename": f"{file_id}.pdf", "page": i})
+            for i, text in enumerate(DOCS)
+        ])
+    return store
+
+
+def test_build_where_splits_filters():
+    """
+    Filter columns into SQL go, other keys for post-filtering remain.
+    """
+    where, remaining = build_where(
+        {"file_id": ["a", "o'b"], "type": "pdf", "page": 2}, FILTER_COLUMNS)
+
+    check.equal(where, "file_id IN ('a', 'o''b') AND type = 'pdf'")
+    check.equal(remaining, {"page": 2})
+    check.equal(build_where({"file_id": []}, FILTER_COLUMNS)[0], "false")
+    check.equal(build_where(None, FILTER_COLUMNS), (None, {}))
+
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_search_prefilters_by_file_id(tmp_path, precision):
+    """
+    File scoped search, only rows of that file it returns.
+    """
+    store = make_scoped_store(tmp_path, precision)
+
+    results = store.search("contract renewal date", limit=4, filters={"file_id": ["file-b"]})
+
+    check.equal(len(results), 4)
+    check.is_true(all(r.meta_data["file_id"] == "file-b" for r in results))
+    check.equal(results[0].content, DOCS[0])
+
+
+def test_search_post_filters_other_metadata(tmp_path):
+    """
+    Keys without a column, on results filtered they still are.
+    """
+    store = make_scoped_store(tmp_path, "float32")
+
+    results = store.search("payment terms", limit=8, filters={"file_id": "file-a", "page": 1})
+
+    check.equal([r.content for r in results], [DOCS[1]])
+
+
+def test_file_id_scalar_index_created(tmp_path):
+    """
+    New table, scalar index on file_id it has.
+    """
+    store = make_scoped_store(tmp_path, "float32")
+
+    check.is_true(any("file_id" in index.columns for index in store.table.list_indices()))
+
+
+def test_reencode_adds_filter_columns_to_old_table(tmp_path):
+    """
+    Table without filter columns re-encoded, prefiltering then it supports.
+    """
+    import lancedb
+
+    schema = pa.schema([
+        pa.field("vector", pa.list_(pa.float32(), 64)),
+        pa.field("id", pa.string()),
+        pa.field("payload", pa.string()),
+    ])
+    lancedb.connect(str(tmp_path)).create_table("pdf_knowledge", schema=schema)
+    old = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path), embedder=HashEmbedder(dimensions=64))
+    check.equal(old.filter_columns, ())
+    old.insert("hash", [Document(content=DOCS[0], name="a", meta_data={"file_id": "file-a"})])
+
+    reencode_table(old, precision="float32", rescore_factor=0)
+
+    check.equal(old.filter_columns, FILTER_COLUMNS)
+    results = old.search("contract", limit=1, filters={"file_id": "file-a"})
+    check.equal(results[0].content, DOCS[0])
+
+
+def test_read_only_replica_swaps_in_new_versions(tmp_path):
+    """
+    Replica never writes, new primary versions only after refresh it serves.
+    """
+    primary = make_store(tmp_path, "float32")
+    replica = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path),
+                         embedder=HashEmbedder(dimensions=64), read_only=True)
+
+    with pytest.raises(PermissionError):
+        replica.insert("hash", [Document(content="nope", name="doc")])
+
+    primary.insert("hash2", [Document(content="Shipping takes five business days", name="doc")])
+    served = replica.version
+    check.equal(len(replica.search("shipping business days", limit=10)), len(DOCS))
+
+    check.is_true(replica.refresh())
+    check.greater(replica.version, served)
+    check.equal(len(replica.search("shipping business days", limit=10)), len(DOCS) + 1)
+    check.is_false(replica.refresh())
+
+
+def test_read_only_replica_never_creates_table(tmp_path):
+    """
+    Table missing, the replica waits for it and empty results returns.
+    """
+    replica = PdfLanceDb(table_name="pdf_knowledge", uri=str(tmp_path),
+                         embedder=HashEmbedder(dimensions=64), read_only=True)
+
+    check.is_none(replica.table)
+    check.equal(replica.search("anything"), [])
+    check.is_false(replica.refresh())
+
+    make_store(tmp_path, "float32")
+    check.is_true(replica.refresh())
+    check.equal(replica.table.count_rows(), len(DOCS))
+
+
+def test_search_result_cache_hits_until_new_version(tmp_path):
+    """
+    Repeated query from the cache served, a new table version it invalidates.
+    """
+    cache = SearchResultCache(max_bytes=1024 * 1024)
+    store = make_store(tmp_path, "float32")
+    store.result_cache = cache
+
+    first, _, _ = store.ranked_search("payment terms", limit=2)
+    second, timings, _ = store.ranked_search("payment terms", limit=2)
+    check.is_true(second is first)
+    check.is_not_in("search_ms", timings)
+    check.equal((cache.hits, cache.misses), (1, 1))
+
+    store.ranked_search("payment terms", limit=3)
+    check.equal(cache.misses, 2)
+
+    store.insert("more", [Document(content="Payment is due on receipt", name="doc")])
+    fresh, _, _ = store.ranked_search("payment terms", limit=2)
+    check.is_false(fresh is first)
+    check.equal(cache.stats()["invalidations"], 2)
+    check.equal(cache.stats()["entries"], 1)
+
+
+def test_ranked_search_reports_version_it_searched(tmp_path, monkeypatch):
+    """
+    Write through the shared handle mid-search, neither the rows nor the version it moves.
+    """
+    store = make_store(tmp_path, "float32")
+    searched = store.version
+    embed = store.embedder.get_embedding
+    writes = []
+
+    def embed_then_write(text):
+        if not writes:
+            writes.append(text)
+            store.insert("late", [Document(content="Payment is due on receipt", name="doc")])
+        return embed(text)
+
+    monkeypatch.setattr(store.embedder, "get_embedding", embed_then_write)
+    rows, _, version = store.ranked_search("payment terms", limit=10)
+
+    check.equal(version, searched)
+    check.equal(len(rows), len(DOCS))
+    check.greater(store.version, searched)
+
+
+def test_search_result_cache_evicts_least_recently_used(tmp_path):
+    """
+    Memory bound reached, oldest entries evicted they are.
+    """
+    store = make_store(tmp_path, "float32")
+    results, _, _ = store.ranked_search("payment terms", limit=4)
+    size = int(results.memory_usage(deep=True).sum())
+    cache = SearchResultCache(max_bytes=size * 2)
+
+    for key in ("a", "b", "c"):
+        cache.put(("t", 1, key, 4, None, None), results)
+    check.is_none(cache.get(("t", 1, "a", 4, None, None)))
+    check.is_not_none(cache.get(("t", 1, "c", 4, None, None)))
+    check.equal(cache.stats()["evictions"], 1)
+    check.less_equal(cache.stats()["bytes"], size * 2)
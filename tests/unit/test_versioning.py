@@ -0,0 +1,135 @@
+from unittest.mock import patch
+
+import pytest_check as check
+from agno.knowledge.document import Document
+
+from app.knowledge.embedders import HashEmbedder
+from app.knowledge.vector_store import PdfLanceDb
+from app.knowledge.versioning import document_id_for_key, ingest_pages
+from tests.fakes import make_knowledge
+
+PAGES = [
+    f"{n}. Chapter {n}\nThis chapter explains topic number {n} in plain words. "
+    f"It has exactly one paragraph about item {n}."
+    for n in range(1, 7)
+]
+
+
+def pages(texts: list[str]) -> list[Document]:
+    """
+    Page documents build, one per text.
+    """
+    return [
+        Document(name="manual.pdf", id=f"manual.pdf_{n}", meta_data={"page": n}, content=text)
+        for n, text in enumerate(texts, start=1)
+    ]
+
+
+def test_first_version_embeds_every_chunk(tmp_path):
+    """
+    New document, all chunks embedded and version one recorded.
+    """
+    embedder = HashEmbedder(dimensions=32)
+    knowledge = make_knowledge(tmp_path, embedder)
+    result = ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+
+    check.equal(result.version, 1)
+    check.equal(result.document_id, document_id_for_key("manual"))
+    check.equal(result.embedded, result.chunks)
+    check.equal(embedder.calls, result.chunks)
+    check.equal(knowledge.vector_db.get_count(), result.chunks)
+
+    row = knowledge.contents_db.get_knowledge_content(result.document_id)
+    check.equal(row.metadata["version"], 1)
+    check.equal(len(row.metadata["page_hashes"]), len(PAGES))
+
+
+def test_revision_embeds_only_changed_chunks(tmp_path):
+    """
+    One page revised, only its chunks embedded, stale rows removed.
+    """
+    embedder = HashEmbedder(dimensions=32)
+    knowledge = make_knowledge(tmp_path, embedder)
+    first = ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+    calls_before = embedder.calls
+
+    revised = list(PAGES)
+    revised[2] = "3. Chapter 3\nCompletely rewritten text for the third chapter."
+    result = ingest_pages(pages(revised), "manual.pdf", "manual", knowledge=knowledge)
+
+    check.equal(result.version, 2)
+    check.equal(result.pages_changed, 1)
+    check.equal(result.embedded, 1)
+    check.equal(embedder.calls - calls_before, 1)
+    check.equal(result.deleted, 1)
+    check.equal(knowledge.vector_db.get_count(), first.chunks)
+
+    hits = knowledge.vector_db.search("rewritten third chapter", limit=1)
+    check.is_true("rewritten" in hits[0].content)
+
+
+def test_inserted_page_updates_metadata_without_embedding(tmp_path):
+    """
+    Page inserted, later chunks shifted, only their metadata rewritten.
+    """
+    knowledge = make_knowledge(tmp_path)
+    ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+
+    result = ingest_pages(pages(["Preface\nA new preface page."] + PAGES), "manual.pdf", "manual",
+                          knowledge=knowledge)
+
+    check.equal(result.embedded, 1)
+    check.equal(result.updated, len(PAGES))
+    check.equal(result.deleted, 0)
+
+    rows = knowledge.vector_db.content_rows(result.document_id)
+    pages_by_content = {r["content"].split("\n")[0]: r["meta_data"]["page"] for r in rows.values()}
+    check.equal(pages_by_content["1. Chapter 1"], 2)
+
+
+def test_unchanged_upload_is_a_no_op(tmp_path):
+    """
+    Same pages again, nothing embedded and version kept.
+    """
+    embedder = HashEmbedder(dimensions=32)
+    knowledge = make_knowledge(tmp_path, embedder)
+    ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+    calls_before = embedder.calls
+
+    result = ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+
+    check.equal(result.version, 1)
+    check.equal(result.embedded, 0)
+    check.equal(embedder.calls, calls_before)
+
+
+def test_documents_are_isolated_by_key(tmp_path):
+    """
+    Other keys, their rows never touched are.
+    """
+    knowledge = make_knowledge(tmp_path)
+    ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+    other = ingest_pages(pages(PAGES[:2]), "other.pdf", "other", knowledge=knowledge)
+
+    ingest_pages(pages(PAGES[:1]), "manual.pdf", "manual", knowledge=knowledge)
+
+    check.equal(len(knowledge.vector_db.content_rows(other.document_id)), other.chunks)
+
+
+def test_stored_rows_read_through_file_id_prefilter(tmp_path):
+    """
+    Re-ingest, only the document's own rows through the indexed column it reads.
+    Legacy tables without it, the full scan still serves.
+    """
+    knowledge = make_knowledge(tmp_path)
+    manual = ingest_pages(pages(PAGES), "manual.pdf", "manual", knowledge=knowledge)
+    ingest_pages(pages(PAGES[:2]), "other.pdf", "other", knowledge=knowledge)
+
+    with patch.object(PdfLanceDb, "_scan_payloads", autospec=True,
+                      side_effect=PdfLanceDb._scan_payloads) as mock_scan:
+        ingest_pages(pages(PAGES[:5]), "manual.pdf", "manual", knowledge=knowledge)
+    check.equal(mock_scan.call_args.kwargs["where"], f"file_id = '{manual.document_id}'")
+
+    vector_db = knowledge.vector_db
+    vector_db.filter_columns = ()
+    check.equal(len(vector_db.content_rows(manual.document_id)), 5)